@@ -0,0 +1,41 @@
+"""
+Compare the conversion engines on a large synthetic multi-track file.
+
+    python benchmarks/bench_engines.py --events 200000 --tracks 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import generate_midi  # noqa: E402
+from src.converters.midi_converter import ENGINES, MidiConverter  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the conversion engines.')
+    parser.add_argument('--events', type=int, default=200000, help='Total number of events')
+    parser.add_argument('--tracks', type=int, default=8, help='Number of tracks')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per engine, best is reported')
+    args = parser.parse_args()
+
+    data, events = generate_midi(seed=0, tracks=args.tracks, events=args.events)
+    print(f'{events} events in {args.tracks} tracks, {len(data)} bytes')
+    outputs = {}
+    for engine in ENGINES:
+        converter = MidiConverter(engine=engine)
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            outputs[engine] = converter.convert_bytes(data)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f'{engine:>6}: {best * 1000:9.1f} ms  {events / best:12,.0f} events/s')
+    if outputs['numpy'] != outputs['mido']:
+        print('warning: numpy and mido outputs differ')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Seeded generator for synthetic drum MIDI corpora.
+
+Files are written as raw SMF bytes so every knob that matters for conversion
+speed can be controlled directly: number of tracks, events per track, note
+density, how often running status is used and how many meta/sysex events are
+mixed in. The same seed always produces the same corpus.
+
+    python benchmarks/corpus.py out_dir --files 100 --events 5000 --seed 1
+"""
+import argparse
+import os
+import random
+
+# Note numbers commonly emitted by EZ Drummer grooves (kick, snare, hi-hats, toms, cymbals).
+DRUM_NOTES = [35, 36, 38, 40, 37, 42, 44, 46, 22, 24, 25, 26, 60, 62, 63, 64,
+              41, 43, 45, 47, 48, 49, 51, 52, 53, 55, 57, 59]
+DRUM_CHANNEL = 9
+TICKS_PER_BEAT = 480
+
+
+def encode_vlq(value):
+    data = [value & 0x7F]
+    value >>= 7
+    while value:
+        data.append(0x80 | (value & 0x7F))
+        value >>= 7
+    return bytes(reversed(data))
+
+
+def meta_event(delta, meta_type, payload):
+    return encode_vlq(delta) + bytes((0xFF, meta_type)) + encode_vlq(len(payload)) + payload
+
+
+def generate_track(rng, events, density=0.5, running_status=0.5, meta_ratio=0.01,
+                   sysex_ratio=0.001, name='Drums'):
+    """
+    Generate MTrk data with about `events` events.
+
+    density is the probability that the next hit lands on the same tick as the
+    previous one (chords/flams); running_status is the probability that a
+    channel event omits a repeated status byte; meta_ratio and sysex_ratio are
+    the fractions of extra meta (marker/text) and sysex events.
+    Returns the track bytes and the number of events written.
+    """
+    track = bytearray(meta_event(0, 0x03, name.encode()))
+    track += meta_event(0, 0x51, (500000).to_bytes(3, 'big'))
+    track += meta_event(0, 0x58, bytes((4, 2, 24, 8)))
+    count = 3
+    last_status = None
+    pending_offs = []
+    step = TICKS_PER_BEAT // 4
+
+    def channel_event(delta, status, data):
+        nonlocal last_status
+        body = bytes(data)
+        if status != last_status or rng.random() >= running_status:
+            body = bytes((status,)) + body
+        track.extend(encode_vlq(delta) + body)
+        last_status = status
+
+    delta = 0
+    while count < events:
+        roll = rng.random()
+        if roll < sysex_ratio:
+            payload = bytes(rng.randrange(128) for _ in range(rng.randrange(2, 16))) + b'\xf7'
+            track.extend(encode_vlq(delta) + b'\xf0' + encode_vlq(len(payload)) + payload)
+            last_status = None
+        elif roll < sysex_ratio + meta_ratio:
+            track.extend(meta_event(delta, 0x06, f'marker {count}'.encode()))
+            last_status = None
+        elif pending_offs and rng.random() < 0.5:
+            note = pending_offs.pop(0)
+            if rng.random() < 0.5:
+                channel_event(delta, 0x90 | DRUM_CHANNEL, (note, 0))
+            else:
+                channel_event(delta, 0x80 | DRUM_CHANNEL, (note, 64))
+        elif rng.random() < 0.05:
+            # Hi-hat openness controller.
+            channel_event(delta, 0xB0 | DRUM_CHANNEL, (4, rng.randrange(128)))
+        else:
+            note = rng.choice(DRUM_NOTES)
+            channel_event(delta, 0x90 | DRUM_CHANNEL, (note, rng.randrange(1, 128)))
+            pending_offs.append(note)
+        count += 1
+        delta = 0 if rng.random() < density else step * rng.randrange(1, 4)
+    for note in pending_offs:
+        channel_event(0, 0x80 | DRUM_CHANNEL, (note, 64))
+        count += 1
+    track += meta_event(0, 0x2F, b'')
+    return bytes(track), count + 1
+
+
+def generate_midi(seed=0, tracks=1, events=1000, **options):
+    """
+    Generate a complete SMF (format 1 for several tracks) and return its bytes
+    and total event count. Extra options are passed to generate_track().
+    """
+    rng = random.Random(seed)
+    smf_format = 0 if tracks == 1 else 1
+    data = bytearray(b'MThd' + (6).to_bytes(4, 'big') + smf_format.to_bytes(2, 'big')
+                     + tracks.to_bytes(2, 'big') + TICKS_PER_BEAT.to_bytes(2, 'big'))
+    total = 0
+    for index in range(tracks):
+        track, count = generate_track(rng, max(4, events // tracks), name=f'Drums {index + 1}',
+                                      **options)
+        data += b'MTrk' + len(track).to_bytes(4, 'big') + track
+        total += count
+    return bytes(data), total
+
+
+def generate_corpus(directory, files=10, seed=0, tracks=1, events=1000, **options):
+    """
+    Write `files` generated MIDI files into directory and return their paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(files):
+        data, _ = generate_midi(seed * 1000003 + index, tracks, events, **options)
+        path = os.path.join(directory, f'groove_{index:05d}.mid')
+        with open(path, 'wb') as f:
+            f.write(data)
+        paths.append(path)
+    return paths
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--tracks', type=int, default=1, help='Tracks per file')
+    parser.add_argument('--events', type=int, default=2000, help='Events per file')
+    parser.add_argument('--density', type=float, default=0.3,
+                        help='Probability that a hit shares the previous tick')
+    parser.add_argument('--running-status', type=float, default=0.5,
+                        help='Probability that a channel event uses running status')
+    parser.add_argument('--meta-ratio', type=float, default=0.01, help='Fraction of meta events')
+    parser.add_argument('--sysex-ratio', type=float, default=0.001, help='Fraction of sysex events')
+
+
+def corpus_options(args):
+    return {
+        'tracks': args.tracks,
+        'events': args.events,
+        'density': args.density,
+        'running_status': args.running_status,
+        'meta_ratio': args.meta_ratio,
+        'sysex_ratio': args.sysex_ratio,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic drum MIDI corpus.')
+    parser.add_argument('directory', help='Output directory')
+    parser.add_argument('--files', type=int, default=10, help='Number of files')
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+    paths = generate_corpus(args.directory, args.files, args.seed, **corpus_options(args))
+    print(f'Wrote {len(paths)} files to {args.directory}')
+
+
+if __name__ == '__main__':
+    main()
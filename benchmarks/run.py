@@ -0,0 +1,175 @@
+"""
+Benchmark suite for the MIDI drums converter.
+
+Generates a seeded corpus, then measures:
+  * the mido engine split into parse, remap and save stages,
+  * end-to-end in-memory conversion for every engine,
+  * end-to-end CLI throughput (single-file invocations and --batch).
+Each result reports events/sec; peak RSS is reported for the benchmark
+process and for the CLI child processes. Results are written as JSON so runs
+can be compared over time.
+
+    python benchmarks/run.py --files 20 --events 5000 --output results.json
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import mido  # noqa: E402
+from corpus import add_corpus_arguments, corpus_options, generate_corpus, generate_midi  # noqa: E402
+from src.converters.midi_converter import ENGINES, MidiConverter  # noqa: E402
+
+
+def peak_rss_kb(who=resource.RUSAGE_SELF):
+    """
+    Peak resident set size in KiB (ru_maxrss is in bytes on macOS).
+    """
+    peak = resource.getrusage(who).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def result(name, seconds, events, **extra):
+    entry = {
+        'name': name,
+        'seconds': seconds,
+        'events': events,
+        'events_per_sec': events / seconds if seconds else None,
+    }
+    entry.update(extra)
+    return entry
+
+
+def bench_stages(datas, events, repeat):
+    """
+    Time mido parse, remap and save separately over the whole corpus.
+    """
+    converter = MidiConverter()
+    parse_time = remap_time = save_time = 0.0
+    for data in datas:
+        parse_time += best_of(repeat, lambda: mido.MidiFile(file=io.BytesIO(data)))
+        midi_file = mido.MidiFile(file=io.BytesIO(data))
+        remap_time += best_of(repeat, lambda: converter.remap_midi_file(midi_file))
+        save_time += best_of(repeat, lambda: midi_file.save(file=io.BytesIO()))
+    return [
+        result('mido.parse', parse_time, events),
+        result('mido.remap', remap_time, events),
+        result('mido.save', save_time, events),
+    ]
+
+
+def bench_engines(datas, events, repeat):
+    results = []
+    for engine in ENGINES:
+        converter = MidiConverter(engine=engine)
+        seconds = sum(best_of(repeat, lambda: converter.convert_bytes(data)) for data in datas)
+        results.append(result(f'engine.{engine}', seconds, events))
+    return results
+
+
+def bench_cli(paths, events, engine, workers):
+    """
+    Measure CLI throughput: one process per file, then a single --batch run.
+    """
+    script = os.path.join(REPO_ROOT, 'convert_midi.py')
+    results = []
+    with tempfile.TemporaryDirectory() as output_root:
+        start = time.perf_counter()
+        for index, path in enumerate(paths):
+            subprocess.run([sys.executable, script, '--engine', engine, path,
+                            os.path.join(output_root, f'{index}.mid')],
+                           check=True, capture_output=True, cwd=REPO_ROOT)
+        elapsed = time.perf_counter() - start
+        results.append(result('cli.single', elapsed, events, files=len(paths),
+                              files_per_sec=len(paths) / elapsed))
+
+        command = [sys.executable, script, '--batch', '--engine', engine,
+                   '--output-root', os.path.join(output_root, 'batch')]
+        if workers:
+            command += ['--workers', str(workers)]
+        start = time.perf_counter()
+        subprocess.run(command + paths, check=True, capture_output=True, cwd=REPO_ROOT)
+        elapsed = time.perf_counter() - start
+        results.append(result('cli.batch', elapsed, events, files=len(paths),
+                              files_per_sec=len(paths) / elapsed))
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=REPO_ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the converter benchmark suite.')
+    parser.add_argument('--files', type=int, default=20, help='Number of corpus files')
+    add_corpus_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, best is kept')
+    parser.add_argument('--cli-engine', choices=ENGINES, default='mido', help='Engine for CLI runs')
+    parser.add_argument('--workers', type=int, default=None, help='Workers for the --batch CLI run')
+    parser.add_argument('--skip-cli', action='store_true', help='Skip the CLI throughput runs')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    options = corpus_options(args)
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        paths = generate_corpus(corpus_dir, args.files, args.seed, **options)
+        datas = []
+        for path in paths:
+            with open(path, 'rb') as f:
+                datas.append(f.read())
+        events = sum(generate_midi(args.seed * 1000003 + index, **options)[1]
+                     for index in range(args.files))
+
+        results = bench_stages(datas, events, args.repeat)
+        results += bench_engines(datas, events, args.repeat)
+        if not args.skip_cli:
+            results += bench_cli(paths, events, args.cli_engine, args.workers)
+
+    report = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'corpus': dict(options, files=args.files, seed=args.seed,
+                       bytes=sum(len(data) for data in datas)),
+        'results': results,
+        'peak_rss_kb': peak_rss_kb(),
+        'cli_peak_rss_kb': peak_rss_kb(resource.RUSAGE_CHILDREN) if not args.skip_cli else None,
+    }
+
+    for entry in results:
+        print(f"{entry['name']:>14}: {entry['seconds'] * 1000:10.1f} ms "
+              f"{entry['events_per_sec']:14,.0f} events/s")
+    print(f"peak RSS: {report['peak_rss_kb']} KiB")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,10 @@ setup(
     description='A MIDI file converter for EZ Drummer 3 to PV edition.',
     packages=find_packages(where='src'),
     package_dir={'': 'src'},
+    package_data={'converters': ['profile_data/*.json', 'profile_data/*.toml']},
+    entry_points={
+        'console_scripts': ['midi-drums-convert=converters.cli:main'],
+    },
     install_requires=[
         'numpy',
         'mido',
@@ -18,5 +22,5 @@ setup(
         'License :: OSI Approved :: MIT License',
         'Operating System :: OS Independent',
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.8',
 )
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+Mapping profile analysis.
+
+Compiles the mapping groups of a profile into a 128-node graph, with an edge
+from every mapped source note to its target (one per velocity layer), and a
+reverse index from every note to the sources that produce it. From these it
+reports, as a JSON-serializable dict:
+
+- overridden: a source note defined by more than one group, where merging the
+  groups lets the last definition silently win;
+- chains: paths of two or more mappings, where a target is itself a mapped
+  source (e.g. B0 -> C0 -> B1), and cycles;
+- idempotence violations: notes whose result changes if the mapping is
+  applied twice, i.e. converting an already converted file alters it again;
+- unreachable targets: targets that no effective mapping produces any more
+  because their only sources were overridden;
+- invalid entries: note names that cannot be parsed.
+
+Overrides, unreachable targets and invalid entries are errors; chains and
+idempotence violations are warnings, since a single conversion maps every
+note exactly once.
+"""
+import os
+
+from .notes import DEFAULT_MIDDLE_C, NoteError, note_name, note_number
+from .profiles import (
+    DEFAULT_PROFILE, MappingProfile, ProfileError, available_profiles, find_profile_file,
+    read_profile_data
+)
+
+
+class MappingGraph:
+    """
+    successors[note] holds the targets of a mapped source note (empty for
+    unmapped notes) and predecessors[note] the sources mapped onto a note.
+    """
+    __slots__ = ('successors', 'predecessors')
+
+    def __init__(self, edges):
+        self.successors = tuple(tuple(sorted(set(edges.get(note, ())))) for note in range(128))
+        predecessors = [[] for _ in range(128)]
+        for source, targets in sorted(edges.items()):
+            for target in set(targets):
+                predecessors[target].append(source)
+        self.predecessors = tuple(tuple(sources) for sources in predecessors)
+
+    def moves(self, note):
+        """
+        Return the notes a note is mapped to other than itself.
+        """
+        return [target for target in self.successors[note] if target != note]
+
+    def paths(self, start):
+        """
+        Yield (path, cycle) for every maximal path of mappings from start;
+        cycle is True when the path ends on a note it already visited.
+        """
+        stack = [[start]]
+        while stack:
+            path = stack.pop()
+            targets = self.moves(path[-1])
+            if not targets:
+                yield path, False
+            for target in reversed(targets):
+                if target in path:
+                    yield path + [target], True
+                else:
+                    stack.append(path + [target])
+
+
+def _target_notes(target, middle_c):
+    if isinstance(target, list):
+        return [note_number(layer['note'], middle_c) for layer in target]
+    return [note_number(target, middle_c)]
+
+
+def analyze_groups(groups, name='profile', middle_c=DEFAULT_MIDDLE_C):
+    """
+    Analyze raw (unvalidated) mapping groups, merged in order as the
+    converter merges them. Returns the report described in the module docstring.
+    """
+    invalid = []
+    definitions = {}
+    if not isinstance(groups, dict):
+        invalid.append("'groups' must be a table of mapping groups")
+        groups = {}
+    for group_name, mappings in groups.items():
+        if not isinstance(mappings, dict):
+            invalid.append(f"group '{group_name}' must map note names to note names")
+            continue
+        for source, target in mappings.items():
+            try:
+                definitions.setdefault(note_number(source, middle_c), []).append(
+                    (group_name, _target_notes(target, middle_c)))
+            except (NoteError, KeyError, TypeError):
+                invalid.append(f"group '{group_name}': invalid mapping {source!r} -> {target!r}")
+
+    graph = MappingGraph({source: defined[-1][1] for source, defined in definitions.items()})
+
+    overridden = []
+    named_targets = {}
+    for source, defined in sorted(definitions.items()):
+        for group_name, targets in defined:
+            for target in targets:
+                named_targets.setdefault(target, set()).add(source)
+        if len(defined) > 1:
+            overridden.append({
+                'note': note_name(source),
+                'groups': [group_name for group_name, _ in defined],
+                'effective_group': defined[-1][0],
+                'effective_targets': [note_name(target) for target in defined[-1][1]],
+            })
+
+    idempotence = []
+    moving = []
+    for source in range(128):
+        for target in graph.moves(source):
+            for twice in graph.moves(target):
+                idempotence.append({'note': note_name(source), 'once': note_name(target),
+                                    'twice': note_name(twice)})
+            if graph.moves(target) and source not in moving:
+                moving.append(source)
+
+    # Chains start at notes nothing chains into; notes left over lie on cycles.
+    chains = []
+    covered = set()
+    starts = [source for source in moving
+              if not any(graph.moves(p) for p in graph.predecessors[source] if p != source)]
+    for start in starts + moving:
+        if start in covered:
+            continue
+        for path, cycle in graph.paths(start):
+            covered.update(path)
+            if len(path) > 2 or cycle:
+                chains.append({'path': [note_name(note) for note in path], 'cycle': cycle})
+
+    unreachable = [{'note': note_name(target),
+                    'overridden_sources': [note_name(source) for source in sorted(sources)]}
+                   for target, sources in sorted(named_targets.items())
+                   if not graph.predecessors[target]]
+
+    return {
+        'profile': name,
+        'mapped_notes': sum(1 for targets in graph.successors if targets),
+        'targets': {note_name(target): [note_name(source) for source in sources]
+                    for target, sources in enumerate(graph.predecessors) if sources},
+        'overridden': overridden,
+        'chains': chains,
+        'idempotence_violations': idempotence,
+        'unreachable_targets': unreachable,
+        'invalid': invalid,
+        'errors': len(overridden) + len(unreachable) + len(invalid),
+        'warnings': len(chains) + len(idempotence),
+    }
+
+
+def analyze_profile(profile=None):
+    """
+    Analyze a profile given by name, file path or MappingProfile (the built-in
+    profile by default). Profile files are analyzed from their raw contents,
+    so problems validation would reject are reported instead of raised.
+    """
+    if isinstance(profile, MappingProfile):
+        return analyze_groups(profile.groups, profile.name)
+    if profile is None or profile == DEFAULT_PROFILE:
+        from .note_mappings import MAPPING_GROUPS
+
+        return analyze_groups(MAPPING_GROUPS, DEFAULT_PROFILE)
+    path = profile if os.path.isfile(profile) else find_profile_file(profile)
+    if path is None:
+        raise ProfileError(f"Unknown profile '{profile}', available: {', '.join(available_profiles())}")
+    data = read_profile_data(path)
+    name = data.get('name', os.path.splitext(os.path.basename(path))[0])
+    return analyze_groups(data.get('groups'), name, data.get('middle_c', DEFAULT_MIDDLE_C))
+
+
+def format_analysis(report):
+    """
+    Return a short human-readable summary of an analyze_groups() report:
+    every error and cycle, and counts of the other warnings.
+    """
+    lines = [f"{report['profile']}: {report['mapped_notes']} mapped notes, "
+             f"{report['errors']} errors, {report['warnings']} warnings"]
+    lines.extend(f'  INVALID {message}' for message in report['invalid'])
+    for entry in report['overridden']:
+        lines.append(f"  OVERRIDDEN {entry['note']} in {', '.join(entry['groups'])}: "
+                     f"'{entry['effective_group']}' wins")
+    for entry in report['unreachable_targets']:
+        lines.append(f"  UNREACHABLE {entry['note']} (only from overridden "
+                     f"{', '.join(entry['overridden_sources'])})")
+    for chain in report['chains']:
+        if chain['cycle']:
+            lines.append(f"  CYCLE {' -> '.join(chain['path'])}")
+    if report['warnings']:
+        lines.append(f"  {len(report['chains'])} mapping chains, "
+                     f"{len(report['idempotence_violations'])} notes change if converted twice")
+    return '\n'.join(lines)
@@ -0,0 +1,293 @@
+"""
+Archive conversion.
+
+Converts the MIDI members of a zip or tar archive in memory and writes a new
+archive with the same member order, names and metadata, without extracting
+anything to disk. Consecutive MIDI members are converted in parallel in a
+process pool, in windows of a bounded size so memory use does not grow with
+the archive. Other members are copied through unchanged.
+
+Other tar members are copied byte for byte. Other zip members are copied
+without recompressing them: their compressed data is copied as is, after a
+local header rebuilt from the central directory entry, which already holds
+their CRC and sizes. This relies on zipfile internals; where they are missing
+members are decompressed and recompressed instead.
+"""
+import copy
+import io
+import os
+import struct
+import tarfile
+import zipfile
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from .batch import _convert_data, _init_worker, is_midi_path
+from .smf import atomic_output
+
+# midi is False for members copied through; a MIDI member whose conversion
+# failed, or which could not be read, is copied through unchanged and has its
+# error set.
+ArchiveResult = namedtuple('ArchiveResult', ['name', 'midi', 'error', 'stats'])
+
+TAR_COMPRESSION = {
+    '.tar.gz': 'gz', '.tgz': 'gz',
+    '.tar.bz2': 'bz2', '.tbz2': 'bz2',
+    '.tar.xz': 'xz', '.txz': 'xz',
+}
+ZIP64_EXTRA = 0x0001
+# General purpose flag set when sizes and CRC follow the data instead of
+# being in the local header.
+ZIP_DATA_DESCRIPTOR = 0x08
+COPY_CHUNK_SIZE = 1 << 20
+# Raised when reading a single corrupt, encrypted or truncated member.
+MEMBER_ERRORS = (zipfile.BadZipFile, zlib.error, RuntimeError, tarfile.TarError, EOFError)
+
+
+class ArchiveError(ValueError):
+    """
+    Raised when an input is neither a zip nor a tar archive.
+    """
+
+
+def is_archive_path(path):
+    return path.lower().endswith(('.zip', '.tar') + tuple(TAR_COMPRESSION))
+
+
+def _tar_write_mode(path):
+    lower = path.lower()
+    for extension, compression in TAR_COMPRESSION.items():
+        if lower.endswith(extension):
+            return 'w:' + compression
+    return 'w'
+
+
+def _strip_zip64_extra(extra):
+    """
+    Drop zip64 records from a zip extra field; zipfile writes its own when needed.
+    """
+    kept = []
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id = int.from_bytes(extra[pos:pos + 2], 'little')
+        size = int.from_bytes(extra[pos + 2:pos + 4], 'little')
+        if header_id != ZIP64_EXTRA:
+            kept.append(extra[pos:pos + 4 + size])
+        pos += 4 + size
+    return b''.join(kept)
+
+
+def _copy_zip_info(info):
+    new = zipfile.ZipInfo(info.filename, info.date_time)
+    new.compress_type = info.compress_type
+    new.comment = info.comment
+    new.extra = _strip_zip64_extra(info.extra)
+    new.create_system = info.create_system
+    new.create_version = info.create_version
+    new.internal_attr = info.internal_attr
+    new.external_attr = info.external_attr
+    return new
+
+
+def _can_copy_raw(target):
+    """
+    Whether zipfile and the ZipFile target have the private names that
+    _ZipArchive.copy() reads and updates.
+    """
+    module_names = ('structFileHeader', 'sizeFileHeader', 'stringFileHeader',
+                    '_FH_SIGNATURE', '_FH_FILENAME_LENGTH', '_FH_EXTRA_FIELD_LENGTH')
+    target_names = ('fp', 'filelist', 'NameToInfo', 'start_dir', '_didModify')
+    return (all(hasattr(zipfile, name) for name in module_names)
+            and all(hasattr(target, name) for name in target_names)
+            and hasattr(zipfile.ZipInfo, 'FileHeader')
+            and struct.calcsize(zipfile.structFileHeader) == zipfile.sizeFileHeader)
+
+
+class _ZipArchive:
+    def __init__(self, input_path, output_path, outfile):
+        self.source = zipfile.ZipFile(input_path)
+        self.target = zipfile.ZipFile(outfile, 'w')
+        self.target.comment = self.source.comment
+        self.raw_copy = _can_copy_raw(self.target)
+
+    def members(self):
+        for info in self.source.infolist():
+            yield info.filename, info, not info.is_dir() and is_midi_path(info.filename)
+
+    def read(self, info):
+        return self.source.read(info)
+
+    def write(self, info, data):
+        self.target.writestr(_copy_zip_info(info), data)
+
+    def copy(self, info):
+        """
+        Copy a member's compressed data without decompressing it. zipfile has
+        no API for this, so the member is appended the way ZipFile.writestr()
+        appends one. On failure the output is cut back to where the member
+        started.
+
+        Without the zipfile internals this needs, the member is read and
+        written again with its original metadata and compression method.
+        """
+        if not self.raw_copy:
+            self.target.writestr(_copy_zip_info(info), self.source.read(info))
+            return
+        new = _copy_zip_info(info)
+        new.flag_bits = info.flag_bits & ~ZIP_DATA_DESCRIPTOR
+        new.CRC = info.CRC
+        new.compress_size = info.compress_size
+        new.file_size = info.file_size
+
+        source = self.source.fp
+        source.seek(info.header_offset)
+        header = struct.unpack(zipfile.structFileHeader, source.read(zipfile.sizeFileHeader))
+        if header[zipfile._FH_SIGNATURE] != zipfile.stringFileHeader:
+            raise zipfile.BadZipFile(f"Bad local file header for '{info.filename}'")
+        source.seek(header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH],
+                    os.SEEK_CUR)
+
+        target = self.target
+        target._didModify = True
+        new.header_offset = target.fp.tell()
+        try:
+            target.fp.write(new.FileHeader())
+            remaining = info.compress_size
+            while remaining:
+                chunk = source.read(min(remaining, COPY_CHUNK_SIZE))
+                if not chunk:
+                    raise zipfile.BadZipFile(f"'{info.filename}' is truncated")
+                target.fp.write(chunk)
+                remaining -= len(chunk)
+        except BaseException:
+            target.fp.seek(new.header_offset)
+            target.fp.truncate()
+            raise
+        target.filelist.append(new)
+        target.NameToInfo[new.filename] = new
+        target.start_dir = target.fp.tell()
+
+    def copy_unreadable(self, info):
+        """
+        Copy a member that could not be read; its compressed data is copied
+        as is. Returns whether it was copied.
+        """
+        try:
+            self.copy(info)
+        except MEMBER_ERRORS:
+            return False
+        return True
+
+    def close(self):
+        self.target.close()
+        self.source.close()
+
+
+class _TarArchive:
+    def __init__(self, input_path, output_path, outfile):
+        self.source = tarfile.open(input_path, 'r:*')
+        self.target = tarfile.open(fileobj=outfile, mode=_tar_write_mode(output_path),
+                                   format=self.source.format)
+
+    def members(self):
+        for member in self.source:
+            yield member.name, member, member.isfile() and is_midi_path(member.name)
+
+    def read(self, member):
+        return self.source.extractfile(member).read()
+
+    def write(self, member, data):
+        member = copy.copy(member)
+        member.size = len(data)
+        self.target.addfile(member, io.BytesIO(data))
+
+    def copy(self, member):
+        self.target.addfile(member, self.source.extractfile(member) if member.isfile() else None)
+
+    def copy_unreadable(self, member):
+        # Its data cannot be copied without reading it, and a tar stream
+        # cannot be cut back after a partial write.
+        return False
+
+    def close(self):
+        self.target.close()
+        self.source.close()
+
+
+def open_archive(input_path, output_path, outfile):
+    """
+    Open input_path for reading and a new archive of the same kind written to
+    the binary file outfile; output_path selects the tar compression.
+    """
+    if zipfile.is_zipfile(input_path):
+        return _ZipArchive(input_path, output_path, outfile)
+    if tarfile.is_tarfile(input_path):
+        return _TarArchive(input_path, output_path, outfile)
+    raise ArchiveError(f'{input_path} is not a zip or tar archive')
+
+
+def convert_archive(input_path, output_path, workers=None, chunksize=16, converter_options=None):
+    """
+    Convert the MIDI members of a zip or tar archive into a new archive and
+    yield an ArchiveResult per member, in archive order. Runs of MIDI members
+    of up to chunksize * workers files are converted in parallel; other
+    members end a run and are copied once the run has been written.
+
+    A MIDI member that cannot be read is reported in its result's error and
+    copied through as is when the archive format allows it, otherwise left
+    out of the new archive.
+    """
+    converter_options = converter_options or {}
+    # Written to a temporary file that replaces output_path only once the
+    # whole archive has been written.
+    with atomic_output(output_path) as outfile:
+        archive = open_archive(input_path, output_path, outfile)
+        executor = None
+        if workers != 1:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(converter_options,))
+            window = max(1, chunksize) * (workers or os.cpu_count() or 1)
+        else:
+            _init_worker(converter_options)
+            window = 1
+        pending = []
+
+        def flush():
+            datas = [data for _, _, data in pending]
+            if executor is None:
+                converted = map(_convert_data, datas)
+            else:
+                converted = executor.map(_convert_data, datas, chunksize=max(1, chunksize))
+            results = []
+            for (name, member, data), (output, error, file_stats) in zip(pending, converted):
+                archive.write(member, data if output is None else output)
+                results.append(ArchiveResult(name, True, error, file_stats))
+            pending.clear()
+            return results
+
+        try:
+            for name, member, midi in archive.members():
+                if midi:
+                    try:
+                        data = archive.read(member)
+                    except MEMBER_ERRORS as e:
+                        error = f'{type(e).__name__}: {e}'
+                    else:
+                        pending.append((name, member, data))
+                        if len(pending) >= window:
+                            yield from flush()
+                        continue
+                    yield from flush()
+                    if not archive.copy_unreadable(member):
+                        error += ' (left out of the archive)'
+                    yield ArchiveResult(name, True, error, None)
+                    continue
+                yield from flush()
+                archive.copy(member)
+                yield ArchiveResult(name, False, None, None)
+            yield from flush()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            archive.close()
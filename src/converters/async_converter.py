@@ -0,0 +1,218 @@
+"""
+Asyncio conversion API.
+
+AsyncMidiConverter runs conversions on a thread or process executor so they
+never block the event loop, and caps the number of jobs in flight with a
+semaphore. convert_many() streams results back in completion order and only
+pulls the next job from its input once a slot is free, so a burst of uploads
+queues up in the caller instead of in memory here.
+"""
+import asyncio
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .midi_converter import MidiConverter
+
+EXECUTORS = ('thread', 'process')
+DEFAULT_MAX_IN_FLIGHT = 16
+
+# job is the submitted job, output the converted bytes (for in-memory jobs) or
+# the output path (for file jobs), error a message when the job failed or timed out.
+AsyncResult = namedtuple('AsyncResult', ['job', 'output', 'error'])
+
+_worker_converter = None
+
+
+def _init_worker(converter_options):
+    global _worker_converter
+    _worker_converter = MidiConverter(**converter_options)
+
+
+def _convert_job(job):
+    if isinstance(job, (bytes, bytearray, memoryview)):
+        return _worker_converter.convert_bytes(job)
+    input_path, output_path = job
+    _worker_converter.convert_to_pv(input_path, output_path)
+    return output_path
+
+
+def _call_in_loop(loop, callback):
+    try:
+        loop.call_soon_threadsafe(callback)
+    except RuntimeError:
+        # The event loop is closed, so nothing is waiting for the slot any more.
+        pass
+
+
+class AsyncMidiConverter:
+    """
+    Converts MIDI files from asyncio code.
+
+    executor is 'thread' (one converter shared by the threads; keeps the event
+    loop responsive, but conversions still share the GIL) or 'process' (one
+    converter per worker process, for CPU-bound loads). At most max_in_flight jobs are submitted to
+    the executor at a time; timeout is the default per-job limit in seconds.
+    converter_options are passed to MidiConverter.
+    """
+
+    def __init__(self, executor='thread', max_workers=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 timeout=None, **converter_options):
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', expected one of {', '.join(EXECUTORS)}")
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1')
+        if executor == 'process' and converter_options.get('stats') is not None:
+            raise ValueError('stats are only collected with the thread executor')
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        if executor == 'thread':
+            self.converter = MidiConverter(**converter_options)
+            self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        else:
+            self.converter = None
+            self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                                initargs=(converter_options,))
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        # Created on first use so it belongs to the running event loop.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    async def _run(self, job, timeout, on_done):
+        """
+        Run job on the executor and return its result. on_done is called in
+        the event loop once the job has actually finished: a timeout stops
+        waiting for the job, but a job that has already started keeps running
+        (and a file job still writes its output), so its slot stays taken.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            if self.converter is not None:
+                future = self.executor.submit(self._convert_in_thread, job)
+            else:
+                future = self.executor.submit(_convert_job, job)
+        except BaseException:
+            on_done()
+            raise
+        future.add_done_callback(lambda _: _call_in_loop(loop, on_done))
+        return await asyncio.wait_for(asyncio.wrap_future(future, loop=loop),
+                                      timeout if timeout is not None else self.timeout)
+
+    def _convert_in_thread(self, job):
+        if isinstance(job, (bytes, bytearray, memoryview)):
+            return self.converter.convert_bytes(job)
+        self.converter.convert_to_pv(*job)
+        return job[1]
+
+    async def convert_bytes(self, data, timeout=None):
+        """
+        Convert a MIDI file held in memory and return the converted bytes.
+        Raises asyncio.TimeoutError when the job takes longer than timeout;
+        the job itself cannot be stopped once it has started and keeps its
+        slot until it finishes.
+        """
+        await self.semaphore.acquire()
+        return await self._run(bytes(data), timeout, self.semaphore.release)
+
+    async def convert_file(self, input_path, output_path, timeout=None):
+        """
+        Convert input_path to output_path without blocking the event loop.
+        """
+        await self.semaphore.acquire()
+        return await self._run((input_path, output_path), timeout, self.semaphore.release)
+
+    async def convert_many(self, jobs, timeout=None):
+        """
+        Convert jobs and yield an AsyncResult for each as soon as it completes.
+
+        jobs is an iterable or async iterable of MIDI bytes or
+        (input_path, output_path) pairs. A job is only taken from jobs when
+        fewer than max_in_flight jobs are running or waiting to be consumed.
+        A failing or timed-out job is reported in its result; a timed-out job
+        that has already started keeps running, and holding its slot, until it
+        finishes. Closing the iterator early cancels the jobs not yet started.
+        """
+        slots = asyncio.Semaphore(self.max_in_flight)
+        done = asyncio.Queue()
+        tasks = set()
+        finished = object()
+
+        async def run(job):
+            # The slot is freed once the job has finished on the executor and
+            # its result has been consumed, whichever comes last.
+            holds = 2
+
+            def release():
+                nonlocal holds
+                holds -= 1
+                if not holds:
+                    slots.release()
+
+            try:
+                output = await self._run(job, timeout, release)
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                result = AsyncResult(job, None, 'TimeoutError: conversion timed out')
+            except Exception as e:
+                result = AsyncResult(job, None, f'{type(e).__name__}: {e}')
+            else:
+                result = AsyncResult(job, output, None)
+            await done.put((result, release))
+
+        async def submit():
+            try:
+                if hasattr(jobs, '__aiter__'):
+                    async for job in jobs:
+                        await slots.acquire()
+                        tasks.add(asyncio.ensure_future(run(job)))
+                else:
+                    for job in jobs:
+                        await slots.acquire()
+                        tasks.add(asyncio.ensure_future(run(job)))
+            finally:
+                await done.put(finished)
+
+        feeder = asyncio.ensure_future(submit())
+        consumed = 0
+        try:
+            while True:
+                item = await done.get()
+                if item is finished:
+                    break
+                result, release = item
+                consumed += 1
+                yield result
+                release()
+            # Every job has been submitted; drain the ones still running.
+            for _ in range(len(tasks) - consumed):
+                result, _ = await done.get()
+                yield result
+        finally:
+            feeder.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(feeder, *tasks, return_exceptions=True)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+async def convert_many_async(jobs, max_in_flight=DEFAULT_MAX_IN_FLIGHT, timeout=None,
+                             executor='thread', max_workers=None, **converter_options):
+    """
+    Convert jobs (see AsyncMidiConverter.convert_many) with a temporary
+    AsyncMidiConverter and return the results in completion order.
+    """
+    async with AsyncMidiConverter(executor, max_workers, max_in_flight, timeout,
+                                  **converter_options) as converter:
+        return [result async for result in converter.convert_many(jobs)]
@@ -0,0 +1,189 @@
+import glob
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from .midi_converter import MidiConverter
+from .stats import ConversionStats
+
+MIDI_EXTENSIONS = ('.mid', '.midi')
+
+BatchResult = namedtuple('BatchResult', ['input_path', 'output_path', 'error', 'cached', 'stats'])
+
+_worker_converter = None
+_worker_file_stats = None
+
+
+def is_midi_path(path):
+    return path.lower().endswith(MIDI_EXTENSIONS)
+
+
+def _glob_base(pattern):
+    """
+    Return the leading directory of a glob pattern that contains no wildcards.
+    """
+    base = []
+    for part in pattern.split(os.sep):
+        if glob.has_magic(part):
+            break
+        base.append(part)
+    return os.sep.join(base) or os.curdir
+
+
+def _expand_source(source):
+    """
+    Yield (input_path, relative_path) pairs for a directory, glob pattern or file.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if is_midi_path(name):
+                    path = os.path.join(root, name)
+                    yield path, os.path.relpath(path, source)
+    elif glob.has_magic(source):
+        base = _glob_base(source)
+        for path in sorted(glob.glob(source, recursive=True)):
+            if os.path.isfile(path):
+                yield path, os.path.relpath(path, base)
+    else:
+        yield source, os.path.basename(source)
+
+
+def read_manifest(manifest):
+    """
+    Read a manifest file listing one input per line. Blank lines and lines
+    starting with '#' are ignored; relative entries are resolved against the
+    manifest's directory and keep their relative path in the output tree.
+    """
+    manifest_dir = os.path.dirname(os.path.abspath(manifest))
+    with open(manifest) as f:
+        for line in f:
+            entry = line.strip()
+            if not entry or entry.startswith('#'):
+                continue
+            if os.path.isabs(entry):
+                yield entry, os.path.basename(entry)
+            else:
+                yield os.path.join(manifest_dir, entry), os.path.normpath(entry)
+
+
+def collect_inputs(sources, manifest=None):
+    """
+    Expand directories, glob patterns, single files and manifest entries into
+    (input_path, relative_path) pairs. The relative path is used to mirror the
+    input tree under the output root.
+    """
+    inputs = []
+    seen = set()
+    candidates = [pair for source in sources for pair in _expand_source(source)]
+    if manifest:
+        candidates.extend(read_manifest(manifest))
+    for path, relative_path in candidates:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            inputs.append((path, relative_path))
+    return inputs
+
+
+def _remember_file_stats(file_stats):
+    global _worker_file_stats
+    _worker_file_stats = file_stats.as_dict()
+
+
+def _init_worker(converter_options):
+    global _worker_converter
+    converter_options = dict(converter_options)
+    if converter_options.get('stats') is not None:
+        # Each worker records per-file stats and returns them with the result.
+        converter_options['stats'] = ConversionStats(hook=_remember_file_stats)
+    _worker_converter = MidiConverter(**converter_options)
+
+
+def _convert_one(task):
+    global _worker_file_stats
+    input_path, output_path = task
+    cache = _worker_converter.cache
+    hits = cache.hits if cache is not None else 0
+    _worker_file_stats = None
+    try:
+        os.makedirs(os.path.dirname(output_path) or os.curdir, exist_ok=True)
+        _worker_converter.convert_to_pv(input_path, output_path)
+    except Exception as e:
+        return BatchResult(input_path, output_path, f'{type(e).__name__}: {e}', False, None)
+    cached = cache is not None and cache.hits > hits
+    return BatchResult(input_path, output_path, None, cached, _worker_file_stats)
+
+
+def _convert_data(data):
+    """
+    Convert MIDI bytes in a worker. Returns (converted, error, file_stats);
+    converted is None when the conversion failed.
+    """
+    global _worker_file_stats
+    _worker_file_stats = None
+    try:
+        converted = _worker_converter.convert_bytes(data)
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}', None
+    return converted, None, _worker_file_stats
+
+
+def convert_batch(inputs, output_root, workers=None, chunksize=16, converter_options=None):
+    """
+    Convert (input_path, relative_path) pairs into output_root, mirroring the
+    relative paths. Work is spread over a process pool with chunked task
+    submission; a failing file is reported in its BatchResult instead of
+    aborting the run. Inputs that map to the same output path all fail
+    instead of overwriting each other. Results are yielded in input order.
+
+    When converter_options has a 'stats' entry, each result carries the
+    per-file stats as a dict; merge them into a ConversionStats for totals.
+    """
+    converter_options = converter_options or {}
+    tasks = [(input_path, os.path.join(output_root, relative_path))
+             for input_path, relative_path in inputs]
+    conflicts = _output_conflicts(tasks)
+    runnable = [task for index, task in enumerate(tasks) if index not in conflicts]
+
+    if workers == 1 or len(runnable) <= 1:
+        _init_worker(converter_options)
+        results = map(_convert_one, runnable)
+        yield from _with_conflicts(tasks, conflicts, results)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(converter_options,)) as executor:
+        results = executor.map(_convert_one, runnable, chunksize=max(1, chunksize))
+        yield from _with_conflicts(tasks, conflicts, results)
+
+
+def _output_conflicts(tasks):
+    """
+    Return {task index: error} for the tasks whose output path is shared
+    with another task, e.g. two files with the same name from different
+    source directories. All of them fail rather than overwrite each other.
+    """
+    owners = {}
+    for index, (_, output_path) in enumerate(tasks):
+        owners.setdefault(os.path.normcase(os.path.abspath(output_path)), []).append(index)
+    conflicts = {}
+    for indices in owners.values():
+        if len(indices) > 1:
+            for index in indices:
+                others = ', '.join(tasks[other][0] for other in indices if other != index)
+                conflicts[index] = f'output path {tasks[index][1]} is also the output of {others}'
+    return conflicts
+
+
+def _with_conflicts(tasks, conflicts, results):
+    """
+    Yield a BatchResult per task in task order, taking conversion results in
+    order from results and failing the tasks in conflicts.
+    """
+    for index, (input_path, output_path) in enumerate(tasks):
+        if index in conflicts:
+            yield BatchResult(input_path, output_path, conflicts[index], False, None)
+        else:
+            yield next(results)
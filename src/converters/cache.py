@@ -0,0 +1,145 @@
+import hashlib
+import os
+import tempfile
+
+from .smf import write_file
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 100000
+
+CACHE_SUFFIX = '.mid'
+
+
+class ConversionCache:
+    """
+    Content-addressed on-disk cache of converted MIDI files.
+
+    Entries are keyed by a hash of the input bytes and a fingerprint of the
+    conversion settings, written atomically (temp file + rename) so several
+    worker processes can share one cache directory, and evicted least recently
+    used first once the cache exceeds max_bytes or max_entries.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = None
+        self._total_entries = None
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, data, fingerprint):
+        """
+        Return the cache key for input bytes converted with the given settings fingerprint.
+        """
+        digest = hashlib.sha256(fingerprint.encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + CACHE_SUFFIX)
+
+    def lookup(self, key):
+        """
+        Return the path of the cached entry for key, or None on a miss.
+        A hit refreshes the entry's position in the LRU order.
+        """
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def get(self, key):
+        """
+        Return the cached bytes for key, or None on a miss.
+        """
+        path = self.lookup(key)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            # Evicted by another worker between lookup and read.
+            self.hits -= 1
+            self.misses += 1
+            return None
+
+    def copy_to(self, key, output_path):
+        """
+        Copy the cached entry for key to output_path, replacing it atomically
+        (see smf.write_file()). Returns False on a miss.
+        """
+        data = self.get(key)
+        if data is None:
+            return False
+        write_file(output_path, data)
+        return True
+
+    def put(self, key, data):
+        """
+        Store converted bytes under key, then evict old entries if the cache is over its bounds.
+        """
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        if self._total_bytes is None:
+            self.evict()
+        else:
+            self._total_bytes += len(data)
+            self._total_entries += 1
+            if self._total_bytes > self.max_bytes or self._total_entries > self.max_entries:
+                self.evict()
+
+    def _entries(self):
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(CACHE_SUFFIX) and not entry.name.startswith('.'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache is within its bounds.
+        The directory is rescanned so entries written by other workers are accounted for.
+        """
+        entries = self._entries()
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        total_entries = len(entries)
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes and total_entries <= self.max_entries:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            total_entries -= 1
+        self._total_bytes = total_bytes
+        self._total_entries = total_entries
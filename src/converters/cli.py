@@ -0,0 +1,476 @@
+"""
+Command line interface.
+
+Installed as the midi-drums-convert console script (convert_midi.py is a thin
+wrapper). Startup matters because build scripts invoke the CLI once per file:
+only argparse and the light converter modules are imported up front, while
+mido, NumPy and the optional subsystems are imported by the code paths that
+need them.
+"""
+import argparse
+import os
+import sys
+
+from .midi_converter import ENGINES, MidiConverter
+
+
+def convert_midi_file(input_path, output_path, **converter_options):
+    converter = MidiConverter(**converter_options)
+    try:
+        _convert_single(converter, input_path, output_path)
+    finally:
+        converter.close()
+    return converter
+
+
+def _convert_single(converter, input_path, output_path):
+    if input_path == '-' or output_path == '-':
+        # '-' reads from stdin / writes to stdout without touching the filesystem.
+        infile = sys.stdin.buffer if input_path == '-' else open(input_path, 'rb')
+        try:
+            if output_path == '-':
+                converter.convert_stream(infile, sys.stdout.buffer)
+                sys.stdout.buffer.flush()
+            else:
+                from .smf import atomic_output
+
+                with atomic_output(output_path) as outfile:
+                    converter.convert_stream(infile, outfile)
+        finally:
+            if infile is not sys.stdin.buffer:
+                infile.close()
+        return
+    converter.convert_to_pv(input_path, output_path)
+
+
+def convert_midi_batch(sources, output_root, manifest=None, workers=None, chunksize=16,
+                       **converter_options):
+    from .batch import collect_inputs, convert_batch
+
+    inputs = collect_inputs(sources, manifest)
+    failures = 0
+    hits = 0
+    results = convert_batch(inputs, output_root, workers=workers, chunksize=chunksize,
+                            converter_options=converter_options)
+    stats = converter_options.get('stats')
+    cache = converter_options.get('cache')
+    for result in results:
+        if result.stats is not None:
+            stats.merge(result.stats)
+        if result.error is None:
+            hits += result.cached
+            print(f'OK   {result.input_path} -> {result.output_path}')
+        else:
+            failures += 1
+            print(f'FAIL {result.input_path}: {result.error}')
+    print(f'Converted {len(inputs) - failures} of {len(inputs)} files, {failures} failed')
+    if cache is not None:
+        print(f'Cache: {hits} hits, {len(inputs) - failures - hits} misses')
+    return failures
+
+
+def convert_midi_archive(input_path, output_path, workers=None, chunksize=16,
+                         **converter_options):
+    from .archive import convert_archive
+
+    converted = failures = copied = 0
+    stats = converter_options.get('stats')
+    for result in convert_archive(input_path, output_path, workers, chunksize, converter_options):
+        if result.stats is not None:
+            stats.merge(result.stats)
+        if not result.midi:
+            copied += 1
+        elif result.error is None:
+            converted += 1
+            print(f'OK   {result.name}')
+        else:
+            failures += 1
+            print(f'FAIL {result.name}: {result.error}')
+    print(f'Converted {converted} of {converted + failures} MIDI members, {failures} failed, '
+          f'{copied} other members copied to {output_path}')
+    return failures
+
+
+def _parse_transforms(args):
+    from .transforms import Quantize, VelocityClamp, VelocityCurve
+
+    transforms = []
+    if args.velocity_gamma is not None:
+        if args.velocity_gamma <= 0:
+            raise ValueError('--velocity-gamma must be positive')
+        transforms.append(VelocityCurve.gamma(args.velocity_gamma))
+    for clamp in args.velocity_clamp:
+        limits, _, pieces = clamp.partition(':')
+        low, _, high = limits.partition('-')
+        try:
+            low, high = int(low), int(high)
+        except ValueError:
+            raise ValueError(f"--velocity-clamp expects LOW-HIGH[:PIECES], got '{clamp}'") from None
+        transforms.append(VelocityClamp(low, high, pieces.split(',') if pieces else None))
+    if args.quantize is not None:
+        transforms.append(Quantize(args.quantize, args.quantize_strength))
+    return transforms
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert MIDI file notes.')
+    parser.add_argument('paths', nargs='*', metavar='PATH',
+                        help="Input and output MIDI paths ('-' for stdin/stdout), or input "
+                             "directories, files and glob patterns with --batch")
+    parser.add_argument('--engine', choices=ENGINES, default=None,
+                        help="Conversion engine: 'mido' (default) re-serializes parsed messages, "
+                             "'bytes' (default with --streaming) rewrites note bytes in place, "
+                             "'numpy' remaps whole tracks as arrays, 'events' uses compact "
+                             "event arrays instead of mido messages")
+    parser.add_argument('--streaming', action='store_true',
+                        help='Convert one track at a time to bound memory use on huge files')
+    parser.add_argument('--profile', default=None,
+                        help='Mapping profile name or path to a JSON/TOML profile file '
+                             '(default: the built-in EZ Drummer 3 to PV mapping)')
+    parser.add_argument('--target', action='append', default=[], metavar='PROFILE=OUTPUT',
+                        help='Convert the input into several profiles in a single pass; '
+                             'repeat for every target')
+    parser.add_argument('--analyze', action='store_true',
+                        help='Check --profile (or every available profile) for overridden, '
+                             'chained and non-idempotent mappings and unreachable targets')
+    parser.add_argument('--analyze-json', metavar='PATH',
+                        help='Write the full --analyze report as JSON to PATH')
+    parser.add_argument('--strict-profile', action='store_true',
+                        help='Refuse to convert with a profile whose --analyze report has errors '
+                             'or warnings, such as chained or non-idempotent mappings')
+    parser.add_argument('--list-profiles', action='store_true',
+                        help='List the available mapping profiles and exit')
+    parser.add_argument('--cache-dir', help='Reuse conversions from a content-addressed cache directory')
+    parser.add_argument('--cache-max-bytes', type=int, default=None,
+                        help='Evict least recently used cache entries above this total size')
+    parser.add_argument('--cache-max-entries', type=int, default=None,
+                        help='Evict least recently used cache entries above this count')
+    parser.add_argument('--velocity-gamma', type=float, default=None, metavar='GAMMA',
+                        help='Apply a velocity curve: below 1 lifts soft hits, above 1 softens them')
+    parser.add_argument('--velocity-clamp', action='append', default=[], metavar='LOW-HIGH[:PIECES]',
+                        help='Clamp velocities, optionally only for comma-separated mapping groups '
+                             'or note names (repeatable)')
+    parser.add_argument('--quantize', type=int, default=None, metavar='TICKS',
+                        help='Move notes towards the nearest multiple of TICKS')
+    parser.add_argument('--quantize-strength', type=float, default=1.0,
+                        help='Fraction of the distance to the grid to move notes (default: 1.0)')
+    parser.add_argument('--verify', action='store_true',
+                        help='Check every converted file against its input and fail on mismatch')
+    parser.add_argument('--stats', action='store_true',
+                        help='Print per-stage timings and note counts to stderr')
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help='Write per-stage timings and note counts as JSON to PATH')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run a resident conversion server on --socket or --port')
+    parser.add_argument('--connect', action='store_true',
+                        help='Convert through a running server on --socket or --port')
+    parser.add_argument('--socket', help='Unix domain socket path for --serve/--connect')
+    parser.add_argument('--host', default='127.0.0.1', help='Host for --serve/--connect with --port')
+    parser.add_argument('--port', type=int, help='TCP port for --serve/--connect')
+    parser.add_argument('--max-queue', type=int, default=64,
+                        help='Requests the server accepts before clients have to wait')
+    parser.add_argument('--batch', action='store_true',
+                        help='Convert many files into --output-root, mirroring the input tree')
+    parser.add_argument('--archive', action='store_true',
+                        help='Convert the MIDI members of a zip or tar archive into a new archive')
+    parser.add_argument('--scan', action='store_true',
+                        help='Report note usage and notes the profile does not map, '
+                             'without converting anything')
+    parser.add_argument('--index', metavar='PATH',
+                        help='Cache --scan results in this index file')
+    parser.add_argument('--scan-json', metavar='PATH',
+                        help='Write the full --scan report as JSON to PATH')
+    parser.add_argument('--sync', action='store_true',
+                        help='Convert only new or changed files of an input directory into '
+                             '--output-root and remove outputs of deleted inputs')
+    parser.add_argument('--watch', action='store_true',
+                        help='Like --sync, then keep polling the input directory for changes')
+    parser.add_argument('--sync-manifest', metavar='PATH',
+                        help='Manifest file for --sync/--watch (default: inside --output-root)')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='Seconds between polls for --watch')
+    parser.add_argument('--debounce', type=float, default=2.0,
+                        help='Seconds a file must stay unchanged before --watch converts it')
+    parser.add_argument('--output-root', help='Output directory for --batch, --sync and --watch')
+    parser.add_argument('--manifest',
+                        help='File listing one input path per line (with --batch or --scan)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes for --batch, --archive and --scan '
+                             '(default: CPU count), or conversion threads for --serve')
+    parser.add_argument('--track-workers', type=int, default=None,
+                        help='Convert the tracks of a large single file in parallel in this many '
+                             'processes (0 for one per CPU; bytes and events engines)')
+    parser.add_argument('--chunksize', type=int, default=16,
+                        help='Files handed to a worker per task for --batch, --archive and --scan')
+    args = parser.parse_args(argv)
+
+    if (args.serve or args.connect) and not (args.socket or args.port):
+        parser.error('--serve and --connect require --socket or --port')
+
+    if args.connect:
+        from .client import RemoteConversionError, convert_remote
+
+        if len(args.paths) != 2:
+            parser.error('expected an input path and an output path')
+        # The server's own options decide how files are converted.
+        if (args.engine is not None or args.verify or args.cache_dir or args.streaming
+                or args.velocity_gamma is not None or args.velocity_clamp
+                or args.quantize is not None or args.stats or args.profile_json
+                or args.track_workers is not None):
+            parser.error('--connect cannot be combined with --engine, --verify, --cache-dir, '
+                         '--streaming, velocity and quantize options, --stats, --profile-json '
+                         'or --track-workers')
+        input_path, output_path = args.paths
+        if input_path == '-':
+            data = sys.stdin.buffer.read()
+        else:
+            with open(input_path, 'rb') as f:
+                data = f.read()
+        try:
+            converted = convert_remote(data, args.socket, args.host, args.port, args.profile)
+        except (OSError, RemoteConversionError) as e:
+            print(f'Conversion failed: {e}', file=sys.stderr)
+            sys.exit(1)
+        if output_path == '-':
+            sys.stdout.buffer.write(converted)
+        else:
+            from .smf import write_file
+
+            write_file(output_path, converted)
+            print(f'Converted MIDI file saved to {output_path}')
+        sys.exit(0)
+
+    if args.list_profiles:
+        from .profiles import available_profiles
+
+        print('\n'.join(available_profiles()))
+        sys.exit(0)
+
+    if args.analyze:
+        from .analyze import analyze_profile, format_analysis
+        from .profiles import ProfileError, available_profiles
+
+        names = [args.profile] if args.profile is not None else available_profiles()
+        try:
+            reports = [analyze_profile(name) for name in names]
+        except ProfileError as e:
+            parser.error(str(e))
+        print('\n'.join(format_analysis(report) for report in reports))
+        if args.analyze_json:
+            import json
+
+            with open(args.analyze_json, 'w') as f:
+                json.dump({'profiles': reports}, f, indent=2)
+        sys.exit(1 if any(report['errors'] for report in reports) else 0)
+
+    targets = []
+    for target in args.target:
+        profile, separator, output_path = target.partition('=')
+        if not separator or not profile or not output_path:
+            parser.error(f"--target expects PROFILE=OUTPUT, got '{target}'")
+        targets.append((profile, output_path))
+
+    for profile in [args.profile] + [profile for profile, _ in targets]:
+        if profile is None and (targets or not args.strict_profile):
+            continue
+        from .profiles import ProfileError, get_profile
+
+        try:
+            get_profile(profile, strict=args.strict_profile)
+        except ProfileError as e:
+            parser.error(str(e))
+
+    cache = None
+    if args.cache_dir:
+        from .cache import ConversionCache
+
+        cache_options = {}
+        if args.cache_max_bytes is not None:
+            cache_options['max_bytes'] = args.cache_max_bytes
+        if args.cache_max_entries is not None:
+            cache_options['max_entries'] = args.cache_max_entries
+        cache = ConversionCache(args.cache_dir, **cache_options)
+
+    stats = None
+    if args.stats or args.profile_json:
+        from .stats import ConversionStats
+
+        stats = ConversionStats()
+
+    def report_stats():
+        if stats is None:
+            return
+        if args.stats:
+            print(stats.format(), file=sys.stderr)
+        if args.profile_json:
+            import json
+
+            with open(args.profile_json, 'w') as f:
+                json.dump(stats.as_dict(), f, indent=2)
+
+    if args.engine is None:
+        args.engine = 'bytes' if args.streaming else 'mido'
+    if args.streaming and args.engine == 'mido':
+        parser.error("--streaming requires --engine bytes, numpy or events")
+    if args.streaming and cache is not None:
+        parser.error('--streaming cannot be combined with --cache-dir')
+    try:
+        transforms = _parse_transforms(args)
+    except ValueError as e:
+        parser.error(str(e))
+    converter_options = {'engine': args.engine, 'cache': cache, 'profile': args.profile,
+                         'stats': stats, 'streaming': args.streaming, 'verify': args.verify}
+    if transforms:
+        if args.serve or targets:
+            parser.error('Velocity and quantize options cannot be combined with --serve or --target')
+        if args.engine == 'numpy':
+            parser.error('Velocity and quantize options require --engine mido, bytes or events')
+        if args.verify:
+            parser.error('Velocity and quantize options cannot be combined with --verify')
+        from .profiles import get_profile
+
+        if get_profile(args.profile).scoped_table is not None:
+            parser.error('Velocity and quantize options cannot be combined with a scoped profile')
+        converter_options['transforms'] = transforms
+
+    if args.serve:
+        from .server import DEFAULT_WORKERS, serve
+
+        if args.streaming or stats is not None or args.track_workers is not None:
+            parser.error('--serve cannot be combined with --streaming, --stats, --profile-json '
+                         'or --track-workers')
+        print(f'Serving conversions on {args.socket or f"{args.host}:{args.port}"}', file=sys.stderr)
+        try:
+            serve(args.socket, args.host, args.port, engine=args.engine, cache=cache,
+                  max_queue=args.max_queue, workers=args.workers or DEFAULT_WORKERS,
+                  profile=args.profile, verify=args.verify)
+        except OSError as e:
+            print(f'Cannot serve: {e}', file=sys.stderr)
+            sys.exit(1)
+        sys.exit(0)
+
+    if args.track_workers is not None and (targets or args.sync or args.watch or args.scan
+                                           or args.archive or args.batch):
+        parser.error('--track-workers only applies to single-file conversions, not to --target, '
+                     '--sync, --watch, --scan, --archive or --batch')
+
+    if targets:
+        from .fanout import MultiTargetConverter
+
+        if len(args.paths) != 1:
+            parser.error('--target expects a single input path')
+        if args.streaming or cache is not None or args.profile is not None:
+            parser.error('--target cannot be combined with --streaming, --cache-dir or --profile')
+        from .verify import VerificationError
+
+        converter = MultiTargetConverter([profile for profile, _ in targets], args.engine, stats,
+                                         verify=args.verify)
+        output_paths = [output_path for _, output_path in targets]
+        try:
+            converter.convert_file(args.paths[0], output_paths)
+        except VerificationError as e:
+            print(f'Verification failed: {e}', file=sys.stderr)
+            sys.exit(1)
+        for output_path in output_paths:
+            print(f'Converted MIDI file saved to {output_path}')
+        report_stats()
+        sys.exit(0)
+
+    if args.sync or args.watch:
+        from .watch import MANIFEST_FILENAME, SyncManifest, sync_folder, watch_folder
+
+        if not args.output_root or len(args.paths) != 1:
+            parser.error('--sync and --watch require one input directory and --output-root')
+        if args.streaming:
+            parser.error('--streaming cannot be combined with --sync or --watch')
+        input_root = args.paths[0]
+        manifest = SyncManifest(args.sync_manifest
+                                or os.path.join(args.output_root, MANIFEST_FILENAME))
+        converter = MidiConverter(**converter_options)
+
+        def print_sync(result):
+            for path in result.converted:
+                print(f'CONVERTED {path}')
+            for path in result.removed:
+                print(f'REMOVED   {path}')
+            for path, error in result.failed:
+                print(f'FAIL      {path}: {error}')
+            print(f'{len(result.converted)} converted, {len(result.removed)} removed, '
+                  f'{len(result.unchanged)} unchanged, {len(result.failed)} failed', flush=True)
+
+        if args.watch:
+            try:
+                watch_folder(input_root, args.output_root, converter, manifest,
+                             args.interval, args.debounce, on_sync=print_sync)
+            except KeyboardInterrupt:
+                pass
+            report_stats()
+            sys.exit(0)
+        result = sync_folder(input_root, args.output_root, converter, manifest)
+        print_sync(result)
+        report_stats()
+        sys.exit(1 if result.failed else 0)
+
+    if args.scan:
+        from .batch import collect_inputs
+        from .scan import ScanIndex, format_report, scan_corpus, scan_report
+
+        if not args.paths and not args.manifest:
+            parser.error('--scan requires input paths or --manifest')
+        paths = [path for path, _ in collect_inputs(args.paths, args.manifest)]
+        index = ScanIndex(args.index) if args.index else None
+        scans = scan_corpus(paths, args.workers, args.chunksize, index)
+        report = scan_report(scans, MidiConverter(profile=args.profile))
+        print(format_report(report))
+        if args.scan_json:
+            import json
+
+            with open(args.scan_json, 'w') as f:
+                json.dump(report, f, indent=2)
+        sys.exit(1 if any(scan.error for scan in scans) else 0)
+
+    if args.archive:
+        from .archive import ArchiveError
+
+        if len(args.paths) != 2:
+            parser.error('--archive expects an input archive and an output archive')
+        if args.streaming:
+            parser.error('--streaming cannot be combined with --archive')
+        try:
+            failures = convert_midi_archive(args.paths[0], args.paths[1], args.workers,
+                                            args.chunksize, **converter_options)
+        except ArchiveError as e:
+            parser.error(str(e))
+        report_stats()
+        sys.exit(1 if failures else 0)
+
+    if args.batch:
+        if not args.output_root:
+            parser.error('--batch requires --output-root')
+        if not args.paths and not args.manifest:
+            parser.error('--batch requires input paths or --manifest')
+        failures = convert_midi_batch(args.paths, args.output_root, args.manifest,
+                                      args.workers, args.chunksize, **converter_options)
+        report_stats()
+        sys.exit(1 if failures else 0)
+
+    if len(args.paths) != 2:
+        parser.error('expected an input path and an output path')
+    input_path, output_path = args.paths
+    if args.track_workers is not None:
+        if args.streaming or args.engine not in ('bytes', 'events'):
+            parser.error('--track-workers requires --engine bytes or events without --streaming')
+        converter_options['track_workers'] = args.track_workers
+    from .verify import VerificationError
+
+    try:
+        convert_midi_file(input_path, output_path, **converter_options)
+    except VerificationError as e:
+        print(f'Verification failed: {e}', file=sys.stderr)
+        sys.exit(1)
+    if output_path != '-':
+        print(f'Converted MIDI file saved to {output_path}')
+    if cache is not None:
+        report = sys.stderr if output_path == '-' else sys.stdout
+        print(f'Cache: {cache.hits} hits, {cache.misses} misses', file=report)
+    report_stats()
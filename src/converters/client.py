@@ -0,0 +1,72 @@
+"""
+Thin client for the resident conversion server (see server.py).
+
+Only uses the standard library, so it starts quickly and never loads mido.
+"""
+import json
+import socket
+
+
+class RemoteConversionError(RuntimeError):
+    """
+    Raised when the conversion server reports an error.
+    """
+
+
+class ConversionClient:
+    """
+    A connection to a conversion server that can send several requests.
+    """
+
+    def __init__(self, socket_path=None, host='127.0.0.1', port=None, timeout=30.0):
+        if socket_path is not None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            address = socket_path
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            address = (host, port)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(address)
+        except OSError:
+            self.sock.close()
+            raise
+        self.reader = self.sock.makefile('rb')
+
+    def convert(self, data, profile=None):
+        """
+        Convert MIDI bytes on the server and return the converted bytes.
+        """
+        header = {'length': len(data)}
+        if profile is not None:
+            header['profile'] = profile
+        self.sock.sendall(json.dumps(header).encode() + b'\n' + data)
+        line = self.reader.readline()
+        if not line:
+            raise RemoteConversionError('connection closed by server')
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise RemoteConversionError(response.get('error', 'unknown error'))
+        result = self.reader.read(response['length'])
+        if len(result) != response['length']:
+            raise RemoteConversionError('connection closed by server')
+        return result
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def convert_remote(data, socket_path=None, host='127.0.0.1', port=None, profile=None,
+                   timeout=30.0):
+    """
+    Convert MIDI bytes with a single request to a running conversion server.
+    """
+    with ConversionClient(socket_path, host, port, timeout) as client:
+        return client.convert(data, profile)
@@ -0,0 +1,219 @@
+"""
+Compact event store.
+
+Decodes the MTrk chunks of a Standard MIDI File into parallel arrays (absolute
+tick, status, data1, data2) instead of one mido.Message per event. Meta and
+sysex payloads are not copied: the store keeps the original track data and an
+offset/length table pointing into it. A track costs a handful of objects no
+matter how many events it has, which keeps conversion, scanning and
+verification cheap on large corpora.
+
+Tracks are serialized with running status and a single trailing
+end_of_track the same way mido does, so the 'events' engine writes the same
+bytes as the 'mido' engine.
+"""
+from array import array
+
+from .smf import SmfError, iter_chunks, read_vlq, write_vlq
+
+
+class TrackEvents:
+    """
+    The events of one MTrk chunk.
+
+    status is the full status byte of every event (running status is
+    resolved); for meta events data1 holds the meta type. offsets locate the
+    first data byte of channel events and, with lengths, the payload of
+    meta/sysex events in data, the original track bytes.
+    """
+    __slots__ = ('ticks', 'statuses', 'data1', 'data2', 'offsets', 'lengths', 'data')
+
+    def __init__(self, data):
+        self.data = data
+        self.ticks = ticks = array('Q')
+        self.statuses = statuses = array('B')
+        self.data1 = data1s = array('B')
+        self.data2 = data2s = array('B')
+        self.offsets = offsets = array('L')
+        self.lengths = lengths = array('L')
+        pos = 0
+        end = len(data)
+        tick = 0
+        running = 0
+        try:
+            while pos < end:
+                delta, pos = read_vlq(data, pos)
+                tick += delta
+                status = data[pos]
+                data1 = data2 = offset = length = 0
+                if status & 0x80:
+                    pos += 1
+                    if status >= 0xF0:
+                        if status == 0xFF:
+                            data1 = data[pos]
+                            pos += 1
+                        elif status != 0xF0 and status != 0xF7:
+                            raise SmfError(f'unexpected status byte 0x{status:02X} '
+                                           f'at track offset {pos - 1}')
+                        length, offset = read_vlq(data, pos)
+                        pos = offset + length
+                    else:
+                        running = status
+                elif running:
+                    status = running
+                else:
+                    raise SmfError(f'data byte without running status at track offset {pos}')
+                if status < 0xF0:
+                    offset = pos
+                    data1 = data[pos]
+                    if status & 0xE0 == 0xC0:
+                        pos += 1
+                    else:
+                        data2 = data[pos + 1]
+                        pos += 2
+                ticks.append(tick)
+                statuses.append(status)
+                data1s.append(data1)
+                data2s.append(data2)
+                offsets.append(offset)
+                lengths.append(length)
+        except IndexError:
+            raise SmfError('track is truncated') from None
+        if pos > end:
+            raise SmfError('track is truncated')
+
+    def __len__(self):
+        return len(self.statuses)
+
+    def remap(self, table):
+        """
+        Remap the note of every note_on/note_off event in place.
+        Returns the number of note events.
+        """
+        data1 = self.data1
+        notes = 0
+        for index, status in enumerate(self.statuses):
+            if status < 0xA0:
+                data1[index] = table[data1[index]]
+                notes += 1
+        return notes
+
+    def count_notes(self, note_counts):
+        """
+        Add the note of every note_on/note_off event to the 128-entry list note_counts.
+        """
+        data1 = self.data1
+        for index, status in enumerate(self.statuses):
+            if status < 0xA0:
+                note_counts[data1[index]] += 1
+
+    def to_bytes(self):
+        """
+        Serialize the events back into MTrk data, using running status for
+        consecutive channel events (reset by meta and sysex events). As in
+        mido's writer, end_of_track events are dropped, their delta times
+        carried over to the next event, and a single end_of_track is written
+        at the last tick.
+        """
+        out = bytearray()
+        self.write_to(out)
+        return bytes(out)
+
+    def write_to(self, out):
+        """
+        Append the serialized MTrk data (see to_bytes()) to the bytearray out.
+        """
+        data = self.data
+        append = out.append
+        previous_tick = 0
+        running = 0
+        for tick, status, data1, data2, offset, length in zip(
+                self.ticks, self.statuses, self.data1, self.data2, self.offsets, self.lengths):
+            if status < 0xF0:
+                delta = tick - previous_tick
+                if delta < 0x80:
+                    append(delta)
+                else:
+                    write_vlq(out, delta)
+                previous_tick = tick
+                if status != running:
+                    append(status)
+                    running = status
+                append(data1)
+                if status & 0xE0 != 0xC0:
+                    append(data2)
+                continue
+            if status == 0xFF and data1 == 0x2F:
+                continue
+            write_vlq(out, tick - previous_tick)
+            previous_tick = tick
+            append(status)
+            if status == 0xFF:
+                append(data1)
+            write_vlq(out, length)
+            out += data[offset:offset + length]
+            running = 0
+        write_vlq(out, (self.ticks[-1] if self.ticks else 0) - previous_tick)
+        out += b'\xff\x2f\x00'
+
+
+class EventStore:
+    """
+    All chunks of a Standard MIDI File: MTrk chunks decoded into TrackEvents,
+    other chunks kept as raw bytes.
+    """
+    __slots__ = ('header', 'chunks')
+
+    def __init__(self, header, chunks):
+        self.header = header
+        self.chunks = chunks
+
+    @classmethod
+    def from_bytes(cls, data):
+        view = memoryview(data)
+        chunks = []
+        for chunk_type, start, end in iter_chunks(view):
+            chunk = view[start:end]
+            chunks.append((chunk_type, TrackEvents(chunk) if chunk_type == b'MTrk' else bytes(chunk)))
+        header_end = 8 + int.from_bytes(view[4:8], 'big')
+        return cls(bytes(view[:header_end]), chunks)
+
+    @property
+    def tracks(self):
+        return [chunk for chunk_type, chunk in self.chunks if chunk_type == b'MTrk']
+
+    def __len__(self):
+        return sum(len(track) for track in self.tracks)
+
+    def remap(self, table):
+        """
+        Remap every track in place. Returns the number of note events.
+        """
+        return sum(track.remap(table) for track in self.tracks)
+
+    def note_histogram(self):
+        """
+        Return the number of track events and a 128-entry list counting
+        note_on/note_off events per note number (see smf.note_histogram()).
+        """
+        note_counts = [0] * 128
+        for track in self.tracks:
+            track.count_notes(note_counts)
+        return len(self), note_counts
+
+    def to_bytes(self):
+        """
+        Serialize the whole file into one buffer: every track is written in
+        place after its chunk header, whose length is filled in afterwards.
+        """
+        out = bytearray(self.header)
+        for chunk_type, chunk in self.chunks:
+            out += chunk_type
+            length_at = len(out)
+            out += bytes(4)
+            if chunk_type == b'MTrk':
+                chunk.write_to(out)
+            else:
+                out += chunk
+            out[length_at:length_at + 4] = (len(out) - length_at - 4).to_bytes(4, 'big')
+        return bytes(out)
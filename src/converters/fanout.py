@@ -0,0 +1,149 @@
+"""
+Multi-target fan-out conversion.
+
+Converts one input into several mapping profiles while parsing or scanning it
+only once: the bytes engine records the offset of every note byte and patches
+a copy of the raw buffer per target, the mido engine parses the file once and
+re-serializes it per target, and the NumPy and events engines decode each
+track once and remap a copy of the event arrays per target. Every output is
+identical to what a MidiConverter with the same engine and profile would write.
+With verify, every output is checked against the input with
+verify.verify_conversion(), which decodes both files independently of the
+engine.
+"""
+import io
+from array import array
+
+from .events import EventStore
+from .midi_converter import ENGINES, NOTE_MESSAGE_TYPES
+from .profiles import get_profile
+from .smf import iter_chunks, note_offsets, patch_notes, read_file, write_file
+from .stats import ConversionStats, stage
+from .verify import verify_conversion
+
+
+class MultiTargetConverter:
+    """
+    Converts MIDI files into several mapping profiles at once.
+
+    profiles is a list of profile names or paths (None for the default
+    profile); results are returned in the same order. With verify, every
+    output is checked against the input and verify.VerificationError is
+    raised on the first mismatch, before any output is written.
+    """
+
+    def __init__(self, profiles, engine='mido', stats=None, verify=False):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}")
+        if not profiles:
+            raise ValueError('At least one target profile is required')
+        self.engine = engine
+        self.profiles = [get_profile(profile) for profile in profiles]
+        scoped = [profile.name for profile in self.profiles if profile.scoped_table is not None]
+        if scoped:
+            raise ValueError(f"Scoped profiles cannot be used as fan-out targets: {', '.join(scoped)}")
+        self.note_tables = [profile.note_table for profile in self.profiles]
+        # Optional ConversionStats; when None no timing work is done.
+        self.stats = stats
+        self.verify = verify
+
+    def convert_bytes(self, data):
+        """
+        Convert a MIDI file held in memory and return one converted file per target.
+        """
+        stats = None if self.stats is None else ConversionStats()
+        if self.engine == 'bytes':
+            outputs = self._convert_raw(data, stats)
+        elif self.engine == 'numpy':
+            outputs = self._convert_numpy(data, stats)
+        elif self.engine == 'events':
+            outputs = self._convert_events(data, stats)
+        else:
+            outputs = self._convert_mido(data, stats)
+        if self.verify:
+            with stage(stats, 'verify'):
+                for output, table in zip(outputs, self.note_tables):
+                    verify_conversion(data, output, table)
+        if stats is not None:
+            stats.files = 1
+            stats.bytes_read = len(data)
+            stats.bytes_written = sum(len(output) for output in outputs)
+            self.stats.merge(stats)
+        return outputs
+
+    def convert_file(self, input_path, output_paths):
+        """
+        Convert input_path once per target, writing to the matching output_paths.
+        """
+        if len(output_paths) != len(self.note_tables):
+            raise ValueError(f'Expected {len(self.note_tables)} output paths, '
+                             f'got {len(output_paths)}')
+        for output_path, output in zip(output_paths, self.convert_bytes(read_file(input_path))):
+            write_file(output_path, output)
+
+    def _convert_raw(self, data, stats):
+        with stage(stats, 'parse'):
+            offsets = note_offsets(data)
+        with stage(stats, 'remap'):
+            return [patch_notes(data, offsets, table) for table in self.note_tables]
+
+    def _convert_mido(self, data, stats):
+        import mido
+
+        with stage(stats, 'parse'):
+            midi_file = mido.MidiFile(file=io.BytesIO(data))
+            notes = [msg for track in midi_file.tracks for msg in track
+                     if msg.type in NOTE_MESSAGE_TYPES]
+            source_notes = [msg.note for msg in notes]
+        outputs = []
+        for table in self.note_tables:
+            with stage(stats, 'remap'):
+                for msg, note in zip(notes, source_notes):
+                    msg.note = table[note]
+            with stage(stats, 'save'):
+                output = io.BytesIO()
+                midi_file.save(file=output)
+            outputs.append(output.getvalue())
+        return outputs
+
+    def _convert_events(self, data, stats):
+        with stage(stats, 'parse'):
+            store = EventStore.from_bytes(data)
+            tracks = store.tracks
+            source_notes = [track.data1 for track in tracks]
+        outputs = []
+        for table in self.note_tables:
+            with stage(stats, 'remap'):
+                for track, notes in zip(tracks, source_notes):
+                    track.data1 = array('B', notes)
+                    track.remap(table)
+            with stage(stats, 'save'):
+                outputs.append(store.to_bytes())
+        return outputs
+
+    def _convert_numpy(self, data, stats):
+        # Imported lazily so NumPy is only loaded when this engine is used.
+        from .numpy_engine import fix_end_of_track, parse_track, remap_events, serialize_track
+
+        view = memoryview(data)
+        header_end = 8 + int.from_bytes(view[4:8], 'big')
+        chunks = []
+        with stage(stats, 'parse'):
+            for chunk_type, start, end in iter_chunks(view):
+                track = view[start:end]
+                events = fix_end_of_track(parse_track(track)) if chunk_type == b'MTrk' else None
+                chunks.append((chunk_type, track, events))
+        outputs = []
+        for table in self.note_tables:
+            output = [bytes(view[:header_end])]
+            for chunk_type, track, events in chunks:
+                if events is not None:
+                    with stage(stats, 'remap'):
+                        events = events.copy()
+                        remap_events(events, table)
+                    with stage(stats, 'save'):
+                        track = serialize_track(events, track)
+                output.append(chunk_type + len(track).to_bytes(4, 'big'))
+                output.append(bytes(track))
+            outputs.append(b''.join(output))
+        return outputs
@@ -1,37 +1,391 @@
-import mido
-from .note_mappings import NOTE_MAPPINGS
+import hashlib
+import io
+import itertools
+
+from .events import EventStore, TrackEvents
+from .notes import note_name, note_number
+from .profiles import compile_mappings, get_profile
+from .scoped import remap_events_scoped, remap_messages_scoped, remap_track_scoped
+from .smf import (
+    atomic_output, convert_smf_file, convert_smf_stream, count_track, note_histogram, read_file,
+    remap_smf, remap_track, write_file
+)
+from .stats import ConversionStats, stage
+from .verify import (
+    VerificationError, event_offset, expected_notes, verify_conversion, verify_events,
+    verify_patched, verify_track
+)
+
+NOTE_MESSAGE_TYPES = frozenset(('note_on', 'note_off'))
+
+# 'mido' decodes the file into mido messages and re-serializes it,
+# 'bytes' rewrites note bytes in place in the raw file buffer,
+# 'numpy' remaps whole tracks at once as NumPy arrays (for very large files),
+# 'events' decodes tracks into compact arrays instead of mido messages.
+ENGINES = ('mido', 'bytes', 'numpy', 'events')
+
+# With track_workers, files below this size are converted in-process: starting
+# tasks and copying the file into shared memory would cost more than the tracks take.
+PARALLEL_MIN_BYTES = 1 << 20
+
 
 class MidiConverter:
+    def __init__(self, mappings=None, engine='mido', cache=None, profile=None, stats=None,
+                 streaming=False, verify=False, transforms=None, track_workers=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}")
+        if mappings is not None and profile is not None:
+            raise ValueError('Pass either mappings or profile, not both')
+        if streaming and engine == 'mido':
+            raise ValueError("Streaming conversion requires the 'bytes', 'numpy' or 'events' engine")
+        if streaming and cache is not None:
+            raise ValueError('Streaming conversion cannot be combined with a cache')
+        if track_workers is not None and (streaming or engine not in ('bytes', 'events')):
+            raise ValueError("Parallel track conversion requires the 'bytes' or 'events' engine "
+                             "without streaming")
+        self.engine = engine
+        # Convert files one track at a time instead of loading them whole.
+        self.streaming = streaming
+        if mappings is None:
+            # Profiles are compiled once per process and shared by all converters.
+            self.profile = get_profile(profile)
+            self.mappings = self.profile.mappings
+            self.note_table = self.profile.note_table
+            self.scoped_table = self.profile.scoped_table
+        else:
+            self.profile = None
+            self.mappings = mappings
+            # Compiled once so the conversion loop only does integer indexing.
+            self.note_table = self.compile_note_mappings(self.mappings)
+            self.scoped_table = None
+        if self.scoped_table is not None and engine == 'numpy':
+            raise ValueError("Scoped profiles are not supported by the 'numpy' engine")
+        # Optional note/velocity/timing transforms, fused with the note remap
+        # into a single TransformPipeline applied in one pass per event.
+        self.pipeline = None
+        if transforms:
+            # Imported lazily so plain conversions and the CLI start without it.
+            from .transforms import compile_pipeline, transform_events, transform_track
+
+            if self.scoped_table is not None:
+                raise ValueError('Transforms cannot be combined with a scoped profile')
+            if engine == 'numpy':
+                raise ValueError("Transforms are not supported by the 'numpy' engine")
+            if verify:
+                raise ValueError('Transforms change velocities and timing and cannot be verified')
+            groups = self.profile.groups if self.profile is not None else {'mappings': self.mappings}
+            self.pipeline = compile_pipeline(transforms, self.note_table, groups)
+        # Raw track remapping: a 128-entry table, the channel x note x velocity
+        # table of a scoped profile, or a pipeline without quantization; either
+        # way one indexed lookup per note.
+        if self.pipeline is not None:
+            self._track_table, self._remap_track = self.pipeline, transform_track
+        elif self.scoped_table is None:
+            self._track_table, self._remap_track = self.note_table, remap_track
+        else:
+            self._track_table, self._remap_track = self.scoped_table, remap_track_scoped
+        # The same for decoded TrackEvents.
+        if self.pipeline is not None:
+            self._events_table, self._remap_events = self.pipeline, transform_events
+        elif self.scoped_table is None:
+            self._events_table, self._remap_events = self.note_table, TrackEvents.remap
+        else:
+            self._events_table, self._remap_events = self.scoped_table, remap_events_scoped
+        # Pipelines that quantize, and any pipeline with the mido engine, run
+        # over the events decoding, which can move events in time.
+        self._decode_events = engine == 'events' or (
+            self.pipeline is not None and (engine == 'mido' or self.pipeline.grid is not None))
+        # Identifies everything that affects the output, for cache keys.
+        rules = self.note_table if self.scoped_table is None else self.scoped_table.digest
+        if self.pipeline is not None:
+            rules += self.pipeline.digest
+        self.fingerprint = hashlib.sha256(self.engine.encode() + rules).hexdigest()
+        # Optional ConversionCache shared by every conversion of this converter.
+        self.cache = cache
+        # Optional ConversionStats; when None no timing or counting work is done.
+        self.stats = stats
+        # Check every conversion against its input and raise VerificationError on mismatch.
+        self.verify = verify
+        # Number of processes converting the tracks of one large file in
+        # parallel; None converts tracks one after another.
+        self.track_workers = track_workers
+        self._track_pool = None
+        self._note_groups = None
+
     def convert_to_pv(self, input_path, output_path):
-        midi_file = mido.MidiFile(input_path)
+        if self.streaming:
+            with open(input_path, 'rb') as infile, atomic_output(output_path) as outfile:
+                self._convert_tracks(infile, outfile)
+            return
+        if (self.cache is None and self.stats is None and not self.verify
+                and self.track_workers is None):
+            if self.engine == 'bytes' and not self._decode_events:
+                convert_smf_file(input_path, output_path, self._track_table, self._remap_track)
+                return
+            if self.engine == 'mido' and self.pipeline is None:
+                import mido
+
+                midi_file = mido.MidiFile(input_path)
+                self.remap_midi_file(midi_file)
+                # Serialized in memory so the file is written with one write.
+                output = io.BytesIO()
+                midi_file.save(file=output)
+                write_file(output_path, output.getbuffer())
+                return
+
+        stats = None if self.stats is None else ConversionStats()
+        with stage(stats, 'read'):
+            data = read_file(input_path)
+        if self.cache is not None:
+            key = self.cache.key(data, self.fingerprint)
+            with stage(stats, 'cache'):
+                hit = self.cache.copy_to(key, output_path)
+            if hit:
+                self._record_stats(stats, len(data), len(data), cached=True)
+                return
+        converted = self._convert_bytes(data, stats)
+        with stage(stats, 'write'):
+            write_file(output_path, converted)
+        if self.cache is not None:
+            self.cache.put(key, converted)
+        self._record_stats(stats, len(data), len(converted))
+
+    def convert_bytes(self, data):
+        """
+        Convert a MIDI file held in memory and return the converted file as bytes.
+        """
+        if self.cache is None and self.stats is None:
+            return self._convert_bytes(data)
+        stats = None if self.stats is None else ConversionStats()
+        converted = None
+        if self.cache is not None:
+            key = self.cache.key(data, self.fingerprint)
+            with stage(stats, 'cache'):
+                converted = self.cache.get(key)
+        cached = converted is not None
+        if not cached:
+            converted = self._convert_bytes(data, stats)
+            if self.cache is not None:
+                self.cache.put(key, converted)
+        self._record_stats(stats, len(data), len(converted), cached)
+        return converted
+
+    def _convert_bytes(self, data, stats=None):
+        # With verify, engines leave work the verification can reuse in hints.
+        hints = {} if self.verify else None
+        converted = self._convert_engine(data, stats, hints)
+        if self.verify:
+            with stage(stats, 'verify'):
+                self._verify(data, converted, hints)
+        return converted
+
+    def _verify(self, data, converted, hints):
+        if (self.engine == 'bytes' and self._remap_track is remap_track
+                and verify_patched(data, converted, self.note_table)):
+            return
+        if 'store' in hints and verify_events(hints['store'], hints['notes'], converted):
+            return
+        # Decodes both files and raises VerificationError at the first mismatch.
+        verify_conversion(data, converted, self.note_table, self.scoped_table)
+
+    def _convert_engine(self, data, stats, hints=None):
+        if self.track_workers is not None and len(data) >= PARALLEL_MIN_BYTES:
+            return self._convert_parallel(data, stats)
+        if self._decode_events:
+            return self._convert_events(data, stats, hints)
+        if stats is not None:
+            with stats.stage('scan'):
+                events, note_counts = note_histogram(data)
+                stats.count_notes(events, note_counts, self.note_table, self.note_groups)
+        if self.engine == 'bytes':
+            with stage(stats, 'remap'):
+                buf = bytearray(data)
+                remap_smf(buf, self._track_table, self._remap_track)
+            return bytes(buf)
+        if self.engine == 'numpy':
+            # Imported lazily so NumPy is only loaded when this engine is used.
+            from .numpy_engine import convert_smf_numpy
+            return convert_smf_numpy(data, self.note_table, stats)
+        # Imported lazily so the other engines and the CLI start without mido.
+        import mido
+
+        with stage(stats, 'parse'):
+            midi_file = mido.MidiFile(file=io.BytesIO(data))
+        with stage(stats, 'remap'):
+            self.remap_midi_file(midi_file)
+        with stage(stats, 'save'):
+            output = io.BytesIO()
+            midi_file.save(file=output)
+        return output.getvalue()
+
+    def _convert_events(self, data, stats=None, hints=None):
+        with stage(stats, 'parse'):
+            store = EventStore.from_bytes(data)
+        if stats is not None:
+            # Counted from the decoded store instead of a separate scan of the bytes.
+            with stats.stage('scan'):
+                events, note_counts = store.note_histogram()
+                stats.count_notes(events, note_counts, self.note_table, self.note_groups)
+        if hints is not None and self._remap_events is TrackEvents.remap:
+            # Taken before remapping, so verification does not decode the input again.
+            with stage(stats, 'verify'):
+                hints['store'] = store
+                hints['notes'] = [expected_notes(track, self.note_table) for track in store.tracks]
+        with stage(stats, 'remap'):
+            for track in store.tracks:
+                self._remap_events(track, self._events_table)
+        with stage(stats, 'save'):
+            return store.to_bytes()
+
+    def _convert_parallel(self, data, stats=None):
+        if stats is not None:
+            with stats.stage('scan'):
+                events, note_counts = note_histogram(data)
+                stats.count_notes(events, note_counts, self.note_table, self.note_groups)
+        if self._track_pool is None:
+            # Imported lazily so multiprocessing is only loaded when it is used.
+            from .parallel import TrackPool, events_track_converter, raw_track_converter
+
+            if self._decode_events:
+                convert_track = events_track_converter(self._remap_events, self._events_table)
+            else:
+                convert_track = raw_track_converter(self._remap_track, self._track_table)
+            self._track_pool = TrackPool(convert_track, self.track_workers or None)
+        # Parse, remap and save all happen in the workers.
+        with stage(stats, 'remap'):
+            return self._track_pool.convert(data)
+
+    def close(self):
+        """
+        Stop the worker processes used for parallel track conversion, if any.
+        """
+        if self._track_pool is not None:
+            self._track_pool.close()
+            self._track_pool = None
+
+    def _record_stats(self, stats, bytes_read, bytes_written, cached=False):
+        if stats is None:
+            return
+        stats.files = 1
+        stats.cached = int(cached)
+        stats.bytes_read = bytes_read
+        stats.bytes_written = bytes_written
+        self.stats.merge(stats)
+        if self.stats.hook is not None:
+            self.stats.hook(stats)
+
+    @property
+    def note_groups(self):
+        """
+        The mapping group of every note number (None for unmapped notes), used for stats.
+        """
+        if self._note_groups is None:
+            groups = self.profile.groups if self.profile is not None else {'mappings': self.mappings}
+            note_groups = [None] * 128
+            for group_name, mappings in groups.items():
+                for source in mappings:
+                    note_groups[note_number(source)] = group_name
+            self._note_groups = note_groups
+        return self._note_groups
+
+    def convert_stream(self, infile, outfile):
+        """
+        Convert a MIDI file read from a binary file-like object and write the
+        result to another one, e.g. sys.stdin.buffer and sys.stdout.buffer.
+        In streaming mode only one track is held in memory at a time.
+        """
+        if self.streaming:
+            self._convert_tracks(infile, outfile)
+            return
+        outfile.write(self.convert_bytes(infile.read()))
+
+    def _convert_tracks(self, infile, outfile):
+        stats = None if self.stats is None else ConversionStats()
+        note_table = self.note_table
+        if self.engine == 'numpy':
+            from .numpy_engine import convert_track as convert_numpy_track
+
+        track_numbers = itertools.count()
+
+        def convert_track(track):
+            number = next(track_numbers)
+            if not self.verify:
+                return remap(track)
+            original = bytes(track)
+            converted = remap(track)
+            with stage(stats, 'verify'):
+                if (self.engine == 'bytes' and self._remap_track is remap_track
+                        and verify_patched(original, converted, note_table, track=True)):
+                    return converted
+                mismatch = verify_track(original, converted, note_table, self.scoped_table)
+            if mismatch is not None:
+                index, description = mismatch
+                raise VerificationError(f'track {number}, event {index} at track offset '
+                                        f'{event_offset(converted, index)}: {description}')
+            return converted
+
+        def remap(track):
+            if stats is not None:
+                with stats.stage('scan'):
+                    note_counts = [0] * 128
+                    events = count_track(track, note_counts)
+                    stats.count_notes(events, note_counts, note_table, self.note_groups)
+            if self.engine == 'numpy':
+                return convert_numpy_track(track, note_table, stats)
+            if self._decode_events:
+                with stage(stats, 'parse'):
+                    events = TrackEvents(track)
+                with stage(stats, 'remap'):
+                    self._remap_events(events, self._events_table)
+                with stage(stats, 'save'):
+                    return events.to_bytes()
+            with stage(stats, 'remap'):
+                self._remap_track(track, self._track_table)
+            return track
+
+        bytes_read, bytes_written = convert_smf_stream(infile, outfile, convert_track)
+        self._record_stats(stats, bytes_read, bytes_written)
+
+    def remap_midi_file(self, midi_file):
+        """
+        Remap the notes of a mido.MidiFile in place.
+        """
+        if self.scoped_table is not None:
+            for track in midi_file.tracks:
+                remap_messages_scoped(track, self.scoped_table)
+            return
+        note_table = self.note_table
         for track in midi_file.tracks:
             for msg in track:
-                if msg.type in ['note_on', 'note_off']:
-                    note_name = self.midi_note_to_name(msg.note)
-                    if note_name in NOTE_MAPPINGS:
-                        msg.note = self.note_name_to_int(NOTE_MAPPINGS[note_name])
-        midi_file.save(output_path)
+                if msg.type in NOTE_MESSAGE_TYPES:
+                    msg.note = note_table[msg.note]
 
-    def midi_note_to_name(self, note):
+    def compile_note_mappings(self, mappings):
         """
-        Convert a MIDI note number (0-127) to its note name.
-        For example, 60 becomes 'C4', 61 becomes 'C#4', etc.
+        Compile a note-name mapping (e.g. {'C1': 'C0'}) into a 128-entry lookup table.
+        The returned bytes object maps every MIDI note number to its converted note
+        number; notes that are not mapped translate to themselves. Invalid note
+        names raise notes.NoteError. Profiles are compiled the same way (see
+        profiles.compile_mappings()).
         """
-        note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-        octave = note // 12 - 2
-        name = note_names[note % 12]
-        return f"{name}{octave}"
+        return compile_mappings(mappings)
 
+    def convert_note(self, note):
+        """
+        Convert a single MIDI note number using the compiled note table.
+        """
+        return self.note_table[note]
 
+    def midi_note_to_name(self, note):
+        """
+        Convert a MIDI note number (0-127) to its note name.
+        For example, 60 becomes 'C3', 61 becomes 'C#3', etc. (see notes.note_name()).
+        """
+        return note_name(note)
 
     def note_name_to_int(self, note_name):
         """
-        Convert a note name (e.g., 'C1') to a MIDI note number.
-        This implementation iterates over the valid MIDI note range (0-127)
-        and returns the first note number that matches the given note name using midi_note_to_name().
-        If no match is found, it returns 60 (middle C) as a default.
+        Convert a note name (e.g., 'C1' or 'Db1') to a MIDI note number.
+        Raises notes.NoteError for names that are not valid notes.
         """
-        for i in range(0, 128):
-            if self.midi_note_to_name(i) == note_name:
-                return i
-        return 60  # default fallback to middle C
+        return note_number(note_name)
@@ -144,4 +144,19 @@ NOTE_MAPPINGS = {
     **RACKTOM1_MAPPINGS,
     **FLOORTOM1_MAPPINGS,
     **FLOORTOM2_MAPPINGS
-}
\ No newline at end of file
+}
+
+# Mapping groups by kit piece, in the order they are merged into NOTE_MAPPINGS
+MAPPING_GROUPS = {
+    'kick': KICK_MAPPINGS,
+    'snare': SNARE_MAPPINGS,
+    'hihat': HIHAT_MAPPINGS,
+    'cymbal1': CYMBAL1_MAPPINGS,
+    'cymbal2': CYMBAL2_MAPPINGS,
+    'cymbal3': CYMBAL3_MAPPINGS,
+    'china': CHINA_MAPPINGS,
+    'ride': RIDE_MAPPINGS,
+    'racktom1': RACKTOM1_MAPPINGS,
+    'floortom1': FLOORTOM1_MAPPINGS,
+    'floortom2': FLOORTOM2_MAPPINGS,
+}
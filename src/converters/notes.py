@@ -0,0 +1,93 @@
+"""
+Note names.
+
+Converts between MIDI note numbers and note names such as 'C#1' with
+precomputed tables: a 128-entry tuple of names per octave convention and a
+dict from every accepted spelling to its note number, so both directions are
+a single lookup.
+
+Names are written with sharps; flats ('Db1') and the other enharmonic
+spellings ('E#1', 'Cb2') are accepted when parsing. Two octave conventions
+are supported: 'C3', where middle C (60) is C3 and note 0 is C-2, as in most
+DAWs and drum libraries and everywhere in this package, and 'C4', the
+scientific convention where middle C is C4 and note 0 is C-1.
+"""
+NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+DEFAULT_MIDDLE_C = 'C3'
+# Octave of note 0 for each name of middle C.
+MIDDLE_C_OCTAVES = {'C3': -2, 'C4': -1}
+
+_LETTERS = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+_ACCIDENTALS = {'': 0, '#': 1, '♯': 1, 'b': -1, '♭': -1}
+
+
+class NoteError(ValueError):
+    """
+    Raised for note names that cannot be parsed and note numbers outside 0-127.
+    """
+
+
+def _build_names(first_octave):
+    return tuple(f'{NOTE_NAMES[note % 12]}{note // 12 + first_octave}' for note in range(128))
+
+
+def _build_numbers(first_octave):
+    numbers = {}
+    for octave in range(first_octave - 1, first_octave + 12):
+        for letter, pitch in _LETTERS.items():
+            for accidental, shift in _ACCIDENTALS.items():
+                note = (octave - first_octave) * 12 + pitch + shift
+                if 0 <= note < 128:
+                    numbers[f'{letter}{accidental}{octave}'] = note
+    return numbers
+
+
+_NAMES = {middle_c: _build_names(octave) for middle_c, octave in MIDDLE_C_OCTAVES.items()}
+_NUMBERS = {middle_c: _build_numbers(octave) for middle_c, octave in MIDDLE_C_OCTAVES.items()}
+
+
+def _convention(middle_c):
+    if middle_c not in MIDDLE_C_OCTAVES:
+        raise NoteError(f"Unknown octave convention {middle_c!r}, expected "
+                        f"{' or '.join(map(repr, MIDDLE_C_OCTAVES))}")
+    return middle_c
+
+
+def note_name(note, middle_c=DEFAULT_MIDDLE_C):
+    """
+    Return the name of a MIDI note number, e.g. 61 -> 'C#3' (or 'C#4' with middle_c='C4').
+    """
+    names = _NAMES.get(middle_c) or _NAMES[_convention(middle_c)]
+    if not 0 <= note < 128:
+        raise NoteError(f'MIDI note number {note} is outside 0-127')
+    return names[note]
+
+
+def note_number(name, middle_c=DEFAULT_MIDDLE_C):
+    """
+    Return the MIDI note number of a note name such as 'C#1', 'Db1' or 'A-1'.
+    """
+    numbers = _NUMBERS.get(middle_c) or _NUMBERS[_convention(middle_c)]
+    try:
+        return numbers[name]
+    except (KeyError, TypeError):
+        raise NoteError(f"Invalid note name {name!r}: expected a letter A-G, an optional "
+                        f"# or b and an octave, with middle C (60) = {middle_c}") from None
+
+
+def is_note_name(name, middle_c=DEFAULT_MIDDLE_C):
+    """
+    Return whether name is a valid note name.
+    """
+    try:
+        return name in _NUMBERS[_convention(middle_c)]
+    except TypeError:
+        return False
+
+
+def canonical_note_name(name, middle_c=DEFAULT_MIDDLE_C):
+    """
+    Return the sharp spelling of a note name in the default convention,
+    e.g. 'Db1' -> 'C#1', or 'C4' -> 'C3' with middle_c='C4'.
+    """
+    return _NAMES[DEFAULT_MIDDLE_C][note_number(name, middle_c)]
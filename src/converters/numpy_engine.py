@@ -0,0 +1,258 @@
+"""
+Vectorized NumPy conversion engine.
+
+Each MTrk chunk is decoded once into a structured array of events (delta time,
+status, data1, data2 and, for meta/sysex events, the payload location). Only
+finding where each event starts is a Python loop; the fields are then
+gathered with array operations. Notes are remapped with a single
+fancy-indexed lookup against the compiled note table, and tracks are
+serialized back with vectorized VLQ encoding. Output applies running status
+and places end_of_track the same way mido's writer does, so both engines
+write identical files.
+"""
+from array import array
+
+import numpy as np
+
+from .smf import SmfError, iter_chunks, read_vlq
+from .stats import stage
+
+EVENT_DTYPE = np.dtype([
+    ('delta', '<u4'),
+    ('status', 'u1'),
+    ('data1', 'u1'),    # meta type for meta events
+    ('data2', 'u1'),
+    ('offset', '<u4'),  # payload offset in the track for meta/sysex events
+    ('length', '<u4'),  # payload length for meta/sysex events
+])
+
+
+def event_starts(track):
+    """
+    Return the offset of every event in MTrk data as an array('L'). This walk
+    is the only per-event Python loop of the engine; it also validates the
+    track, so parse_track() can index the data without bounds checks.
+    """
+    starts = array('L')
+    append = starts.append
+    pos = 0
+    end = len(track)
+    running = 0
+    try:
+        while pos < end:
+            append(pos)
+            # Skip the delta time.
+            while track[pos] & 0x80:
+                pos += 1
+            pos += 1
+            status = track[pos]
+            if status & 0x80:
+                pos += 1
+                if status >= 0xF0:
+                    if status == 0xFF:
+                        pos += 1
+                    elif status != 0xF0 and status != 0xF7:
+                        raise SmfError(f'unexpected status byte 0x{status:02X} at track offset {pos - 1}')
+                    length, pos = read_vlq(track, pos)
+                    pos += length
+                    continue
+                running = status
+            elif running:
+                status = running
+            else:
+                raise SmfError(f'data byte without running status at track offset {pos}')
+            pos += 1 if status & 0xE0 == 0xC0 else 2
+    except IndexError:
+        raise SmfError('track is truncated') from None
+    if pos > end:
+        raise SmfError('track is truncated')
+    return starts
+
+
+def decode_vlq(data, positions):
+    """
+    Decode the VLQs starting at positions in the uint8 array data.
+    Returns their values and the positions right after them.
+    """
+    values = np.zeros(len(positions), dtype=np.uint64)
+    ends = positions.copy()
+    active = np.arange(len(positions))
+    while len(active):
+        byte = data[ends[active]]
+        values[active] = (values[active] << 7) | (byte & 0x7F)
+        ends[active] += 1
+        active = active[(byte & 0x80) != 0]
+    return values, ends
+
+
+def parse_track(track):
+    """
+    Decode MTrk data into a structured event array with EVENT_DTYPE.
+    """
+    starts = event_starts(track)
+    data = np.frombuffer(track, dtype=np.uint8)
+    events = np.zeros(len(starts), dtype=EVENT_DTYPE)
+    if not len(starts):
+        return events
+    deltas, status_positions = decode_vlq(
+        data, np.frombuffer(starts, dtype=np.dtype(f'u{starts.itemsize}')).astype(np.int64))
+    raw = data[status_positions]
+    has_status = raw >= 0x80
+    is_channel = raw < 0xF0
+    is_meta = raw == 0xFF
+    # Resolve running status: a data byte continues the last channel status.
+    indices = np.arange(len(raw))
+    last_status = np.maximum.accumulate(np.where(has_status & is_channel, indices, 0))
+    status = np.where(has_status, raw, raw[last_status])
+    is_channel |= ~has_status
+
+    data_positions = status_positions + has_status
+    data1 = np.where(is_channel, data[np.where(is_channel, data_positions, 0)], 0)
+    data1[is_meta] = data[status_positions[is_meta] + 1]
+    two_data_bytes = is_channel & ((status & 0xE0) != 0xC0)
+    special = ~is_channel
+    lengths, offsets = decode_vlq(data, status_positions[special] + 1 + is_meta[special])
+
+    events['delta'] = deltas
+    events['status'] = status
+    events['data1'] = data1
+    events['data2'][two_data_bytes] = data[data_positions[two_data_bytes] + 1]
+    events['offset'][special] = offsets
+    events['length'][special] = lengths
+    return events
+
+
+def fix_end_of_track(events):
+    """
+    Return events with a single end_of_track at the end, as mido writes
+    tracks: end_of_track events elsewhere are dropped (their delta times
+    carried over to the next event) and one is appended if the track has none.
+    Well-formed tracks are returned unchanged.
+    """
+    end_of_track = (events['status'] == 0xFF) & (events['data1'] == 0x2F)
+    if (len(events) and end_of_track[-1] and events['length'][-1] == 0
+            and np.count_nonzero(end_of_track) == 1):
+        return events
+    kept = ~end_of_track
+    fixed = np.zeros(np.count_nonzero(kept) + 1, dtype=EVENT_DTYPE)
+    fixed[:-1] = events[kept]
+    fixed[-1]['status'] = 0xFF
+    fixed[-1]['data1'] = 0x2F
+    carried = np.zeros(len(fixed), dtype=np.uint64)
+    np.add.at(carried, np.cumsum(kept)[end_of_track], events['delta'][end_of_track])
+    fixed['delta'] += carried.astype(np.uint32)
+    return fixed
+
+
+def remap_events(events, table):
+    """
+    Remap the note of every note_on/note_off event in place with one lookup.
+    """
+    mask = (events['status'] & 0xE0) == 0x80
+    data1 = events['data1']
+    data1[mask] = np.frombuffer(table, dtype=np.uint8)[data1[mask]]
+    return int(np.count_nonzero(mask))
+
+
+def vlq_lengths(values):
+    """
+    Return the number of bytes needed to encode each value as a VLQ.
+    """
+    values = values.astype(np.uint32, copy=False)
+    return (1 + (values >= 1 << 7).astype(np.int64) + (values >= 1 << 14)
+            + (values >= 1 << 21))
+
+
+def encode_vlq(out, positions, values, lengths):
+    """
+    Write values as VLQs into out at positions, using precomputed byte lengths.
+    """
+    values = values.astype(np.uint32, copy=False)
+    for index in range(4):
+        selected = lengths > index
+        if not selected.any():
+            break
+        shift = (7 * (lengths[selected] - 1 - index)).astype(np.uint32)
+        byte = (values[selected] >> shift) & 0x7F
+        continuation = np.where(index < lengths[selected] - 1, 0x80, 0)
+        out[positions[selected] + index] = byte | continuation
+
+
+def serialize_track(events, track):
+    """
+    Serialize a structured event array back into MTrk data. Channel events
+    reuse the previous status byte when possible (running status is reset by
+    meta and sysex events), and meta/sysex payloads are copied from the
+    original track data.
+    """
+    status = events['status']
+    delta_lengths = vlq_lengths(events['delta'])
+    is_channel = status < 0xF0
+    is_meta = status == 0xFF
+    running = np.zeros(len(events), dtype=np.uint8)
+    running[1:] = np.where(is_channel[:-1], status[:-1], 0)
+    has_status = ~is_channel | (status != running)
+    payload = events['length']
+    payload_vlq_lengths = vlq_lengths(payload)
+    body_lengths = np.where(
+        is_channel,
+        np.where((status & 0xE0) == 0xC0, 1, 2) + has_status,
+        1 + is_meta + payload_vlq_lengths + payload.astype(np.int64),
+    )
+    event_lengths = delta_lengths + body_lengths
+    starts = np.zeros(len(events), dtype=np.int64)
+    np.cumsum(event_lengths[:-1], out=starts[1:])
+    total = int(starts[-1] + event_lengths[-1]) if len(events) else 0
+
+    out = np.empty(total, dtype=np.uint8)
+    encode_vlq(out, starts, events['delta'], delta_lengths)
+    status_positions = starts + delta_lengths
+    out[status_positions[has_status]] = status[has_status]
+
+    data_positions = status_positions + has_status
+    out[data_positions[is_channel]] = events['data1'][is_channel]
+    two_data_bytes = is_channel & ((status & 0xE0) != 0xC0)
+    out[data_positions[two_data_bytes] + 1] = events['data2'][two_data_bytes]
+
+    out[status_positions[is_meta] + 1] = events['data1'][is_meta]
+    special = ~is_channel
+    length_positions = status_positions[special] + 1 + is_meta[special]
+    encode_vlq(out, length_positions, payload[special], payload_vlq_lengths[special])
+
+    # Meta and sysex events are rare; copy their payloads one by one.
+    source = np.frombuffer(track, dtype=np.uint8)
+    data_positions = length_positions + payload_vlq_lengths[special]
+    for data_position, offset, length in zip(data_positions.tolist(),
+                                             events['offset'][special].tolist(),
+                                             payload[special].tolist()):
+        out[data_position:data_position + length] = source[offset:offset + length]
+    return out.tobytes()
+
+
+def convert_track(track, table, stats=None):
+    """
+    Convert one MTrk chunk's data and return the new track bytes.
+    """
+    with stage(stats, 'parse'):
+        events = parse_track(track)
+    with stage(stats, 'remap'):
+        remap_events(events, table)
+    with stage(stats, 'save'):
+        return serialize_track(fix_end_of_track(events), track)
+
+
+def convert_smf_numpy(data, table, stats=None):
+    """
+    Convert an in-memory SMF with the NumPy engine and return the output bytes.
+    Stage timings are recorded on stats when given.
+    """
+    view = memoryview(data)
+    header_end = 8 + int.from_bytes(view[4:8], 'big')
+    output = [bytes(view[:header_end])]
+    for chunk_type, start, end in iter_chunks(view):
+        track = view[start:end]
+        if chunk_type == b'MTrk':
+            track = convert_track(track, table, stats)
+        output.append(chunk_type + len(track).to_bytes(4, 'big'))
+        output.append(bytes(track))
+    return b''.join(output)
@@ -0,0 +1,159 @@
+"""
+Track-parallel conversion of a single file.
+
+The MTrk chunks of a Standard MIDI File are independent, so a large
+multi-track file can be converted one track per task in a process pool. The
+file is copied once into a shared memory block; workers attach to it and
+convert their track through a memoryview of its bytes, so no track data is
+pickled on the way in. In-place conversions (the bytes engine) write straight
+into the shared block and send nothing back; conversions that re-serialize a
+track (the events engine) return the new track data. The parent then writes
+the chunks back out in their original order.
+"""
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from .events import TrackEvents
+from .smf import SmfError, iter_chunks
+
+_worker_convert_track = None
+
+
+def _remap_raw_track(remap, table, track):
+    remap(track, table)
+    return track
+
+
+def _convert_events_track(remap, table, track):
+    events = TrackEvents(track)
+    remap(events, table)
+    return events.to_bytes()
+
+
+def raw_track_converter(remap, table):
+    """
+    A picklable per-track function that remaps raw MTrk data in place with
+    remap(track, table), e.g. smf.remap_track.
+    """
+    return functools.partial(_remap_raw_track, remap, table)
+
+
+def events_track_converter(remap, table):
+    """
+    A picklable per-track function that decodes MTrk data into TrackEvents,
+    applies remap(events, table) and returns the re-serialized track.
+    """
+    return functools.partial(_convert_events_track, remap, table)
+
+
+def _init_worker(convert_track):
+    global _worker_convert_track
+    _worker_convert_track = convert_track
+
+
+def _convert_view(buf, start, end):
+    track = buf[start:end]
+    converted = _worker_convert_track(track)
+    # In-place conversions are already in shared memory.
+    return None if converted is track else bytes(converted)
+
+
+def _convert_shared(name, start, end):
+    shm = shared_memory.SharedMemory(name=name)
+    # The block can only be closed once no view of it is alive, so errors are
+    # re-raised only after the frames holding views are gone.
+    try:
+        converted = _convert_view(shm.buf, start, end)
+    except IndexError:
+        error = SmfError('track is truncated')
+    except SmfError as e:
+        error = SmfError(str(e))
+    else:
+        error = None
+    shm.close()
+    if error is not None:
+        raise error
+    return converted
+
+
+class TrackPool:
+    """
+    Converts the tracks of a file in parallel with convert_track, a picklable
+    function taking the MTrk data of one track (see raw_track_converter() and
+    events_track_converter()). The process pool is started on first use and
+    reused until close().
+    """
+
+    def __init__(self, convert_track, workers=None):
+        self.convert_track = convert_track
+        self.workers = workers
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(self.convert_track,))
+        return self._executor
+
+    def convert(self, data):
+        """
+        Convert an SMF held in memory and return the converted file as bytes.
+        Files with fewer than two tracks are converted in-process.
+        """
+        with memoryview(data) as view:
+            chunks = [(start, end) for chunk_type, start, end in iter_chunks(view)
+                      if chunk_type == b'MTrk']
+        if len(chunks) < 2:
+            buf = bytearray(data)
+            converted = {}
+            with memoryview(buf) as view:
+                for start, end in chunks:
+                    track = view[start:end]
+                    try:
+                        result = self.convert_track(track)
+                    except IndexError:
+                        raise SmfError('track is truncated') from None
+                    converted[start] = None if result is track else result
+            return self._assemble(buf, len(buf), chunks, converted)
+
+        shm = shared_memory.SharedMemory(create=True, size=len(data))
+        try:
+            shm.buf[:len(data)] = data
+            executor = self._get_executor()
+            # Largest tracks first, so a long track does not start last.
+            futures = {start: executor.submit(_convert_shared, shm.name, start, end)
+                       for start, end in sorted(chunks, key=lambda chunk: chunk[0] - chunk[1])}
+            try:
+                converted = {start: future.result() for start, future in futures.items()}
+            finally:
+                for future in futures.values():
+                    future.cancel()
+            return self._assemble(shm.buf, len(data), chunks, converted)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    @staticmethod
+    def _assemble(buf, size, chunks, converted):
+        """
+        Copy buf with every track whose converted data is not None replaced,
+        keeping the chunk order and everything between tracks.
+        """
+        output = bytearray()
+        pos = 0
+        for start, end in chunks:
+            track = converted[start]
+            if track is None:
+                continue
+            output += buf[pos:start - 4]
+            output += len(track).to_bytes(4, 'big')
+            output += track
+            pos = end
+        output += buf[pos:size]
+        return bytes(output)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,341 @@
+"""
+Mapping profile registry.
+
+A profile is a named set of mapping groups (kick, snare, hi-hat, ...) that is
+validated and compiled once into a 128-entry note table. A profile may also
+be scoped to MIDI channels and track names and map notes by velocity range;
+such profiles are additionally compiled into a ScopedNoteTable (see
+scoped.py). Profiles come from
+the built-in EZ Drummer 3 mappings, from JSON/TOML files shipped in
+profile_data/, from directories listed in MIDI_DRUMS_PROFILE_PATH, or from an
+explicit file path. Loaded profiles are kept in a process-wide cache so a
+long-lived worker can switch profiles per file without recompiling.
+"""
+import json
+import os
+
+from .notes import (
+    DEFAULT_MIDDLE_C, MIDDLE_C_OCTAVES, NoteError, canonical_note_name, is_note_name, note_number
+)
+from .scoped import compile_scoped_table
+
+DEFAULT_PROFILE = 'ezd3-pv'
+DEFAULT_SCOPE_CHANNELS = (10,)
+PROFILE_DATA_DIR = os.path.join(os.path.dirname(__file__), 'profile_data')
+PROFILE_PATH_ENV = 'MIDI_DRUMS_PROFILE_PATH'
+PROFILE_EXTENSIONS = ('.json', '.toml')
+
+_PROFILE_CACHE = {}
+
+
+class ProfileError(ValueError):
+    """
+    Raised when a mapping profile cannot be found, parsed or validated.
+    """
+
+
+class MappingProfile:
+    """
+    A validated set of mapping groups compiled into a 128-entry note table.
+
+    A mapping target is a note name or a list of velocity layers such as
+    [{"velocity": [1, 63], "note": "D0"}, {"velocity": [64, 127], "note": "D#0"}].
+    scope limits the mapping to {"channels": [...], "tracks": [...]}; channels
+    default to 10 and tracks to all tracks. Scoped or layered profiles also get
+    a scoped_table; note_table then ignores the scope and uses the layer that
+    covers velocity 127, and is only used for statistics.
+
+    Note names may use flats and, with middle_c='C4', scientific octave
+    numbers; groups holds them normalized to sharps with middle C = C3.
+    """
+
+    def __init__(self, name, groups, description='', source=None, scope=None,
+                 middle_c=DEFAULT_MIDDLE_C):
+        self.name = name
+        self.description = description
+        self.source = source
+        self.groups = validate_groups(groups, name, middle_c)
+        self.scope = validate_scope(scope, name)
+        self.mappings = {}
+        for mappings in self.groups.values():
+            self.mappings.update(mappings)
+        self.note_table = compile_mappings(self.mappings)
+        self.scoped_table = None
+        self._analysis = None
+        layered = any(isinstance(target, list) for target in self.mappings.values())
+        if self.scope is not None or layered:
+            scope = self.scope or {'channels': list(range(1, 17)), 'tracks': None}
+            self.scoped_table = compile_scoped_table(
+                {note_number(source): _velocity_ranges(target)
+                 for source, target in self.mappings.items()},
+                scope['channels'], scope['tracks'])
+
+    @property
+    def analysis(self):
+        """
+        The analyze.analyze_groups() report of this profile, computed on first use.
+        """
+        if self._analysis is None:
+            from .analyze import analyze_groups
+
+            self._analysis = analyze_groups(self.groups, self.name)
+        return self._analysis
+
+    def __repr__(self):
+        return f'MappingProfile({self.name!r})'
+
+
+def validate_groups(groups, profile_name='profile', middle_c=DEFAULT_MIDDLE_C):
+    """
+    Check that every source and target is a valid note name and that no source
+    note appears in more than one group, where merging would silently let the
+    later group override the earlier one. Returns the groups as plain dicts
+    with note names normalized (see notes.canonical_note_name()).
+    """
+    if not isinstance(groups, dict) or not groups:
+        raise ProfileError(f"{profile_name}: 'groups' must be a non-empty table of mapping groups")
+    errors = []
+    owners = {}
+    validated = {}
+    for group_name, mappings in groups.items():
+        if not isinstance(mappings, dict):
+            errors.append(f"group '{group_name}' must map note names to note names")
+            continue
+        normalized = {}
+        for source, target in mappings.items():
+            try:
+                source = canonical_note_name(source, middle_c)
+            except NoteError:
+                errors.append(f"group '{group_name}': invalid note name {source!r}")
+            if isinstance(target, list):
+                layer_errors = _layer_errors(target, middle_c)
+                errors.extend(f"group '{group_name}', note '{source}': {error}"
+                              for error in layer_errors)
+                if not layer_errors:
+                    target = [dict(layer, note=canonical_note_name(layer['note'], middle_c))
+                              for layer in target]
+            else:
+                try:
+                    target = canonical_note_name(target, middle_c)
+                except NoteError:
+                    errors.append(f"group '{group_name}': invalid note name {target!r}")
+            if source in owners:
+                errors.append(f"note '{source}' is mapped by both '{owners[source]}' and '{group_name}'"
+                              if owners[source] != group_name
+                              else f"note '{source}' is mapped twice in '{group_name}'")
+            else:
+                owners[source] = group_name
+            normalized[source] = target
+        validated[group_name] = normalized
+    if errors:
+        raise ProfileError(f'{profile_name}: ' + '; '.join(errors))
+    return validated
+
+
+def _layer_errors(layers, middle_c=DEFAULT_MIDDLE_C):
+    """
+    Return the problems of a list of velocity layers; ranges may not overlap.
+    """
+    errors = []
+    covered = set()
+    for layer in layers:
+        velocity = layer.get('velocity') if isinstance(layer, dict) else None
+        if (not isinstance(velocity, list) or len(velocity) != 2
+                or not all(isinstance(v, int) for v in velocity)
+                or not 0 <= velocity[0] <= velocity[1] <= 127):
+            errors.append(f'invalid velocity layer {layer!r}, expected '
+                          '{"velocity": [low, high], "note": name} with 0 <= low <= high <= 127')
+            continue
+        if not is_note_name(layer.get('note'), middle_c):
+            errors.append(f"invalid note name {layer.get('note')!r}")
+        velocities = set(range(velocity[0], velocity[1] + 1))
+        if covered & velocities:
+            errors.append(f'velocity layers overlap at {min(covered & velocities)}')
+        covered |= velocities
+    if not layers:
+        errors.append('expected at least one velocity layer')
+    return errors
+
+
+def _velocity_ranges(target):
+    """
+    Return (low, high, note number) velocity ranges for a validated target.
+    """
+    if isinstance(target, list):
+        return [(layer['velocity'][0], layer['velocity'][1], note_number(layer['note']))
+                for layer in target]
+    return [(0, 127, note_number(target))]
+
+
+def validate_scope(scope, profile_name='profile'):
+    """
+    Check a profile scope and return it as {'channels': [...], 'tracks': [...] or None},
+    or None for an unscoped profile.
+    """
+    if scope is None:
+        return None
+    if not isinstance(scope, dict) or set(scope) - {'channels', 'tracks'}:
+        raise ProfileError(f"{profile_name}: 'scope' must be a table with 'channels' and/or 'tracks'")
+    channels = scope.get('channels', list(DEFAULT_SCOPE_CHANNELS))
+    if (not isinstance(channels, list) or not channels
+            or not all(isinstance(c, int) and 1 <= c <= 16 for c in channels)):
+        raise ProfileError(f"{profile_name}: scope 'channels' must be a list of channels 1-16")
+    tracks = scope.get('tracks')
+    if tracks is not None and (not isinstance(tracks, list) or not tracks
+                               or not all(isinstance(t, str) for t in tracks)):
+        raise ProfileError(f"{profile_name}: scope 'tracks' must be a list of track names")
+    return {'channels': sorted(set(channels)), 'tracks': tracks}
+
+
+def compile_mappings(mappings):
+    """
+    Compile validated note-name mappings into a 128-entry bytes lookup table.
+    Layered targets compile to the layer that covers velocity 127, or the last one.
+    """
+    table = bytearray(range(128))
+    for source, target in mappings.items():
+        if isinstance(target, list):
+            loudest = [layer for layer in target if layer['velocity'][1] == 127] or target[-1:]
+            target = loudest[0]['note']
+        table[note_number(source)] = note_number(target)
+    return bytes(table)
+
+
+def _reject_duplicate_keys(pairs):
+    result = {}
+    for key, value in pairs:
+        if key in result:
+            raise ProfileError(f"duplicate key '{key}'")
+        result[key] = value
+    return result
+
+
+def _load_toml(f):
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise ProfileError('TOML profiles require Python 3.11+ or the tomli package') from None
+    try:
+        return tomllib.load(f)
+    except tomllib.TOMLDecodeError as e:
+        raise ProfileError(str(e)) from None
+
+
+def read_profile_data(path):
+    """
+    Read a JSON or TOML profile file without validating its mappings.
+    Duplicate keys within a group are rejected instead of silently overwritten.
+    """
+    try:
+        if path.endswith('.toml'):
+            with open(path, 'rb') as f:
+                data = _load_toml(f)
+        else:
+            with open(path) as f:
+                data = json.load(f, object_pairs_hook=_reject_duplicate_keys)
+    except ProfileError as e:
+        raise ProfileError(f'{path}: {e}') from None
+    except ValueError as e:
+        raise ProfileError(f'{path}: {e}') from None
+    if not isinstance(data, dict):
+        raise ProfileError(f'{path}: expected a table with a "groups" entry')
+    middle_c = data.get('middle_c', DEFAULT_MIDDLE_C)
+    if not isinstance(middle_c, str) or middle_c not in MIDDLE_C_OCTAVES:
+        raise ProfileError(f"{path}: 'middle_c' must be 'C3' or 'C4'")
+    return data
+
+
+def load_profile(path):
+    """
+    Load and validate a mapping profile from a JSON or TOML file.
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    data = read_profile_data(path)
+    return MappingProfile(data.get('name', name), data.get('groups'),
+                          data.get('description', ''), source=path, scope=data.get('scope'),
+                          middle_c=data.get('middle_c', DEFAULT_MIDDLE_C))
+
+
+def _builtin_profile():
+    from .note_mappings import MAPPING_GROUPS
+
+    return MappingProfile(DEFAULT_PROFILE, MAPPING_GROUPS,
+                          'EZ Drummer 3 to PV edition (built-in)')
+
+
+def _search_dirs():
+    dirs = [d for d in os.environ.get(PROFILE_PATH_ENV, '').split(os.pathsep) if d]
+    dirs.append(PROFILE_DATA_DIR)
+    return dirs
+
+
+def find_profile_file(name):
+    """
+    Return the path of the profile file for a profile name, or None.
+    """
+    for directory in _search_dirs():
+        for extension in PROFILE_EXTENSIONS:
+            path = os.path.join(directory, name + extension)
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+def available_profiles():
+    """
+    Return the names of all profiles that can be loaded by name.
+    """
+    names = {DEFAULT_PROFILE}
+    for directory in _search_dirs():
+        if os.path.isdir(directory):
+            for filename in os.listdir(directory):
+                name, extension = os.path.splitext(filename)
+                if extension in PROFILE_EXTENSIONS:
+                    names.add(name)
+    return sorted(names)
+
+
+def _check_analysis(profile):
+    """
+    Raise ProfileError when the analysis of a profile reports errors or
+    warnings (chained mappings or notes that change if converted twice).
+    """
+    report = profile.analysis
+    if report['errors'] or report['warnings']:
+        from .analyze import format_analysis
+
+        raise ProfileError(format_analysis(report))
+    return profile
+
+
+def get_profile(profile=None, strict=False):
+    """
+    Return a compiled MappingProfile for a profile name, a file path or an
+    existing MappingProfile. Profiles are compiled once per process; a profile
+    file is reloaded only when it changes on disk. With strict, the profile is
+    also analyzed and rejected with a ProfileError unless its analysis is clean.
+    """
+    if strict:
+        return _check_analysis(get_profile(profile))
+    if isinstance(profile, MappingProfile):
+        return profile
+    if profile is None:
+        profile = DEFAULT_PROFILE
+    if profile == DEFAULT_PROFILE:
+        if profile not in _PROFILE_CACHE:
+            _PROFILE_CACHE[profile] = (None, _builtin_profile())
+        return _PROFILE_CACHE[profile][1]
+
+    path = profile if os.path.isfile(profile) else find_profile_file(profile)
+    if path is None:
+        raise ProfileError(f"Unknown profile '{profile}', available: {', '.join(available_profiles())}")
+    path = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _PROFILE_CACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, load_profile(path))
+        _PROFILE_CACHE[path] = cached
+    return cached[1]
@@ -0,0 +1,200 @@
+"""
+Note usage scan.
+
+Builds a histogram of (channel, note, velocity bucket) for the note_on events
+of every file in a corpus without converting anything, and reports the notes
+the active mapping profile does not cover, i.e. kit pieces that a conversion
+would silently leave on their original sound. Files are scanned in parallel
+and the per-file histograms are kept in an index file keyed by path, size and
+modification time, so reports over an unchanged corpus do not rescan it.
+"""
+import json
+import os
+import tempfile
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from .events import EventStore
+from .smf import read_file
+
+INDEX_VERSION = 1
+VELOCITY_BUCKET_SIZE = 16
+
+# histogram is a Counter of (channel, note, velocity_bucket) -> note_on count,
+# where channel is 1-16 and velocity_bucket the lowest velocity of the bucket.
+FileScan = namedtuple('FileScan', ['path', 'histogram', 'error'])
+
+
+def scan_bytes(data):
+    """
+    Return the (channel, note, velocity bucket) histogram of the note_on
+    events (velocity > 0) of an SMF held in memory.
+    """
+    histogram = Counter()
+    for track in EventStore.from_bytes(data).tracks:
+        for status, note, velocity in zip(track.statuses, track.data1, track.data2):
+            if status & 0xF0 == 0x90 and velocity:
+                histogram[(status & 0x0F) + 1, note,
+                          velocity - velocity % VELOCITY_BUCKET_SIZE] += 1
+    return histogram
+
+
+def _scan_one(path):
+    try:
+        return FileScan(path, scan_bytes(read_file(path)), None)
+    except Exception as e:
+        return FileScan(path, None, f'{type(e).__name__}: {e}')
+
+
+class ScanIndex:
+    """
+    JSON cache of per-file histograms, keyed by absolute path and valid while
+    the file's size and modification time are unchanged.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                self.entries = data['entries']
+
+    @staticmethod
+    def _stat(path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def get(self, path):
+        entry = self.entries.get(os.path.abspath(path))
+        if entry is None:
+            return None
+        try:
+            if (entry['size'], entry['mtime_ns']) != self._stat(path):
+                return None
+        except OSError:
+            return None
+        return Counter({tuple(key): count for *key, count in entry['histogram']})
+
+    def put(self, path, histogram):
+        size, mtime_ns = self._stat(path)
+        self.entries[os.path.abspath(path)] = {
+            'size': size,
+            'mtime_ns': mtime_ns,
+            'histogram': [[*key, count] for key, count in sorted(histogram.items())],
+        }
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'entries': self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+
+def scan_corpus(paths, workers=None, chunksize=16, index=None):
+    """
+    Scan MIDI files and return a FileScan per path, in input order. Files
+    found unchanged in the ScanIndex are not read; the others are scanned in
+    a process pool and added to the index, which is saved when it changed.
+    """
+    results = {}
+    pending = []
+    for path in paths:
+        histogram = index.get(path) if index is not None else None
+        if histogram is not None:
+            results[path] = FileScan(path, histogram, None)
+        else:
+            pending.append(path)
+
+    executor = None
+    if workers != 1 and len(pending) > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        if executor is None:
+            scanned = map(_scan_one, pending)
+        else:
+            scanned = executor.map(_scan_one, pending, chunksize=max(1, chunksize))
+        for result in scanned:
+            results[result.path] = result
+            if index is not None and result.error is None:
+                index.put(result.path, result.histogram)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if index is not None and pending:
+        index.save()
+    return [results[path] for path in paths]
+
+
+def corpus_histogram(scans):
+    """
+    Sum the histograms of successfully scanned files.
+    """
+    total = Counter()
+    for scan in scans:
+        if scan.error is None:
+            total.update(scan.histogram)
+    return total
+
+
+def unmapped_notes(histogram, note_groups):
+    """
+    Return a Counter of note number -> note_on count for the notes of a
+    histogram that no mapping group covers (note_groups as in
+    MidiConverter.note_groups).
+    """
+    unmapped = Counter()
+    for (channel, note, velocity_bucket), count in histogram.items():
+        if note_groups[note] is None:
+            unmapped[note] += count
+    return unmapped
+
+
+def scan_report(scans, converter):
+    """
+    Build a JSON-serializable report: the corpus histogram, the unmapped notes
+    of the corpus and of every file, and files that could not be scanned.
+    """
+    note_groups = converter.note_groups
+    note_name = converter.midi_note_to_name
+    total = corpus_histogram(scans)
+    files = []
+    for scan in scans:
+        if scan.error is not None:
+            files.append({'path': scan.path, 'error': scan.error})
+            continue
+        unmapped = unmapped_notes(scan.histogram, note_groups)
+        files.append({
+            'path': scan.path,
+            'note_events': sum(scan.histogram.values()),
+            'unmapped': {note_name(note): count for note, count in sorted(unmapped.items())},
+        })
+    return {
+        'files': files,
+        'note_events': sum(total.values()),
+        'histogram': [{'channel': channel, 'note': note, 'name': note_name(note),
+                       'velocity': velocity_bucket, 'count': count}
+                      for (channel, note, velocity_bucket), count in sorted(total.items())],
+        'unmapped': {note_name(note): count
+                     for note, count in sorted(unmapped_notes(total, note_groups).items())},
+    }
+
+
+def format_report(report):
+    """
+    Return a short human-readable summary of a scan_report().
+    """
+    lines = []
+    for entry in report['files']:
+        if 'error' in entry:
+            lines.append(f"FAIL {entry['path']}: {entry['error']}")
+        elif entry['unmapped']:
+            notes = ', '.join(f'{name} x{count}' for name, count in entry['unmapped'].items())
+            lines.append(f"UNMAPPED {entry['path']}: {notes}")
+    unmapped = report['unmapped']
+    lines.append(f"Scanned {len(report['files'])} files, {report['note_events']} note events, "
+                 f'{sum(unmapped.values())} on {len(unmapped)} unmapped notes')
+    return '\n'.join(lines)
@@ -0,0 +1,186 @@
+"""
+Channel, track and velocity scoped note tables.
+
+A scoped profile only remaps notes on some MIDI channels (10 by default) and,
+optionally, only in tracks with given names, and may map a note to different
+targets by velocity range. All rules are compiled into one flat lookup table
+indexed by channel << 14 | note << 7 | velocity, so remapping a note_on is a
+single indexed lookup whatever the number of rules. Channels outside the scope
+map every note to itself.
+
+A note_off (or note_on with velocity 0) is remapped to the target chosen for
+the note_on it ends, so velocity layers never leave hanging notes.
+"""
+import functools
+import hashlib
+
+from .smf import SmfError, read_vlq
+
+CHANNEL_SHIFT = 14
+NOTE_SHIFT = 7
+TABLE_SIZE = 16 << CHANNEL_SHIFT
+TRACK_NAME = 0x03
+
+
+@functools.lru_cache(maxsize=None)
+def _identity_table():
+    """
+    The table mapping every (channel, note, velocity) to the note itself.
+    """
+    return bytes(note for note in range(128) for _ in range(128)) * 16
+
+
+def track_key(name):
+    """
+    Normalize a track name for matching against a scope.
+    """
+    return name.strip().casefold()
+
+
+class ScopedNoteTable:
+    """
+    A compiled channel x note x velocity lookup table.
+
+    table[channel << 14 | note << 7 | velocity] is the target of a note_on;
+    release[channel << 7 | note] is used for a note_off that has no preceding
+    note_on. tracks is None to remap every track, or the set of normalized
+    track names (see track_key()) whose notes are remapped.
+    """
+    __slots__ = ('table', 'release', 'tracks', 'digest')
+
+    def __init__(self, table, tracks=None):
+        self.table = table
+        self.release = bytes(table[index << NOTE_SHIFT | 127] for index in range(16 * 128))
+        self.tracks = None if tracks is None else frozenset(track_key(name) for name in tracks)
+        names = b'' if self.tracks is None else '\0'.join(sorted(self.tracks)).encode()
+        # Identifies the compiled rules, for converter fingerprints.
+        self.digest = hashlib.sha256(table + b'\0' + names).digest()
+
+    def table_for(self, track_name):
+        """
+        Return the lookup table for a track with the given name, or None when
+        the track is out of scope. track_name is None for unnamed tracks.
+        """
+        if self.tracks is None:
+            return self.table
+        if track_name is not None and track_key(track_name) in self.tracks:
+            return self.table
+        return None
+
+
+def compile_scoped_table(layers, channels, tracks=None):
+    """
+    Compile velocity layers into a ScopedNoteTable.
+
+    layers maps a source note number to a list of (low, high, target) velocity
+    ranges (inclusive); velocities no range covers keep the source note.
+    channels are 1-based MIDI channel numbers.
+    """
+    table = bytearray(_identity_table())
+    for channel in channels:
+        for note, ranges in layers.items():
+            row = (channel - 1) << CHANNEL_SHIFT | note << NOTE_SHIFT
+            for low, high, target in ranges:
+                table[row + low:row + high + 1] = bytes([target]) * (high - low + 1)
+    return ScopedNoteTable(bytes(table), tracks)
+
+
+def remap_track_scoped(track, scoped):
+    """
+    Scoped counterpart of smf.remap_track(): remap the note bytes of raw MTrk
+    data in place using a ScopedNoteTable. Returns the number of note events.
+    """
+    table = scoped.table_for(None)
+    sounding = bytearray(scoped.release)
+    pos = 0
+    end = len(track)
+    running = 0
+    notes = 0
+    while pos < end:
+        while track[pos] & 0x80:
+            pos += 1
+        pos += 1
+
+        status = track[pos]
+        if status & 0x80:
+            pos += 1
+            if status >= 0xF0:
+                meta_type = None
+                if status == 0xFF:
+                    meta_type = track[pos]
+                    pos += 1
+                elif status != 0xF0 and status != 0xF7:
+                    raise SmfError(f'unexpected status byte 0x{status:02X} at track offset {pos - 1}')
+                length, pos = read_vlq(track, pos)
+                if meta_type == TRACK_NAME:
+                    table = scoped.table_for(bytes(track[pos:pos + length]).decode('latin-1'))
+                pos += length
+                continue
+            running = status
+        elif running:
+            status = running
+        else:
+            raise SmfError(f'data byte without running status at track offset {pos}')
+
+        if status < 0xA0:
+            if table is not None:
+                key = (status & 0x0F) << NOTE_SHIFT | track[pos]
+                velocity = track[pos + 1]
+                if status >= 0x90 and velocity:
+                    sounding[key] = track[pos] = table[key << NOTE_SHIFT | velocity]
+                else:
+                    track[pos] = sounding[key]
+            notes += 1
+            pos += 2
+        elif status & 0xE0 == 0xC0:
+            pos += 1
+        else:
+            pos += 2
+    if pos > end:
+        raise SmfError('track is truncated')
+    return notes
+
+
+def remap_events_scoped(events, scoped):
+    """
+    Remap the notes of an events.TrackEvents in place using a ScopedNoteTable.
+    Returns the number of note events.
+    """
+    table = scoped.table_for(None)
+    sounding = bytearray(scoped.release)
+    data1 = events.data1
+    data = events.data
+    notes = 0
+    for index, (status, velocity) in enumerate(zip(events.statuses, events.data2)):
+        if status < 0xA0:
+            if table is not None:
+                key = (status & 0x0F) << NOTE_SHIFT | data1[index]
+                if status >= 0x90 and velocity:
+                    sounding[key] = data1[index] = table[key << NOTE_SHIFT | velocity]
+                else:
+                    data1[index] = sounding[key]
+            notes += 1
+        elif status == 0xFF and data1[index] == TRACK_NAME:
+            offset = events.offsets[index]
+            name = bytes(data[offset:offset + events.lengths[index]]).decode('latin-1')
+            table = scoped.table_for(name)
+    return notes
+
+
+def remap_messages_scoped(track, scoped):
+    """
+    Remap the note_on/note_off messages of a mido.MidiTrack in place using a
+    ScopedNoteTable.
+    """
+    table = scoped.table_for(None)
+    sounding = bytearray(scoped.release)
+    for msg in track:
+        if msg.type == 'note_on' or msg.type == 'note_off':
+            if table is not None:
+                key = msg.channel << NOTE_SHIFT | msg.note
+                if msg.type == 'note_on' and msg.velocity:
+                    sounding[key] = msg.note = table[key << NOTE_SHIFT | msg.velocity]
+                else:
+                    msg.note = sounding[key]
+        elif msg.type == 'track_name':
+            table = scoped.table_for(msg.name)
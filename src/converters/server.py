@@ -0,0 +1,204 @@
+"""
+Resident conversion server.
+
+Keeps warm MidiConverter instances (one per mapping profile) in memory and
+serves conversion requests over a Unix domain socket or a local TCP port, so
+callers do not pay interpreter startup, imports and mapping compilation per
+file.
+
+Wire protocol (one or more requests per connection):
+    request:  {"length": N, "profile": "name"}\\n followed by N bytes of MIDI;
+              profile is optional and must be a registry profile name
+    response: {"ok": true, "length": M}\\n followed by M bytes of MIDI
+              {"ok": false, "error": "message"}\\n on failure
+"""
+import asyncio
+import errno
+import json
+import os
+import socket
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+from .midi_converter import MidiConverter
+from .profiles import DEFAULT_PROFILE, ProfileError, available_profiles, find_profile_file
+
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_WORKERS = 4
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+
+def registry_profile(name):
+    """
+    Return the profile to load for a profile name sent by a client. Clients
+    may only pick registry profiles by name, never a file path.
+    """
+    if not isinstance(name, str) or any(sep and sep in name for sep in ('/', os.sep, os.altsep)):
+        raise ProfileError(f'profile must be a profile name, got {name!r}')
+    if name == DEFAULT_PROFILE:
+        return name
+    # Resolved here so get_profile() does not take the name for a file in
+    # the server's working directory.
+    path = find_profile_file(name)
+    if path is None:
+        raise ProfileError(f"Unknown profile '{name}', available: {', '.join(available_profiles())}")
+    return path
+
+
+def remove_stale_socket(socket_path):
+    """
+    Remove a Unix socket left behind by a server that is no longer running.
+    Raises OSError when socket_path is something else or a server still
+    accepts connections on it; both are left in place.
+    """
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(errno.EEXIST, 'Not replacing a file that is not a socket', socket_path)
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise OSError(errno.EADDRINUSE, 'A server is already listening on this socket', socket_path)
+
+
+class ConversionServer:
+    """
+    Accepts conversion requests from concurrent clients and processes them with
+    a fixed number of workers pulling from a bounded queue. When the queue is
+    full, clients wait before their request is accepted (backpressure).
+    profile is the mapping profile for requests that do not name one, and
+    verify checks every conversion against its input (see MidiConverter).
+    """
+
+    def __init__(self, engine='bytes', max_queue=DEFAULT_MAX_QUEUE, workers=DEFAULT_WORKERS,
+                 cache=None, profile=None, verify=False):
+        self.engine = engine
+        self.cache = cache
+        self.profile = profile
+        self.verify = verify
+        self.workers = workers
+        self.converters = {}
+        self.queue = None
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.max_queue = max_queue
+        self.requests = 0
+        self.failures = 0
+        # Warm up the default profile so the first request is as fast as the rest.
+        self.converter(None)
+
+    def converter(self, profile):
+        if profile is None:
+            profile = self.profile
+        converter = self.converters.get(profile)
+        if converter is None:
+            converter = MidiConverter(engine=self.engine, cache=self.cache, profile=profile,
+                                      verify=self.verify)
+            self.converters[profile] = converter
+        return converter
+
+    def convert(self, data, profile=None):
+        return self.converter(profile).convert_bytes(data)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            data, profile, future = await self.queue.get()
+            try:
+                if not future.cancelled():
+                    result = await loop.run_in_executor(self.executor, self.convert, data, profile)
+                    if not future.cancelled():
+                        future.set_result(result)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+    async def handle_client(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    header = json.loads(line)
+                    length = int(header['length'])
+                    if not 0 <= length <= MAX_REQUEST_BYTES:
+                        raise ValueError(f'request length {length} out of range')
+                except (ValueError, KeyError, TypeError) as e:
+                    await self._respond_error(writer, f'bad request header: {e}')
+                    break
+                data = await reader.readexactly(length)
+                profile = header.get('profile')
+                if profile is not None:
+                    try:
+                        profile = registry_profile(profile)
+                    except ProfileError as e:
+                        self.failures += 1
+                        await self._respond_error(writer, f'ProfileError: {e}')
+                        continue
+                future = loop.create_future()
+                await self.queue.put((data, profile, future))
+                self.requests += 1
+                try:
+                    result = await future
+                except Exception as e:
+                    self.failures += 1
+                    await self._respond_error(writer, f'{type(e).__name__}: {e}')
+                    continue
+                writer.write(json.dumps({'ok': True, 'length': len(result)}).encode() + b'\n')
+                writer.write(result)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond_error(self, writer, message):
+        writer.write(json.dumps({'ok': False, 'error': message}).encode() + b'\n')
+        await writer.drain()
+
+    async def start(self, socket_path=None, host='127.0.0.1', port=None):
+        """
+        Start listening and the worker tasks. Returns the asyncio server. A
+        socket_path left behind by a stopped server is replaced; anything
+        else at socket_path makes this raise OSError.
+        """
+        if socket_path is not None:
+            remove_stale_socket(socket_path)
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._worker_tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        if socket_path is not None:
+            return await asyncio.start_unix_server(self.handle_client, path=socket_path)
+        return await asyncio.start_server(self.handle_client, host=host, port=port)
+
+    async def serve_forever(self, socket_path=None, host='127.0.0.1', port=None):
+        server = await self.start(socket_path, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in self._worker_tasks:
+                task.cancel()
+            self.executor.shutdown(wait=False)
+            if socket_path is not None and os.path.exists(socket_path):
+                os.remove(socket_path)
+
+
+def serve(socket_path=None, host='127.0.0.1', port=None, **options):
+    """
+    Run a ConversionServer until interrupted.
+    """
+    server = ConversionServer(**options)
+    try:
+        asyncio.run(server.serve_forever(socket_path, host, port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,385 @@
+"""
+Raw Standard MIDI File (SMF) engine.
+
+Instead of decoding every event into mido messages, this engine walks the MTrk
+chunks of a file held in a bytearray and overwrites the note byte of note_on
+and note_off events in place. Everything else in the file, including delta
+times, running status and meta/sysex payloads, is left byte for byte as is.
+
+Converted files are written with write_file(): one write into a temporary
+file next to the output, then an atomic rename, so a reader never sees a
+partial file and network filesystems see a few syscalls per file.
+"""
+import contextlib
+import os
+from array import array
+
+
+class SmfError(ValueError):
+    """
+    Raised when a buffer is not a well-formed Standard MIDI File.
+    """
+
+
+def read_vlq(buf, pos):
+    """
+    Read a variable-length quantity starting at pos.
+    Returns the decoded value and the position right after it.
+    """
+    value = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, pos
+
+
+def write_vlq(out, value):
+    """
+    Append value to the bytearray out as a variable-length quantity.
+    """
+    if value < 0x80:
+        out.append(value)
+        return
+    encoded = [value & 0x7F]
+    value >>= 7
+    while value:
+        encoded.append(0x80 | (value & 0x7F))
+        value >>= 7
+    out.extend(reversed(encoded))
+
+
+def iter_chunks(buf):
+    """
+    Yield (chunk_type, start, end) for every chunk after the MThd header,
+    where start and end delimit the chunk data.
+    """
+    if bytes(buf[:4]) != b'MThd':
+        raise SmfError('missing MThd header')
+    pos = 8 + int.from_bytes(buf[4:8], 'big')
+    size = len(buf)
+    while pos + 8 <= size:
+        chunk_type = bytes(buf[pos:pos + 4])
+        length = int.from_bytes(buf[pos + 4:pos + 8], 'big')
+        start = pos + 8
+        end = start + length
+        if end > size:
+            raise SmfError(f'chunk at offset {pos} runs past the end of the file')
+        yield chunk_type, start, end
+        pos = end
+
+
+def remap_track(track, table):
+    """
+    Remap the note byte of every note_on/note_off event in the MTrk data held
+    in the mutable buffer track, in place, using a 128-entry table.
+    Returns the number of note events visited.
+    """
+    pos = 0
+    end = len(track)
+    running = 0
+    notes = 0
+    while pos < end:
+        # Skip the delta time.
+        while track[pos] & 0x80:
+            pos += 1
+        pos += 1
+
+        status = track[pos]
+        if status & 0x80:
+            pos += 1
+            if status >= 0xF0:
+                if status == 0xFF:
+                    pos += 1
+                elif status != 0xF0 and status != 0xF7:
+                    raise SmfError(f'unexpected status byte 0x{status:02X} at track offset {pos - 1}')
+                length, pos = read_vlq(track, pos)
+                pos += length
+                continue
+            running = status
+        elif running:
+            status = running
+        else:
+            raise SmfError(f'data byte without running status at track offset {pos}')
+
+        if status < 0xA0:
+            track[pos] = table[track[pos]]
+            notes += 1
+            pos += 2
+        elif status & 0xE0 == 0xC0:
+            pos += 1
+        else:
+            pos += 2
+    if pos > end:
+        raise SmfError('track is truncated')
+    return notes
+
+
+def remap_smf(buf, table, remap=remap_track):
+    """
+    Remap every MTrk chunk of an SMF held in a mutable buffer in place.
+    remap is the per-track function called with each track and table.
+    Returns the number of note events visited.
+    """
+    notes = 0
+    with memoryview(buf) as view:
+        try:
+            for chunk_type, start, end in iter_chunks(view):
+                if chunk_type == b'MTrk':
+                    with view[start:end] as track:
+                        notes += remap(track, table)
+        except IndexError:
+            raise SmfError('track is truncated') from None
+    return notes
+
+
+def count_track(track, note_counts):
+    """
+    Add the source note of every note_on/note_off event in the MTrk data to
+    the 128-entry list note_counts. Returns the number of events in the track.
+    """
+    pos = 0
+    end = len(track)
+    running = 0
+    events = 0
+    while pos < end:
+        while track[pos] & 0x80:
+            pos += 1
+        pos += 1
+        events += 1
+
+        status = track[pos]
+        if status & 0x80:
+            pos += 1
+            if status >= 0xF0:
+                if status == 0xFF:
+                    pos += 1
+                elif status != 0xF0 and status != 0xF7:
+                    raise SmfError(f'unexpected status byte 0x{status:02X} at track offset {pos - 1}')
+                length, pos = read_vlq(track, pos)
+                pos += length
+                continue
+            running = status
+        elif running:
+            status = running
+        else:
+            raise SmfError(f'data byte without running status at track offset {pos}')
+
+        if status < 0xA0:
+            note_counts[track[pos]] += 1
+            pos += 2
+        elif status & 0xE0 == 0xC0:
+            pos += 1
+        else:
+            pos += 2
+    return events
+
+
+def note_histogram(buf):
+    """
+    Scan an SMF without modifying it. Returns the total number of track events
+    and a 128-entry list counting note_on/note_off events per note number.
+    """
+    note_counts = [0] * 128
+    events = 0
+    with memoryview(buf) as view:
+        try:
+            for chunk_type, start, end in iter_chunks(view):
+                if chunk_type == b'MTrk':
+                    with view[start:end] as track:
+                        events += count_track(track, note_counts)
+        except IndexError:
+            raise SmfError('track is truncated') from None
+    return events, note_counts
+
+
+def note_offsets(buf):
+    """
+    Scan an SMF once and return an array with the absolute offset of the note
+    byte of every note_on/note_off event, so the file can be remapped with
+    several note tables without scanning it again (see patch_notes()).
+    """
+    offsets = array('L')
+    with memoryview(buf) as view:
+        try:
+            for chunk_type, start, end in iter_chunks(view):
+                if chunk_type != b'MTrk':
+                    continue
+                pos = start
+                running = 0
+                while pos < end:
+                    while view[pos] & 0x80:
+                        pos += 1
+                    pos += 1
+
+                    status = view[pos]
+                    if status & 0x80:
+                        pos += 1
+                        if status >= 0xF0:
+                            if status == 0xFF:
+                                pos += 1
+                            elif status != 0xF0 and status != 0xF7:
+                                raise SmfError(f'unexpected status byte 0x{status:02X} '
+                                               f'at offset {pos - 1}')
+                            length, pos = read_vlq(view, pos)
+                            pos += length
+                            continue
+                        running = status
+                    elif running:
+                        status = running
+                    else:
+                        raise SmfError(f'data byte without running status at offset {pos}')
+
+                    if status < 0xA0:
+                        offsets.append(pos)
+                        pos += 2
+                    elif status & 0xE0 == 0xC0:
+                        pos += 1
+                    else:
+                        pos += 2
+                if pos > end:
+                    raise SmfError('track is truncated')
+        except IndexError:
+            raise SmfError('track is truncated') from None
+    return offsets
+
+
+def patch_notes(data, offsets, table):
+    """
+    Return a copy of data with the note bytes at offsets remapped through table.
+    """
+    buf = bytearray(data)
+    for offset in offsets:
+        buf[offset] = table[buf[offset]]
+    return bytes(buf)
+
+
+def _read_exactly(infile, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    read = 0
+    while read < size:
+        n = infile.readinto(view[read:])
+        if not n:
+            break
+        read += n
+    view.release()
+    if read < size:
+        raise SmfError('unexpected end of file')
+    return buf
+
+
+def convert_smf_stream(infile, outfile, convert_track):
+    """
+    Convert an SMF from a binary file object to another one track at a time.
+
+    Only one chunk is held in memory at once, so peak memory is bounded by the
+    largest track rather than the whole file. convert_track receives each MTrk
+    chunk's data as a bytearray and returns the converted data (it may modify
+    and return the same buffer); the chunk length is written from the converted
+    data, so tracks may change size. Other chunks are copied unchanged.
+    Returns the number of bytes read and written.
+    """
+    header = infile.read(8)
+    if len(header) < 8 or header[:4] != b'MThd':
+        raise SmfError('missing MThd header')
+    header_data = _read_exactly(infile, int.from_bytes(header[4:8], 'big'))
+    outfile.write(header)
+    outfile.write(header_data)
+    read = written = len(header) + len(header_data)
+    while True:
+        chunk_header = infile.read(8)
+        if len(chunk_header) < 8:
+            # Copy trailing bytes after the last chunk through unchanged.
+            outfile.write(chunk_header)
+            return read + len(chunk_header), written + len(chunk_header)
+        chunk_type = chunk_header[:4]
+        data = _read_exactly(infile, int.from_bytes(chunk_header[4:8], 'big'))
+        read += 8 + len(data)
+        if chunk_type == b'MTrk':
+            try:
+                data = convert_track(data)
+            except IndexError:
+                raise SmfError('track is truncated') from None
+        outfile.write(chunk_type + len(data).to_bytes(4, 'big'))
+        outfile.write(data)
+        written += 8 + len(data)
+        del data
+
+
+def read_file(path):
+    """
+    Read a whole file into a single preallocated bytearray.
+    """
+    with open(path, 'rb') as f:
+        buf = bytearray(os.fstat(f.fileno()).st_size)
+        view = memoryview(buf)
+        read = 0
+        while read < len(buf):
+            n = f.readinto(view[read:])
+            if not n:
+                break
+            read += n
+    del view
+    del buf[read:]
+    return buf
+
+
+def _create_output_temp(path):
+    """
+    Create an empty temporary file next to path and return (fd, temp path).
+    It is created with mode 0o666 so the umask applies as for any new file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        tmp_path = os.path.join(directory, f'.tmp-{os.urandom(6).hex()}')
+        try:
+            return os.open(tmp_path, flags, 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+
+@contextlib.contextmanager
+def atomic_output(path):
+    """
+    Yield a binary file that replaces path when the block completes; on error
+    the temporary file is removed and path is left untouched. A replaced file
+    keeps its permissions.
+    """
+    fd, tmp_path = _create_output_temp(path)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            try:
+                mode = os.stat(path).st_mode & 0o7777
+            except FileNotFoundError:
+                pass
+            else:
+                if hasattr(os, 'fchmod'):
+                    os.fchmod(f.fileno(), mode)
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def write_file(path, data):
+    """
+    Write a whole file with a single write and an atomic rename (see atomic_output()).
+    """
+    with atomic_output(path) as f:
+        f.write(data)
+
+
+def convert_smf_file(input_path, output_path, table, remap=remap_track):
+    """
+    Convert input_path to output_path by rewriting note bytes in place.
+    """
+    buf = read_file(input_path)
+    remap_smf(buf, table, remap)
+    write_file(output_path, buf)
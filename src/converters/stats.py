@@ -0,0 +1,116 @@
+import time
+from contextlib import contextmanager, nullcontext
+
+UNMAPPED_GROUP = 'unmapped'
+
+
+class ConversionStats:
+    """
+    Timing and counting statistics for one or more conversions.
+
+    stages maps a stage name (read, scan, parse, remap, save, write, cache) to
+    accumulated wall-clock and CPU seconds. groups maps a mapping group (kick,
+    snare, ...) to the number of note events that were remapped or left
+    untouched; notes not covered by any group are counted under 'unmapped'.
+    An optional hook is called with the per-file stats of every conversion.
+    """
+
+    def __init__(self, hook=None):
+        self.hook = hook
+        self.stages = {}
+        self.groups = {}
+        self.files = 0
+        self.cached = 0
+        self.events = 0
+        self.note_events = 0
+        self.remapped = 0
+        self.untouched = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    @contextmanager
+    def stage(self, name):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            totals = self.stages.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'calls': 0})
+            totals['wall'] += time.perf_counter() - wall
+            totals['cpu'] += time.process_time() - cpu
+            totals['calls'] += 1
+
+    def count_notes(self, events, note_counts, note_table, note_groups):
+        """
+        Record the events of a file given a 128-entry histogram of note_on/note_off
+        source notes, the note table used for the conversion and the mapping
+        group of each note (None for notes that no group maps).
+        """
+        self.events += events
+        for note, count in enumerate(note_counts):
+            if not count:
+                continue
+            self.note_events += count
+            changed = note_table[note] != note
+            if changed:
+                self.remapped += count
+            else:
+                self.untouched += count
+            group = self.groups.setdefault(note_groups[note] or UNMAPPED_GROUP,
+                                           {'remapped': 0, 'untouched': 0})
+            group['remapped' if changed else 'untouched'] += count
+
+    def merge(self, other):
+        """
+        Add the totals of another ConversionStats (or its as_dict() form) to this one.
+        """
+        if isinstance(other, ConversionStats):
+            other = other.as_dict()
+        for name, totals in other['stages'].items():
+            mine = self.stages.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'calls': 0})
+            for key in mine:
+                mine[key] += totals[key]
+        for name, counts in other['groups'].items():
+            mine = self.groups.setdefault(name, {'remapped': 0, 'untouched': 0})
+            for key in mine:
+                mine[key] += counts[key]
+        for key in ('files', 'cached', 'events', 'note_events', 'remapped', 'untouched',
+                    'bytes_read', 'bytes_written'):
+            setattr(self, key, getattr(self, key) + other[key])
+
+    def as_dict(self):
+        return {
+            'files': self.files,
+            'cached': self.cached,
+            'events': self.events,
+            'note_events': self.note_events,
+            'remapped': self.remapped,
+            'untouched': self.untouched,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'stages': {name: dict(totals) for name, totals in self.stages.items()},
+            'groups': {name: dict(counts) for name, counts in self.groups.items()},
+        }
+
+    def format(self):
+        """
+        Return a short human-readable summary.
+        """
+        lines = [f'{self.files} files ({self.cached} cached), {self.events} events, '
+                 f'{self.note_events} note events: {self.remapped} remapped, '
+                 f'{self.untouched} untouched',
+                 f'{self.bytes_read} bytes read, {self.bytes_written} bytes written']
+        for name, totals in self.stages.items():
+            lines.append(f"  {name:<8} wall {totals['wall'] * 1000:9.2f} ms  "
+                         f"cpu {totals['cpu'] * 1000:9.2f} ms  calls {totals['calls']}")
+        for name, counts in sorted(self.groups.items()):
+            lines.append(f"  {name:<10} remapped {counts['remapped']:>8}  "
+                         f"untouched {counts['untouched']:>8}")
+        return '\n'.join(lines)
+
+
+def stage(stats, name):
+    """
+    Time a stage on stats, or do nothing when stats is None.
+    """
+    return nullcontext() if stats is None else stats.stage(name)
@@ -0,0 +1,248 @@
+"""
+Note and velocity transform pipeline.
+
+Transforms run after the profile's note remap: further note remaps, velocity
+curves, per-piece velocity clamps and quantization to a grid. A chain of
+stages is compiled once into a TransformPipeline made of a 128-entry note
+table, a velocity table indexed by source note << 7 | velocity and an
+optional grid, and applied to every event in a single pass, so any chain
+costs one parse and one write.
+
+Only note_on velocities above 0 are transformed, and never to 0, so note_on
+events are never turned into note_offs. Quantization moves note_on events to
+the nearest grid line and moves their note_off by the same amount, keeping
+note lengths.
+"""
+import hashlib
+from array import array
+
+from .notes import note_number
+from .profiles import compile_mappings, validate_groups
+from .smf import SmfError, read_vlq
+
+END_OF_TRACK = 0x2F
+
+
+class NoteRemap:
+    """
+    Remap output notes further with a note-name mapping such as {'C0': 'C#0'}.
+    """
+
+    def __init__(self, mappings):
+        self.table = compile_mappings(validate_groups({'remap': mappings}, 'NoteRemap')['remap'])
+
+
+class VelocityCurve:
+    """
+    Map every velocity through a 128-entry curve (a sequence or bytes).
+    """
+
+    def __init__(self, curve):
+        curve = bytes(curve)
+        if len(curve) != 128 or max(curve) > 127:
+            raise ValueError('A velocity curve needs 128 values between 0 and 127')
+        self.curve = curve
+
+    @classmethod
+    def gamma(cls, gamma):
+        """
+        A power curve: gamma < 1 lifts soft hits, gamma > 1 softens them.
+        """
+        return cls(round(127 * (velocity / 127) ** gamma) for velocity in range(128))
+
+
+class VelocityClamp:
+    """
+    Clamp velocities into [low, high]. pieces limits the clamp to mapping
+    groups of the profile (e.g. ['hihat']) or note names of source notes;
+    by default every note is clamped.
+    """
+
+    def __init__(self, low=1, high=127, pieces=None):
+        if not 1 <= low <= high <= 127:
+            raise ValueError('Velocity clamp needs 1 <= low <= high <= 127')
+        self.low = low
+        self.high = high
+        self.pieces = pieces
+
+
+class Quantize:
+    """
+    Move note_on events towards the nearest multiple of grid ticks; strength
+    1.0 snaps onto the grid, 0.5 moves half way.
+    """
+
+    def __init__(self, grid, strength=1.0):
+        if grid < 1 or not 0 <= strength <= 1:
+            raise ValueError('Quantize needs a grid of at least 1 tick and 0 <= strength <= 1')
+        self.grid = grid
+        self.strength = strength
+
+
+class TransformPipeline:
+    """
+    The fused form of a chain of transforms (see compile_pipeline()).
+    """
+    __slots__ = ('note_table', 'velocity_table', 'grid', 'strength', 'digest')
+
+    def __init__(self, note_table, velocity_table, grid=None, strength=1.0):
+        self.note_table = note_table
+        self.velocity_table = velocity_table
+        self.grid = grid
+        self.strength = strength
+        # Identifies the compiled transforms, for converter fingerprints.
+        self.digest = hashlib.sha256(note_table + velocity_table
+                                     + f'{grid}:{strength}'.encode()).digest()
+
+
+def _clamped_notes(pieces, groups):
+    notes = set()
+    for piece in pieces:
+        if piece in groups:
+            notes.update(note_number(source) for source in groups[piece])
+        else:
+            try:
+                notes.add(note_number(piece))
+            except ValueError:
+                raise ValueError(f"Unknown piece '{piece}': not a mapping group or note name") from None
+    return notes
+
+
+def compile_pipeline(transforms, note_table, groups):
+    """
+    Fuse transforms, applied in order after note_table, into a TransformPipeline.
+    groups are the profile's mapping groups, used to resolve VelocityClamp
+    pieces to source notes.
+    """
+    velocities = [list(range(128)) for _ in range(128)]
+    grid = None
+    strength = 1.0
+    for transform in transforms:
+        if isinstance(transform, NoteRemap):
+            note_table = bytes(transform.table[note] for note in note_table)
+        elif isinstance(transform, VelocityCurve):
+            for row in velocities:
+                row[1:] = [max(1, transform.curve[velocity]) for velocity in row[1:]]
+        elif isinstance(transform, VelocityClamp):
+            notes = (range(128) if transform.pieces is None
+                     else _clamped_notes(transform.pieces, groups))
+            for note in notes:
+                row = velocities[note]
+                row[1:] = [min(max(velocity, transform.low), transform.high)
+                           for velocity in row[1:]]
+        elif isinstance(transform, Quantize):
+            if grid is not None:
+                raise ValueError('Only one Quantize transform is allowed')
+            grid, strength = transform.grid, transform.strength
+        else:
+            raise ValueError(f'Unknown transform {transform!r}')
+    velocity_table = bytes(velocity for row in velocities for velocity in row)
+    return TransformPipeline(note_table, velocity_table, grid, strength)
+
+
+def transform_track(track, pipeline):
+    """
+    Apply a pipeline without a grid to raw MTrk data in place: one lookup for
+    the note and one for the velocity of every note event. Returns the number
+    of note events.
+    """
+    note_table = pipeline.note_table
+    velocity_table = pipeline.velocity_table
+    pos = 0
+    end = len(track)
+    running = 0
+    notes = 0
+    while pos < end:
+        while track[pos] & 0x80:
+            pos += 1
+        pos += 1
+
+        status = track[pos]
+        if status & 0x80:
+            pos += 1
+            if status >= 0xF0:
+                if status == 0xFF:
+                    pos += 1
+                elif status != 0xF0 and status != 0xF7:
+                    raise SmfError(f'unexpected status byte 0x{status:02X} at track offset {pos - 1}')
+                length, pos = read_vlq(track, pos)
+                pos += length
+                continue
+            running = status
+        elif running:
+            status = running
+        else:
+            raise SmfError(f'data byte without running status at track offset {pos}')
+
+        if status < 0xA0:
+            note = track[pos]
+            track[pos] = note_table[note]
+            velocity = track[pos + 1]
+            if status >= 0x90 and velocity:
+                track[pos + 1] = velocity_table[note << 7 | velocity]
+            notes += 1
+            pos += 2
+        elif status & 0xE0 == 0xC0:
+            pos += 1
+        else:
+            pos += 2
+    if pos > end:
+        raise SmfError('track is truncated')
+    return notes
+
+
+def transform_events(events, pipeline):
+    """
+    Apply a pipeline to an events.TrackEvents in place, in one pass over the
+    events followed, when quantizing moved notes, by a stable re-sort.
+    """
+    note_table = pipeline.note_table
+    velocity_table = pipeline.velocity_table
+    grid = pipeline.grid
+    strength = pipeline.strength
+    statuses = events.statuses
+    data1 = events.data1
+    data2 = events.data2
+    ticks = events.ticks
+    shifts = {}
+    moved = False
+    for index, status in enumerate(statuses):
+        if status >= 0xA0:
+            continue
+        note = data1[index]
+        data1[index] = note_table[note]
+        velocity = data2[index]
+        note_on = status >= 0x90 and velocity
+        if note_on:
+            data2[index] = velocity_table[note << 7 | velocity]
+        if grid is None:
+            continue
+        key = (status & 0x0F) << 7 | note
+        tick = ticks[index]
+        if note_on:
+            nearest = (tick + grid // 2) // grid * grid
+            shift = round((nearest - tick) * strength)
+            shifts.setdefault(key, []).append(shift)
+        else:
+            pending = shifts.get(key)
+            shift = pending.pop(0) if pending else 0
+        if shift:
+            ticks[index] = tick + shift
+            moved = True
+    if moved:
+        _sort_events(events)
+
+
+def _sort_events(events):
+    ticks = events.ticks
+    statuses = events.statuses
+    count = len(statuses)
+    last = count - 1
+    # End of track stays last, after any note moved past it.
+    keeps_end = count and statuses[last] == 0xFF and events.data1[last] == END_OF_TRACK
+    if keeps_end:
+        ticks[last] = max(ticks)
+    order = sorted(range(count), key=lambda index: (ticks[index], keeps_end and index == last))
+    for name in ('ticks', 'statuses', 'data1', 'data2', 'offsets', 'lengths'):
+        values = getattr(events, name)
+        setattr(events, name, array(values.typecode, [values[index] for index in order]))
@@ -0,0 +1,300 @@
+"""
+Conversion verification.
+
+Walks the input and output of a conversion together, one track at a time,
+and checks that the output differs from the input only where the note table
+says it should: delta times, status bytes, velocities and all other channel
+data, meta and sysex payloads and non-track chunks must be identical, and
+every note_on/note_off note must be the input note remapped through the
+compiled table. Both sides are compared as decoded events, so output written
+with or without running status verifies the same way.
+
+Two quick checks avoid decoding both files. Output of the bytes engine keeps
+the input's byte layout, so verify_patched() only decodes the input, with
+TrackEvents rather than the engine's own walk, to find its note bytes; the
+events engine passes its decoded input on (see expected_notes() and
+verify_events()), so only the output is decoded. Notes are then checked
+against the table for whole buffers at once with bytes.translate() and
+integer bitwise operations rather than event by event.
+"""
+from array import array
+from itertools import compress
+
+from .events import TrackEvents
+from .scoped import remap_events_scoped
+from .smf import SmfError, iter_chunks, read_vlq
+
+# 0xFF for the status bytes of note_off and note_on events, 0 otherwise.
+NOTE_STATUS_MASK = bytes(0xFF if 0x80 <= status < 0xA0 else 0 for status in range(256))
+
+
+class VerificationError(ValueError):
+    """
+    Raised when converted output does not match its input. offset is the byte
+    offset in the output file of the first mismatching event or chunk and
+    input_offset the matching offset in the input file.
+    """
+
+    def __init__(self, message, offset=None, input_offset=None):
+        super().__init__(message)
+        self.offset = offset
+        self.input_offset = input_offset
+
+
+def _first_difference(a, b):
+    for index, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return index
+    return min(len(a), len(b))
+
+
+def _byte_table(note_table):
+    return bytes(note_table) + bytes(range(128, 256))
+
+
+def _merge(original, changed, mask):
+    """
+    Return original with the bytes of changed taken wherever mask is 0xFF,
+    computed on whole buffers as integers.
+    """
+    original = int.from_bytes(original, 'little')
+    return original ^ ((original ^ int.from_bytes(changed, 'little'))
+                       & int.from_bytes(mask, 'little'))
+
+
+def _mark_notes(events, note_mask, start=0):
+    """
+    Write 0xFF into note_mask at start plus the offset of every
+    note_on/note_off note byte of a TrackEvents.
+    """
+    notes = events.statuses.tobytes().translate(NOTE_STATUS_MASK)
+    for offset in compress(events.offsets, notes):
+        note_mask[start + offset] = 0xFF
+
+
+def note_mask(data, track=False):
+    """
+    Return a bytearray as long as data with 0xFF at every note_on/note_off
+    note byte and 0 elsewhere. data is a whole SMF, or the data of one MTrk
+    chunk with track=True. Tracks are decoded with events.TrackEvents, not
+    with the walk the bytes engine converts with, so a misparsed track
+    cannot hide its own mistakes.
+    """
+    mask = bytearray(len(data))
+    if track:
+        _mark_notes(TrackEvents(data), mask)
+        return mask
+    view = memoryview(data)
+    for chunk_type, start, end in iter_chunks(view):
+        if chunk_type == b'MTrk':
+            _mark_notes(TrackEvents(view[start:end]), mask, start)
+    return mask
+
+
+def verify_patched(input_data, output_data, note_table, track=False):
+    """
+    Quick check of output that keeps the input's byte layout: the note bytes
+    of the input (see note_mask()) must be remapped through note_table and
+    every other byte must be unchanged. input_data is a whole SMF, or one
+    track's data with track=True. Returns True when the output passes;
+    otherwise verify_conversion() or verify_track() finds and reports the
+    mismatch.
+    """
+    if len(input_data) != len(output_data):
+        return False
+    try:
+        mask = note_mask(input_data, track)
+    except SmfError:
+        return False
+    input_data = bytes(input_data)
+    expected = _merge(input_data, input_data.translate(_byte_table(note_table)), mask)
+    return expected == int.from_bytes(output_data, 'little')
+
+
+def expected_notes(events, note_table):
+    """
+    Return the data1 array decoded input events must have after conversion:
+    note_on/note_off notes remapped through note_table, everything else unchanged.
+    """
+    data1 = events.data1.tobytes()
+    notes = events.statuses.tobytes().translate(NOTE_STATUS_MASK)
+    merged = _merge(data1, data1.translate(_byte_table(note_table)), notes)
+    return array('B', merged.to_bytes(len(data1), 'little'))
+
+
+def verify_events(store, notes, output_data):
+    """
+    Quick check of output serialized from an events.EventStore: decoding it
+    must give the store's events, with the data1 arrays in notes (see
+    expected_notes(), computed before the store was remapped). Returns True
+    when the output passes; otherwise verify_conversion() finds and reports
+    the mismatch.
+    """
+    output_view = memoryview(output_data)
+    if output_view[:len(store.header)] != store.header:
+        return False
+    try:
+        output_chunks = list(iter_chunks(output_view))
+    except SmfError:
+        return False
+    if len(output_chunks) != len(store.chunks):
+        return False
+    tracks = iter(notes)
+    for (chunk_type, chunk), (output_type, start, end) in zip(store.chunks, output_chunks):
+        if output_type != chunk_type:
+            return False
+        if chunk_type != b'MTrk':
+            if output_view[start:end] != chunk:
+                return False
+            continue
+        try:
+            converted = TrackEvents(output_view[start:end])
+        except SmfError:
+            return False
+        if (converted.data1 != next(tracks) or converted.ticks != chunk.ticks
+                or converted.statuses != chunk.statuses or converted.data2 != chunk.data2
+                or converted.lengths != chunk.lengths):
+            return False
+        for index in _meta_indices(chunk.statuses):
+            offset, length = chunk.offsets[index], chunk.lengths[index]
+            expected = chunk.data[offset:offset + length]
+            offset = converted.offsets[index]
+            if converted.data[offset:offset + length] != expected:
+                return False
+    return True
+
+
+def _meta_indices(statuses):
+    """
+    Yield the indices of the meta and sysex events in a statuses array.
+    """
+    statuses = statuses.tobytes()
+    for status in (0xF0, 0xF7, 0xFF):
+        index = statuses.find(status)
+        while index != -1:
+            yield index
+            index = statuses.find(status, index + 1)
+
+
+def _ends_with_end_of_track(events):
+    """
+    Return True when the only end_of_track of a TrackEvents is its last event
+    and has no payload.
+    """
+    statuses, data1 = events.statuses, events.data1
+    ends = [index for index in _meta_indices(statuses)
+            if statuses[index] == 0xFF and data1[index] == 0x2F]
+    return ends == [len(events) - 1] and events.lengths[-1] == 0
+
+
+def event_offset(track, index):
+    """
+    Return the offset within raw MTrk data of the event at position index.
+    """
+    pos = 0
+    running = 0
+    for _ in range(index):
+        _, pos = read_vlq(track, pos)
+        status = track[pos]
+        if status & 0x80:
+            pos += 1
+            if status >= 0xF0:
+                if status == 0xFF:
+                    pos += 1
+                length, pos = read_vlq(track, pos)
+                pos += length
+                continue
+            running = status
+        else:
+            status = running
+        pos += 1 if status & 0xE0 == 0xC0 else 2
+    return pos
+
+
+def verify_track(input_track, output_track, note_table, scoped_table=None):
+    """
+    Compare the raw data of one input track with its converted output.
+    Returns None when they match, or (event index, description) of the first mismatch.
+    """
+    source = TrackEvents(input_track)
+    converted = TrackEvents(output_track)
+    if _ends_with_end_of_track(converted) and not _ends_with_end_of_track(source):
+        # The mido, numpy and events engines move end_of_track to the end of
+        # the track as mido does; the bytes engine leaves it where it was.
+        source = TrackEvents(source.to_bytes())
+    # Remapping the decoded input gives the notes the output must contain.
+    if scoped_table is None:
+        source.remap(note_table)
+    else:
+        remap_events_scoped(source, scoped_table)
+
+    mismatches = []
+    if len(source) != len(converted):
+        mismatches.append((min(len(source), len(converted)),
+                           f'{len(converted)} events instead of {len(source)}'))
+    for name, expected, actual in (('tick', source.ticks, converted.ticks),
+                                   ('status', source.statuses, converted.statuses),
+                                   ('note or data byte', source.data1, converted.data1),
+                                   ('velocity or data byte', source.data2, converted.data2),
+                                   ('payload length', source.lengths, converted.lengths)):
+        if expected != actual:
+            index = _first_difference(expected, actual)
+            if index < min(len(source), len(converted)):
+                mismatches.append((index, f'{name} is {actual[index]}, expected {expected[index]}'))
+    # Meta and sysex events are rare; compare their payloads one by one.
+    for index, status in enumerate(source.statuses):
+        if mismatches and index >= min(mismatches)[0]:
+            break
+        if status >= 0xF0:
+            start = source.offsets[index]
+            expected = source.data[start:start + source.lengths[index]]
+            start = converted.offsets[index]
+            if converted.data[start:start + converted.lengths[index]] != expected:
+                mismatches.append((index, 'meta/sysex payload differs'))
+                break
+    return min(mismatches) if mismatches else None
+
+
+def verify_conversion(input_data, output_data, note_table, scoped_table=None):
+    """
+    Check a converted SMF against its input; raise VerificationError at the
+    first mismatch. note_table (and scoped_table for scoped profiles) are the
+    compiled tables the conversion used.
+    """
+    input_view = memoryview(input_data)
+    output_view = memoryview(output_data)
+    try:
+        header_end = 8 + int.from_bytes(input_view[4:8], 'big')
+        if bytes(output_view[:header_end]) != bytes(input_view[:header_end]):
+            raise VerificationError('MThd header differs', 0, 0)
+        input_chunks = list(iter_chunks(input_view))
+        output_chunks = list(iter_chunks(output_view))
+    except SmfError as e:
+        raise VerificationError(f'malformed file: {e}') from None
+    for number, (input_chunk, output_chunk) in enumerate(zip(input_chunks, output_chunks)):
+        input_type, input_start, input_end = input_chunk
+        output_type, output_start, output_end = output_chunk
+        if input_type != output_type:
+            raise VerificationError(f'chunk {number} is {output_type!r} instead of {input_type!r}',
+                                    output_start - 8, input_start - 8)
+        input_track = input_view[input_start:input_end]
+        output_track = output_view[output_start:output_end]
+        if input_type != b'MTrk':
+            if input_track != output_track:
+                raise VerificationError(f'chunk {number} ({input_type!r}) differs',
+                                        output_start, input_start)
+            continue
+        try:
+            mismatch = verify_track(input_track, output_track, note_table, scoped_table)
+        except SmfError as e:
+            raise VerificationError(f'track {number}: {e}', output_start, input_start) from None
+        if mismatch is not None:
+            index, description = mismatch
+            offset = output_start + event_offset(output_track, index)
+            input_offset = input_start + event_offset(input_track, index)
+            raise VerificationError(
+                f'track {number}, event {index} at output offset {offset} '
+                f'(input offset {input_offset}): {description}', offset, input_offset)
+    if len(input_chunks) != len(output_chunks):
+        raise VerificationError(f'{len(output_chunks)} chunks instead of {len(input_chunks)}',
+                                len(output_data), len(input_data))
@@ -0,0 +1,165 @@
+"""
+Incremental folder sync and watch mode.
+
+A manifest records, for every converted input, its size, modification time,
+content hash and the fingerprint of the converter (engine + compiled mapping
+profile) that produced the output. A sync only hashes files whose size or
+mtime changed and only converts files whose content or profile changed;
+outputs whose inputs were deleted are removed. Watch mode polls the input
+tree and syncs files once they have stopped changing for a debounce period.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import namedtuple
+
+from .batch import is_midi_path
+from .smf import write_file
+
+MANIFEST_VERSION = 1
+MANIFEST_FILENAME = '.midi-drums-manifest.json'
+
+SyncResult = namedtuple('SyncResult', ['converted', 'removed', 'unchanged', 'failed'])
+
+
+class SyncManifest:
+    """
+    JSON manifest of converted inputs, keyed by path relative to the input root.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data['entries']
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self.entries}, f, indent=1,
+                      sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def scan_tree(input_root, exclude=None):
+    """
+    Return {relative_path: (size, mtime_ns)} for every MIDI file under input_root,
+    skipping the exclude directory (e.g. an output root inside the input root).
+    """
+    exclude = os.path.abspath(exclude) if exclude else None
+    files = {}
+    stack = [input_root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if exclude is None or os.path.abspath(entry.path) != exclude:
+                        stack.append(entry.path)
+                elif entry.is_file() and is_midi_path(entry.name):
+                    stat = entry.stat()
+                    files[os.path.relpath(entry.path, input_root)] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path) or os.curdir, exist_ok=True)
+    write_file(path, data)
+
+
+def sync_folder(input_root, output_root, converter, manifest, files=None, only=None):
+    """
+    Bring output_root up to date with input_root.
+
+    files is a scan_tree() result (scanned here when None); only restricts
+    conversion to the given relative paths, while deletions are always applied.
+    Returns a SyncResult of relative paths.
+    """
+    if files is None:
+        files = scan_tree(input_root, exclude=output_root)
+    fingerprint = converter.fingerprint
+    converted, removed, unchanged, failed = [], [], [], []
+
+    for relative_path, (size, mtime_ns) in sorted(files.items()):
+        if only is not None and relative_path not in only:
+            continue
+        entry = manifest.entries.get(relative_path)
+        output_path = os.path.join(output_root, relative_path)
+        up_to_date = (entry is not None and entry['fingerprint'] == fingerprint
+                      and os.path.exists(output_path))
+        if up_to_date and entry['size'] == size and entry['mtime_ns'] == mtime_ns:
+            unchanged.append(relative_path)
+            continue
+        try:
+            with open(os.path.join(input_root, relative_path), 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()
+            if not (up_to_date and entry['sha256'] == digest):
+                _write_atomic(output_path, converter.convert_bytes(data))
+                converted.append(relative_path)
+            else:
+                # Touched but not modified: only refresh the recorded stat.
+                unchanged.append(relative_path)
+        except Exception as e:
+            failed.append((relative_path, f'{type(e).__name__}: {e}'))
+            continue
+        manifest.entries[relative_path] = {
+            'size': size,
+            'mtime_ns': mtime_ns,
+            'sha256': digest,
+            'fingerprint': fingerprint,
+        }
+
+    for relative_path in sorted(set(manifest.entries) - set(files)):
+        try:
+            os.remove(os.path.join(output_root, relative_path))
+        except FileNotFoundError:
+            pass
+        del manifest.entries[relative_path]
+        removed.append(relative_path)
+
+    if converted or removed or only is None:
+        manifest.save()
+    return SyncResult(converted, removed, unchanged, failed)
+
+
+def watch_folder(input_root, output_root, converter, manifest, interval=1.0, debounce=2.0,
+                 on_sync=None, should_stop=None):
+    """
+    Poll input_root every interval seconds and sync files that changed, once
+    their size and mtime have been stable for debounce seconds. on_sync is
+    called with each non-empty SyncResult; the loop ends when should_stop()
+    returns True.
+    """
+    result = sync_folder(input_root, output_root, converter, manifest)
+    if on_sync is not None:
+        on_sync(result)
+    previous = scan_tree(input_root, exclude=output_root)
+    pending = {}
+    while should_stop is None or not should_stop():
+        time.sleep(interval)
+        current = scan_tree(input_root, exclude=output_root)
+        now = time.monotonic()
+        for relative_path, stat in current.items():
+            if previous.get(relative_path) != stat:
+                pending[relative_path] = now
+        for relative_path in list(pending):
+            if relative_path not in current:
+                del pending[relative_path]
+        deleted = set(manifest.entries) - set(current)
+        ready = {path for path, changed in pending.items() if now - changed >= debounce}
+        previous = current
+        if not ready and not deleted:
+            continue
+        for path in ready:
+            del pending[path]
+        result = sync_folder(input_root, output_root, converter, manifest, current, only=ready)
+        if on_sync is not None and (result.converted or result.removed or result.failed):
+            on_sync(result)
@@ -0,0 +1,41 @@
+import io
+
+import mido
+
+# MTrk data whose end_of_track mido moves when it writes the track: missing,
+# repeated in the middle, with a payload, and an empty track.
+IRREGULAR_END_OF_TRACK = (
+    b'\x00\x99\x24\x64\x10\x89\x24\x40',
+    b'\x00\x99\x24\x64\x05\xff\x2f\x00\x10\x89\x24\x40\x07\xff\x2f\x00\x03\xff\x2f\x00',
+    b'\x00\x99\x24\x64\x05\xff\x2f\x01\x00',
+    b'',
+)
+
+
+def build_midi_bytes(track_messages, track_names=None, ticks_per_beat=480):
+    """
+    Build a MIDI file with mido from a list of per-track message lists and return its bytes.
+
+    With track_names, each track starts with a track_name meta message.
+    """
+    mid = mido.MidiFile(ticks_per_beat=ticks_per_beat)
+    for number, messages in enumerate(track_messages):
+        track = mido.MidiTrack()
+        if track_names is not None:
+            track.append(mido.MetaMessage('track_name', name=track_names[number]))
+        track.extend(messages)
+        mid.tracks.append(track)
+    output = io.BytesIO()
+    mid.save(file=output)
+    return output.getvalue()
+
+
+def build_smf(*tracks, ticks_per_beat=480):
+    """
+    Build a format 1 MIDI file from raw track chunk payloads, without mido.
+    """
+    data = (b'MThd' + (6).to_bytes(4, 'big') + (1).to_bytes(2, 'big')
+            + len(tracks).to_bytes(2, 'big') + ticks_per_beat.to_bytes(2, 'big'))
+    for track in tracks:
+        data += b'MTrk' + len(track).to_bytes(4, 'big') + track
+    return data
@@ -0,0 +1,106 @@
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+
+from src.converters.analyze import MappingGraph, analyze_groups, analyze_profile, format_analysis
+from src.converters.notes import note_number
+from src.converters.profiles import ProfileError, get_profile
+
+
+class TestAnalyzer(unittest.TestCase):
+    def test_overridden_keys_and_unreachable_targets(self):
+        report = analyze_groups({'kick': {'C1': 'C0', 'B0': 'C0'}, 'tom': {'C1': 'G0'}})
+        self.assertEqual(report['overridden'], [{
+            'note': 'C1', 'groups': ['kick', 'tom'],
+            'effective_group': 'tom', 'effective_targets': ['G0'],
+        }])
+        # C0 is still produced by B0.
+        self.assertEqual(report['unreachable_targets'], [])
+        report = analyze_groups({'kick': {'C1': 'C0'}, 'tom': {'C1': 'G0'}})
+        self.assertEqual(report['unreachable_targets'],
+                         [{'note': 'C0', 'overridden_sources': ['C1']}])
+        self.assertEqual(report['errors'], 2)
+
+    def test_chains_and_idempotence(self):
+        report = analyze_groups({'kick': {'C1': 'C0'}, 'hihat': {'C0': 'B1', 'B1': 'B1'}})
+        self.assertEqual(report['chains'], [{'path': ['C1', 'C0', 'B1'], 'cycle': False}])
+        self.assertEqual(report['idempotence_violations'],
+                         [{'note': 'C1', 'once': 'C0', 'twice': 'B1'}])
+        self.assertEqual(report['errors'], 0)
+
+    def test_cycles(self):
+        report = analyze_groups({'toms': {'C1': 'D1', 'D1': 'C1'}})
+        self.assertEqual(report['chains'], [{'path': ['C1', 'D1', 'C1'], 'cycle': True}])
+        self.assertEqual(len(report['idempotence_violations']), 2)
+        self.assertIn('CYCLE C1 -> D1 -> C1', format_analysis(report))
+
+    def test_velocity_layers_and_invalid_entries(self):
+        report = analyze_groups({'snare': {
+            'E1': [{'velocity': [1, 63], 'note': 'D0'}, {'velocity': [64, 127], 'note': 'D#0'}],
+            'X9': 'D0',
+        }})
+        self.assertEqual(report['targets'], {'D0': ['E1'], 'D#0': ['E1']})
+        self.assertEqual(len(report['invalid']), 1)
+
+    def test_graph_index(self):
+        graph = MappingGraph({36: [24], 35: [24], 24: [71]})
+        self.assertEqual(graph.predecessors[24], (35, 36))
+        self.assertEqual(list(graph.paths(36)), [([36, 24, 71], False)])
+
+    def test_registry_profiles(self):
+        report = analyze_profile()
+        self.assertEqual(report['errors'], 0)
+        self.assertEqual(report['mapped_notes'], len(get_profile().mappings))
+        self.assertIn({'note': 'C1', 'once': 'C0', 'twice': 'B1'}, report['idempotence_violations'])
+        self.assertIs(get_profile().analysis, get_profile().analysis)
+        self.assertEqual(analyze_profile('gm-pv')['errors'], 0)
+
+    def test_strict_profiles(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            profile_path = os.path.join(tmpdir, 'kit.json')
+            with open(profile_path, 'w') as f:
+                json.dump({'groups': {'kick': {'C1': 'C0'}, 'snare': {'C0': 'D0'}}}, f)
+            profile = get_profile(profile_path)
+            # Loading without strict does not pay for the analysis.
+            self.assertIsNone(profile._analysis)
+            with self.assertRaises(ProfileError) as context:
+                get_profile(profile_path, strict=True)
+            self.assertIn('0 errors, 2 warnings', str(context.exception))
+
+            clean_path = os.path.join(tmpdir, 'clean.json')
+            with open(clean_path, 'w') as f:
+                json.dump({'groups': {'kick': {'C1': 'C0'}}}, f)
+            self.assertIs(get_profile(clean_path, strict=True), get_profile(clean_path))
+
+            result = subprocess.run(
+                ["python", "convert_midi.py", "--strict-profile", "--profile", profile_path,
+                 "tests/resources/drums_test.mid", os.path.join(tmpdir, 'out.mid')],
+                capture_output=True, text=True
+            )
+            self.assertEqual(result.returncode, 2)
+            self.assertIn('1 mapping chains, 1 notes change if converted twice', result.stderr)
+            self.assertFalse(os.path.exists(os.path.join(tmpdir, 'out.mid')))
+
+    def test_command_line(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            profile_path = os.path.join(tmpdir, 'broken.json')
+            with open(profile_path, 'w') as f:
+                json.dump({'groups': {'kick': {'C1': 'C0'}, 'tom': {'C1': 'G0'}}}, f)
+            report_path = os.path.join(tmpdir, 'report.json')
+            result = subprocess.run(
+                ["python", "convert_midi.py", "--analyze", "--profile", profile_path,
+                 "--analyze-json", report_path],
+                capture_output=True, text=True
+            )
+            self.assertEqual(result.returncode, 1, msg=result.stderr)
+            self.assertIn('OVERRIDDEN C1', result.stdout)
+            with open(report_path) as f:
+                report = json.load(f)
+            self.assertEqual(report['profiles'][0]['overridden'][0]['effective_group'], 'tom')
+            self.assertEqual(note_number(report['profiles'][0]['targets']['G0'][0]), 36)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+import io
+import os
+import shutil
+import struct
+import subprocess
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+from src.converters.archive import ArchiveError, _can_copy_raw, convert_archive
+from src.converters.midi_converter import MidiConverter
+
+
+class TestArchiveConversion(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        with open('tests/resources/drums_test.mid', 'rb') as f:
+            self.data = f.read()
+        self.expected = MidiConverter(engine='bytes').convert_bytes(self.data)
+        self.members = [
+            ('grooves/', None),
+            ('grooves/verse.mid', self.data),
+            ('grooves/README.txt', b'read me\n' * 100),
+            ('grooves/chorus.MIDI', self.data),
+            ('grooves/broken.mid', b'not midi'),
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir, name)
+
+    def make_zip(self):
+        path = self.path('pack.zip')
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.comment = b'groove pack'
+            for name, data in self.members:
+                info = zipfile.ZipInfo(name, (2020, 5, 17, 12, 30, 0))
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o100644 << 16
+                archive.writestr(info, data or b'')
+        return path
+
+    def make_tar(self, suffix):
+        path = self.path('pack' + suffix)
+        with tarfile.open(path, 'w:gz' if suffix.endswith('gz') else 'w') as archive:
+            for name, data in self.members:
+                info = tarfile.TarInfo(name.rstrip('/'))
+                info.mtime = 1589718600
+                info.uname = 'drummer'
+                if data is None:
+                    info.type = tarfile.DIRTYPE
+                    archive.addfile(info)
+                else:
+                    info.size = len(data)
+                    archive.addfile(info, io.BytesIO(data))
+        return path
+
+    def convert(self, input_path, output_path, workers):
+        return list(convert_archive(input_path, output_path, workers=workers, chunksize=1,
+                                    converter_options={'engine': 'bytes'}))
+
+    def check_results(self, results):
+        self.assertEqual([result.name.rstrip('/') for result in results],
+                         [name.rstrip('/') for name, _ in self.members])
+        self.assertEqual([result.midi for result in results], [False, True, False, True, True])
+        self.assertEqual([result.error is not None for result in results],
+                         [False, False, False, False, True])
+
+    def test_zip(self):
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                output_path = self.path(f'out{workers}.zip')
+                self.check_results(self.convert(self.make_zip(), output_path, workers))
+                with zipfile.ZipFile(self.make_zip()) as source, zipfile.ZipFile(output_path) as target:
+                    self.assertIsNone(target.testzip())
+                    self.assertEqual(target.comment, b'groove pack')
+                    for before, after in zip(source.infolist(), target.infolist()):
+                        self.assertEqual(after.filename, before.filename)
+                        self.assertEqual(after.date_time, before.date_time)
+                        self.assertEqual(after.compress_type, before.compress_type)
+                        self.assertEqual(after.external_attr, before.external_attr)
+                    self.assertEqual(target.read('grooves/verse.mid'), self.expected)
+                    self.assertEqual(target.read('grooves/chorus.MIDI'), self.expected)
+                    self.assertEqual(target.read('grooves/README.txt'), b'read me\n' * 100)
+                    self.assertEqual(target.read('grooves/broken.mid'), b'not midi')
+
+    def test_zip_members_are_copied_without_recompressing(self):
+        input_path = self.path('levels.zip')
+        text = bytes(range(256)) * 64
+        with zipfile.ZipFile(input_path, 'w') as archive:
+            archive.writestr('fast.txt', text, zipfile.ZIP_DEFLATED, compresslevel=1)
+            archive.writestr('stored.bin', text, zipfile.ZIP_STORED)
+            archive.writestr('groove.mid', self.data, zipfile.ZIP_DEFLATED)
+        with zipfile.ZipFile(io.BytesIO(), 'w') as archive:
+            self.assertTrue(_can_copy_raw(archive))
+        output_path = self.path('out.zip')
+        self.convert(input_path, output_path, 1)
+        with zipfile.ZipFile(input_path) as source, zipfile.ZipFile(output_path) as target:
+            self.assertIsNone(target.testzip())
+            for name in ('fast.txt', 'stored.bin'):
+                before, after = source.getinfo(name), target.getinfo(name)
+                # Recompressing at the default level would change the size.
+                self.assertEqual((after.compress_size, after.CRC), (before.compress_size, before.CRC))
+                self.assertEqual(target.read(name), text)
+            self.assertEqual(target.read('groove.mid'), self.expected)
+
+    def test_zip_without_raw_copy(self):
+        output_path = self.path('out.zip')
+        with mock.patch('src.converters.archive._can_copy_raw', return_value=False):
+            self.check_results(self.convert(self.make_zip(), output_path, 1))
+        with zipfile.ZipFile(self.make_zip()) as source, zipfile.ZipFile(output_path) as target:
+            self.assertIsNone(target.testzip())
+            for before, after in zip(source.infolist(), target.infolist()):
+                self.assertEqual((after.filename, after.date_time, after.compress_type),
+                                 (before.filename, before.date_time, before.compress_type))
+                self.assertEqual(after.external_attr, before.external_attr)
+            self.assertEqual(target.read('grooves/verse.mid'), self.expected)
+            self.assertEqual(target.read('grooves/README.txt'), b'read me\n' * 100)
+            self.assertEqual(target.read('grooves/broken.mid'), b'not midi')
+
+    def test_unreadable_zip_member(self):
+        path = self.make_zip()
+        with zipfile.ZipFile(path) as archive:
+            info = archive.getinfo('grooves/verse.mid')
+        with open(path, 'r+b') as f:
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', f.read(4))
+            f.seek(name_length + extra_length, os.SEEK_CUR)
+            # A deflate block of the reserved type 3.
+            f.write(b'\xff')
+        output_path = self.path('out.zip')
+        results = self.convert(path, output_path, 2)
+        self.assertEqual([result.error is not None for result in results],
+                         [False, True, False, False, True])
+        self.assertIn('error', results[1].error)
+        with zipfile.ZipFile(path) as source, zipfile.ZipFile(output_path) as target:
+            self.assertEqual(target.namelist(), source.namelist())
+            self.assertEqual(target.getinfo('grooves/verse.mid').CRC, info.CRC)
+            self.assertEqual(target.read('grooves/chorus.MIDI'), self.expected)
+
+    def test_unreadable_tar_member(self):
+        output_path = self.path('out.tar')
+        with mock.patch('src.converters.archive._TarArchive.read',
+                        side_effect=tarfile.ReadError('unexpected end of data')):
+            results = self.convert(self.make_tar('.tar'), output_path, 1)
+        self.assertEqual(results[1].error,
+                         'ReadError: unexpected end of data (left out of the archive)')
+        with tarfile.open(output_path) as target:
+            self.assertEqual(target.getnames(), ['grooves', 'grooves/README.txt'])
+
+    def test_tar(self):
+        for suffix in ('.tar', '.tar.gz'):
+            with self.subTest(suffix=suffix):
+                output_path = self.path('out' + suffix)
+                self.check_results(self.convert(self.make_tar(suffix), output_path, 2))
+                with tarfile.open(output_path) as target:
+                    verse = target.getmember('grooves/verse.mid')
+                    self.assertEqual(verse.mtime, 1589718600)
+                    self.assertEqual(verse.uname, 'drummer')
+                    self.assertEqual(target.extractfile(verse).read(), self.expected)
+                    self.assertTrue(target.getmember('grooves').isdir())
+                    self.assertEqual(target.extractfile('grooves/README.txt').read(),
+                                     b'read me\n' * 100)
+
+    def test_failure_leaves_output_untouched(self):
+        output_path = self.path('out.zip')
+        with open(output_path, 'wb') as f:
+            f.write(b'previous pack')
+        with mock.patch('src.converters.archive._ZipArchive.copy', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                self.convert(self.make_zip(), output_path, 1)
+        with open(output_path, 'rb') as f:
+            self.assertEqual(f.read(), b'previous pack')
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ['out.zip', 'pack.zip'])
+
+    def test_not_an_archive(self):
+        with self.assertRaises(ArchiveError):
+            list(convert_archive('tests/resources/drums_test.mid', self.path('out.zip')))
+
+    def test_cli_archive(self):
+        output_path = self.path('out.zip')
+        result = subprocess.run(["python", "convert_midi.py", "--archive", "--engine", "bytes",
+                                 self.make_zip(), output_path], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn('Converted 2 of 3 MIDI members, 1 failed, 2 other members copied',
+                      result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+
+from src.converters.async_converter import AsyncMidiConverter, convert_many_async
+from src.converters.midi_converter import MidiConverter
+
+
+class TestAsyncMidiConverter(unittest.TestCase):
+    def setUp(self):
+        with open('tests/resources/drums_test.mid', 'rb') as f:
+            self.data = f.read()
+        self.expected = MidiConverter(engine='bytes').convert_bytes(self.data)
+
+    def test_convert_bytes_and_file(self):
+        async def main():
+            async with AsyncMidiConverter(engine='bytes') as converter:
+                converted = await converter.convert_bytes(self.data)
+                with tempfile.TemporaryDirectory() as tmpdir:
+                    output_path = os.path.join(tmpdir, 'out.mid')
+                    await converter.convert_file('tests/resources/drums_test.mid', output_path)
+                    with open(output_path, 'rb') as f:
+                        return converted, f.read()
+        converted, written = asyncio.run(main())
+        self.assertEqual(converted, self.expected)
+        self.assertEqual(written, self.expected)
+
+    def test_convert_many_reports_failures(self):
+        jobs = [self.data, b'not midi', self.data]
+        results = asyncio.run(convert_many_async(jobs, max_in_flight=2, engine='bytes'))
+        self.assertEqual(len(results), 3)
+        self.assertEqual(sorted(result.error is None for result in results), [False, True, True])
+        for result in results:
+            if result.error is None:
+                self.assertEqual(result.output, self.expected)
+
+    def test_process_executor(self):
+        results = asyncio.run(convert_many_async([self.data] * 4, executor='process',
+                                                 max_workers=2, engine='bytes'))
+        self.assertEqual([result.output for result in results], [self.expected] * 4)
+
+    def test_bounded_in_flight_and_cancellation(self):
+        release = threading.Event()
+        pulled = []
+
+        class SlowConverter(AsyncMidiConverter):
+            def _convert_in_thread(self, job):
+                release.wait(5)
+                return super()._convert_in_thread(job)
+
+        def jobs():
+            for index in range(100):
+                pulled.append(index)
+                yield self.data
+
+        async def main():
+            converter = SlowConverter(max_in_flight=3, max_workers=3, engine='bytes')
+            results = converter.convert_many(jobs())
+            first = asyncio.ensure_future(results.__anext__())
+            await asyncio.sleep(0.1)
+            # Only max_in_flight jobs were taken from the input while all are blocked.
+            in_flight = len(pulled)
+            release.set()
+            result = await first
+            await results.aclose()
+            converter.close()
+            return in_flight, result
+        in_flight, result = asyncio.run(main())
+        self.assertLessEqual(in_flight, 4)
+        self.assertEqual(result.output, self.expected)
+        self.assertLess(len(pulled), 100)
+
+    def test_timeout(self):
+        release = threading.Event()
+
+        class SlowConverter(AsyncMidiConverter):
+            def _convert_in_thread(self, job):
+                release.wait(5)
+                return super()._convert_in_thread(job)
+
+        async def main():
+            converter = SlowConverter(engine='bytes')
+            try:
+                return [result async for result in converter.convert_many([self.data], timeout=0.05)]
+            finally:
+                release.set()
+                converter.close()
+        results = asyncio.run(main())
+        self.assertIn('TimeoutError', results[0].error)
+
+    def test_timed_out_jobs_keep_their_slot(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        class SlowConverter(AsyncMidiConverter):
+            def _convert_in_thread(self, job):
+                with lock:
+                    running[0] += 1
+                    running[1] = max(running)
+                try:
+                    threading.Event().wait(0.1)
+                    return super()._convert_in_thread(job)
+                finally:
+                    with lock:
+                        running[0] -= 1
+
+        async def convert_many():
+            converter = SlowConverter(max_in_flight=2, max_workers=10, engine='bytes')
+            try:
+                return [result async for result in converter.convert_many([self.data] * 6,
+                                                                          timeout=0.02)]
+            finally:
+                converter.close()
+
+        async def convert_bytes():
+            converter = SlowConverter(max_in_flight=2, max_workers=10, engine='bytes')
+            try:
+                return await asyncio.gather(
+                    *(converter.convert_bytes(self.data, timeout=0.02) for _ in range(4)),
+                    return_exceptions=True)
+            finally:
+                converter.close()
+        for main, timed_out in ((convert_many, lambda result: 'TimeoutError' in result.error),
+                                (convert_bytes, lambda error: isinstance(error, asyncio.TimeoutError))):
+            results = asyncio.run(main())
+            self.assertTrue(all(timed_out(result) for result in results))
+            # Timed-out jobs still running on the executor count against max_in_flight.
+            self.assertLessEqual(running[1], 2)
+            while running[0]:
+                threading.Event().wait(0.01)
+            running[1] = 0
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import subprocess
+import tempfile
+import unittest
+
+import mido
+from src.converters.batch import collect_inputs, convert_batch
+
+
+class TestBatchConversion(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.input_root = os.path.join(self.tmpdir.name, 'in')
+        self.output_root = os.path.join(self.tmpdir.name, 'out')
+        os.makedirs(os.path.join(self.input_root, 'grooves', 'verse'))
+        for relative_path in ['a.mid', os.path.join('grooves', 'b.mid'),
+                              os.path.join('grooves', 'verse', 'c.midi')]:
+            mid = mido.MidiFile()
+            track = mido.MidiTrack()
+            mid.tracks.append(track)
+            track.append(mido.Message('note_on', note=36, velocity=100, time=0))
+            mid.save(os.path.join(self.input_root, relative_path))
+        with open(os.path.join(self.input_root, 'grooves', 'broken.mid'), 'wb') as f:
+            f.write(b'not a midi file')
+        with open(os.path.join(self.input_root, 'notes.txt'), 'w') as f:
+            f.write('ignored')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_collect_inputs_from_directory(self):
+        inputs = collect_inputs([self.input_root])
+        relative_paths = sorted(relative_path for _, relative_path in inputs)
+        self.assertEqual(relative_paths, sorted([
+            'a.mid',
+            os.path.join('grooves', 'b.mid'),
+            os.path.join('grooves', 'broken.mid'),
+            os.path.join('grooves', 'verse', 'c.midi'),
+        ]))
+
+    def test_collect_inputs_from_glob_and_manifest(self):
+        pattern = os.path.join(self.input_root, 'grooves', '*.mid')
+        manifest = os.path.join(self.input_root, 'manifest.txt')
+        with open(manifest, 'w') as f:
+            f.write('# comment\n\na.mid\n')
+        inputs = collect_inputs([pattern], manifest)
+        relative_paths = sorted(relative_path for _, relative_path in inputs)
+        self.assertEqual(relative_paths, ['a.mid', 'b.mid', 'broken.mid'])
+
+    def test_bad_file_does_not_abort_batch(self):
+        inputs = collect_inputs([self.input_root])
+        results = list(convert_batch(inputs, self.output_root, workers=2, chunksize=1))
+        self.assertEqual(len(results), 4)
+        failed = [r for r in results if r.error is not None]
+        self.assertEqual([os.path.basename(r.input_path) for r in failed], ['broken.mid'])
+        converted = mido.MidiFile(os.path.join(self.output_root, 'grooves', 'verse', 'c.midi'))
+        notes = [msg.note for msg in converted.tracks[0] if msg.type == 'note_on']
+        self.assertEqual(notes, [24])
+
+    def test_colliding_outputs_fail(self):
+        other_root = os.path.join(self.tmpdir.name, 'other')
+        os.makedirs(other_root)
+        with open(os.path.join(self.input_root, 'a.mid'), 'rb') as f:
+            data = f.read()
+        with open(os.path.join(other_root, 'a.mid'), 'wb') as f:
+            f.write(data)
+        inputs = collect_inputs([self.input_root, other_root])
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                results = list(convert_batch(inputs, self.output_root, workers=workers))
+                self.assertEqual([r.input_path for r in results], [path for path, _ in inputs])
+                failed = [r for r in results if r.error is not None]
+                self.assertEqual(sorted(r.input_path for r in failed),
+                                 sorted([os.path.join(self.input_root, 'a.mid'),
+                                         os.path.join(other_root, 'a.mid'),
+                                         os.path.join(self.input_root, 'grooves', 'broken.mid')]))
+                self.assertIn('is also the output of', failed[0].error)
+                self.assertFalse(os.path.exists(os.path.join(self.output_root, 'a.mid')))
+
+    def test_cli_batch_mode(self):
+        result = subprocess.run(
+            ["python", "convert_midi.py", "--batch", "--output-root", self.output_root,
+             "--workers", "2", self.input_root],
+            capture_output=True,
+            text=True
+        )
+        self.assertEqual(result.returncode, 1, msg=result.stderr)
+        self.assertIn('Converted 3 of 4 files, 1 failed', result.stdout)
+        self.assertTrue(os.path.exists(os.path.join(self.output_root, 'a.mid')))
+
+
+if __name__ == '__main__':
+    unittest.main()
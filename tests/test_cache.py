@@ -0,0 +1,101 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from src.converters.cache import ConversionCache
+from src.converters.midi_converter import MidiConverter
+
+
+class TestConversionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmpdir, 'cache')
+        with open('tests/resources/drums_test.mid', 'rb') as f:
+            self.data = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_hit_after_miss(self):
+        cache = ConversionCache(self.cache_dir)
+        converter = MidiConverter(cache=cache)
+        first = converter.convert_bytes(self.data)
+        second = converter.convert_bytes(self.data)
+        self.assertEqual(first, second)
+        self.assertEqual(first, MidiConverter().convert_bytes(self.data))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_key_depends_on_mappings_and_engine(self):
+        cache = ConversionCache(self.cache_dir)
+        fingerprints = {
+            MidiConverter().fingerprint,
+            MidiConverter(engine='bytes').fingerprint,
+            MidiConverter({'C1': 'D1'}).fingerprint,
+        }
+        self.assertEqual(len(fingerprints), 3)
+        keys = {cache.key(self.data, fingerprint) for fingerprint in fingerprints}
+        self.assertEqual(len(keys), 3)
+
+    def test_convert_to_pv_uses_cache(self):
+        cache = ConversionCache(self.cache_dir)
+        converter = MidiConverter(engine='bytes', cache=cache)
+        input_path = 'tests/resources/drums_test.mid'
+        outputs = []
+        for name in ['first.mid', 'second.mid']:
+            output_path = os.path.join(self.tmpdir, name)
+            converter.convert_to_pv(input_path, output_path)
+            with open(output_path, 'rb') as f:
+                outputs.append(f.read())
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_hit_replaces_output_atomically(self):
+        converter = MidiConverter(engine='bytes', cache=ConversionCache(self.cache_dir))
+        input_path = 'tests/resources/drums_test.mid'
+        output_path = os.path.join(self.tmpdir, 'out.mid')
+        converter.convert_to_pv(input_path, output_path)
+        before = os.stat(output_path).st_ino
+        converter.convert_to_pv(input_path, output_path)
+        # A new file was renamed over the output instead of rewriting it in place.
+        self.assertNotEqual(os.stat(output_path).st_ino, before)
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ['cache', 'out.mid'])
+
+    def test_lru_eviction_by_count(self):
+        cache = ConversionCache(self.cache_dir, max_entries=2)
+        keys = [cache.key(bytes([i]), 'fingerprint') for i in range(2)]
+        for i, key in enumerate(keys):
+            cache.put(key, bytes([i]) * 10)
+            # Make sure mtimes are ordered even on coarse-grained filesystems.
+            os.utime(cache.path(key), (i, i))
+        # Touching the oldest entry makes the other one least recently used.
+        cache.lookup(keys[0])
+        cache.put(cache.key(b'new', 'fingerprint'), b'new')
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+
+    def test_eviction_by_size(self):
+        cache = ConversionCache(self.cache_dir, max_bytes=25)
+        for i in range(3):
+            cache.put(cache.key(bytes([i]), 'fingerprint'), b'x' * 10)
+        self.assertLessEqual(sum(size for _, size, _ in cache._entries()), 25)
+
+    def test_cli_reports_hits_and_misses(self):
+        input_path = 'tests/resources/drums_test.mid'
+        output_path = os.path.join(self.tmpdir, 'out.mid')
+        outputs = []
+        for _ in range(2):
+            result = subprocess.run(
+                ["python", "convert_midi.py", "--cache-dir", self.cache_dir, input_path, output_path],
+                capture_output=True,
+                text=True
+            )
+            self.assertEqual(result.returncode, 0, msg=result.stderr)
+            outputs.append(result.stdout)
+        self.assertIn('Cache: 0 hits, 1 misses', outputs[0])
+        self.assertIn('Cache: 1 hits, 0 misses', outputs[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import subprocess
+import tempfile
+import unittest
+
+from src.converters import cli
+from src.converters.midi_converter import MidiConverter
+
+# Budget for importing the CLI module, in microseconds, for the best of a few
+# runs; it measures about 11-12 ms, and mido (about 33 ms) or NumPy (about
+# 50 ms) alone would take it over.
+IMPORT_BUDGET_US = 25000
+HEAVY_MODULES = ('mido', 'numpy', 'multiprocessing', 'concurrent.futures')
+
+
+def import_times(*args):
+    """
+    Run the CLI with -X importtime and return {module: cumulative microseconds}.
+    """
+    result = subprocess.run(["python", "-X", "importtime", "convert_midi.py"] + list(args),
+                            capture_output=True, text=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, module = line.split('|')
+            if cumulative.strip().isdigit():
+                times[module.strip()] = int(cumulative)
+    return result, times
+
+
+class TestCommandLine(unittest.TestCase):
+    def test_help_does_not_import_heavy_modules(self):
+        best = None
+        for _ in range(3):
+            result, times = import_times('--help')
+            self.assertEqual(result.returncode, 0)
+            for module in HEAVY_MODULES:
+                self.assertNotIn(module, times)
+            cli_time = times['src.converters.cli']
+            best = cli_time if best is None else min(best, cli_time)
+        self.assertLess(best, IMPORT_BUDGET_US)
+
+    def test_import_does_not_load_heavy_modules(self):
+        result = subprocess.run(
+            ["python", "-c", "import sys; import src.converters.cli; "
+                             "print(' '.join(sorted(sys.modules)))"],
+            capture_output=True, text=True
+        )
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        loaded = result.stdout.split()
+        self.assertIn('src.converters.cli', loaded)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, loaded)
+
+    def test_bytes_engine_runs_without_mido(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            result, times = import_times('--engine', 'bytes', 'tests/resources/drums_test.mid',
+                                         os.path.join(tmpdir, 'out.mid'))
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        self.assertNotIn('mido', times)
+
+    def test_stdin_to_file_replaces_output_atomically(self):
+        with open('tests/resources/drums_test.mid', 'rb') as f:
+            data = f.read()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'out.mid')
+            with open(output_path, 'wb') as f:
+                f.write(b'previous')
+            result = subprocess.run(["python", "convert_midi.py", "--engine", "bytes", "-", output_path],
+                                    input=data[:-10], capture_output=True)
+            self.assertNotEqual(result.returncode, 0)
+            with open(output_path, 'rb') as f:
+                self.assertEqual(f.read(), b'previous')
+            result = subprocess.run(["python", "convert_midi.py", "--engine", "bytes", "-", output_path],
+                                    input=data, capture_output=True)
+            self.assertEqual(result.returncode, 0, msg=result.stderr)
+            with open(output_path, 'rb') as f:
+                self.assertEqual(f.read(), MidiConverter(engine='bytes').convert_bytes(data))
+            self.assertEqual(os.listdir(tmpdir), ['out.mid'])
+
+    def test_main_entry_point(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'out.mid')
+            cli.main(['tests/resources/drums_test.mid', output_path])
+            self.assertTrue(os.path.exists(output_path))
+        with self.assertRaises(SystemExit) as context:
+            cli.main(['--list-profiles'])
+        self.assertEqual(context.exception.code, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
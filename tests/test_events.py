@@ -0,0 +1,60 @@
+import unittest
+
+from src.converters.events import EventStore, TrackEvents
+from src.converters.midi_converter import MidiConverter
+from src.converters.smf import SmfError, note_histogram
+from tests.midi_files import IRREGULAR_END_OF_TRACK, build_smf
+
+TRACK1 = (b'\x00\xff\x03\x05Drums'           # track name
+          b'\x00\xf0\x03\x01\x02\xf7'        # sysex
+          b'\x00\xc9\x05'                    # program change
+          b'\x00\x99\x24\x64'                # note_on 36
+          b'\x83\x60\x26\x64'                # running status, 480 ticks
+          b'\x81\x80\x80\x00\x89\x24\x00'    # note_off after a 4-byte delta
+          b'\x00\xe0\x00\x40'                # pitchwheel
+          b'\x00\xff\x2f\x00')
+TRACK2 = b'\x00\x90\x2a\x50\x60\x2a\x00\x00\xff\x2f\x00'
+
+
+class TestEventStore(unittest.TestCase):
+    def setUp(self):
+        self.converter = MidiConverter(engine='events')
+        self.mido_converter = MidiConverter()
+
+    def test_track_fields(self):
+        events = TrackEvents(TRACK1)
+        self.assertEqual(len(events), 8)
+        self.assertEqual(events.ticks.tolist(), [0, 0, 0, 0, 480, 2097632, 2097632, 2097632])
+        self.assertEqual(events.statuses.tolist(),
+                         [0xFF, 0xF0, 0xC9, 0x99, 0x99, 0x89, 0xE0, 0xFF])
+        self.assertEqual(events.data1.tolist(), [0x03, 0, 0x05, 0x24, 0x26, 0x24, 0x00, 0x2F])
+        self.assertEqual(bytes(TRACK1[events.offsets[0]:events.offsets[0] + events.lengths[0]]),
+                         b'Drums')
+
+    def test_round_trip_matches_mido(self):
+        data = build_smf(TRACK1, TRACK2)
+        store = EventStore.from_bytes(data)
+        self.assertEqual(store.to_bytes(), MidiConverter(mappings={}).convert_bytes(data))
+        self.assertEqual(store.note_histogram(), note_histogram(data))
+
+    def test_engine_matches_mido(self):
+        with open('tests/resources/drums_test.mid', 'rb') as f:
+            real = f.read()
+        for data in (real, build_smf(TRACK1, TRACK2)):
+            self.assertEqual(self.converter.convert_bytes(data),
+                             self.mido_converter.convert_bytes(data))
+
+    def test_end_of_track_is_written_like_mido(self):
+        for track in IRREGULAR_END_OF_TRACK:
+            with self.subTest(track=track):
+                data = build_smf(track, TRACK2)
+                converted = MidiConverter(engine='events').convert_bytes(data)
+                self.assertEqual(converted, self.mido_converter.convert_bytes(data))
+
+    def test_truncated_track(self):
+        with self.assertRaises(SmfError):
+            TrackEvents(b'\x00\x99\x24')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+from src.converters.fanout import MultiTargetConverter
+from src.converters.midi_converter import ENGINES, MidiConverter
+from src.converters.smf import note_offsets, patch_notes
+from src.converters.stats import ConversionStats
+from src.converters.verify import VerificationError
+from tests.midi_files import IRREGULAR_END_OF_TRACK, build_smf
+
+PROFILES = [None, 'gm-pv']
+
+
+class TestMultiTargetConverter(unittest.TestCase):
+    def setUp(self):
+        with open('tests/resources/drums_test.mid', 'rb') as f:
+            self.data = f.read()
+
+    def test_outputs_match_single_target_conversion(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                outputs = MultiTargetConverter(PROFILES, engine).convert_bytes(self.data)
+                expected = [MidiConverter(engine=engine, profile=profile).convert_bytes(self.data)
+                            for profile in PROFILES]
+                self.assertEqual(outputs, expected)
+                self.assertNotEqual(outputs[0], outputs[1])
+
+    def test_irregular_end_of_track(self):
+        data = build_smf(*IRREGULAR_END_OF_TRACK)
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                outputs = MultiTargetConverter(PROFILES, engine).convert_bytes(data)
+                expected = [MidiConverter(engine=engine, profile=profile).convert_bytes(data)
+                            for profile in PROFILES]
+                self.assertEqual(outputs, expected)
+
+    def test_verify(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                MultiTargetConverter(PROFILES, engine, verify=True).convert_bytes(self.data)
+        identity = bytes(range(128))
+        with mock.patch('src.converters.fanout.patch_notes',
+                        lambda data, offsets, table: patch_notes(data, offsets, identity)):
+            with self.assertRaises(VerificationError):
+                MultiTargetConverter(PROFILES, 'bytes', verify=True).convert_bytes(self.data)
+
+    def test_parses_once(self):
+        stats = ConversionStats()
+        MultiTargetConverter(PROFILES, 'mido', stats).convert_bytes(self.data)
+        self.assertEqual(stats.stages['parse']['calls'], 1)
+        self.assertEqual(stats.stages['save']['calls'], len(PROFILES))
+
+    def test_patch_notes_leaves_source_untouched(self):
+        offsets = note_offsets(self.data)
+        table = bytes(127 - note for note in range(128))
+        patched = patch_notes(self.data, offsets, table)
+        self.assertEqual(len(patched), len(self.data))
+        for offset in offsets:
+            self.assertEqual(patched[offset], 127 - self.data[offset])
+
+    def test_cli_targets(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            outputs = [os.path.join(tmpdir, 'pv.mid'), os.path.join(tmpdir, 'gm.mid')]
+            result = subprocess.run(
+                ['python', 'convert_midi.py', 'tests/resources/drums_test.mid',
+                 '--target', f'ezd3-pv={outputs[0]}', '--target', f'gm-pv={outputs[1]}', '--verify'],
+                capture_output=True, text=True)
+            self.assertEqual(result.returncode, 0, msg=result.stderr)
+            for output_path, profile in zip(outputs, ['ezd3-pv', 'gm-pv']):
+                with open(output_path, 'rb') as f:
+                    self.assertEqual(f.read(), MidiConverter(profile=profile).convert_bytes(self.data))
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -220,6 +220,20 @@ class TestMidiConverter(unittest.TestCase):
             self.assertEqual(converted, exp,
                              f"Floortom 2: {note} ({self.converter.midi_note_to_name(note)}) should convert to {exp} but got {converted}")
 
+    def test_compiled_note_table(self):
+        # The compiled table must agree with the name-based mapping for every note.
+        table = self.converter.note_table
+        self.assertEqual(len(table), 128)
+        for note in range(128):
+            with self.subTest(note=note):
+                self.assertEqual(table[note], self.convert_note(note))
+                self.assertEqual(self.converter.convert_note(note), table[note])
+
+    def test_compiled_note_table_custom_mappings(self):
+        converter = MidiConverter({'C1': 'D1'})
+        self.assertEqual(converter.note_table[36], 38)
+        self.assertEqual(converter.note_table[35], 35)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
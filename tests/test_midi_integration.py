@@ -1,3 +1,4 @@
+import io
 import unittest
 import tempfile
 import os
@@ -273,5 +274,41 @@ class TestMidiIntegration(unittest.TestCase):
             os.remove(input_filename)
             os.remove(output_filename)
 
+    def test_convert_bytes_matches_file_conversion(self):
+        """
+        Converting in memory must produce the same bytes as converting files on disk.
+        """
+        input_filename = 'tests/resources/drums_test.mid'
+        with open(input_filename, 'rb') as f:
+            data = f.read()
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".mid") as temp_out:
+            output_filename = temp_out.name
+        try:
+            for engine in ['mido', 'bytes', 'numpy']:
+                with self.subTest(engine=engine):
+                    converter = MidiConverter(engine=engine)
+                    converter.convert_to_pv(input_filename, output_filename)
+                    with open(output_filename, 'rb') as f:
+                        expected = f.read()
+                    self.assertEqual(converter.convert_bytes(data), expected)
+
+                    infile, outfile = io.BytesIO(data), io.BytesIO()
+                    converter.convert_stream(infile, outfile)
+                    self.assertEqual(outfile.getvalue(), expected)
+        finally:
+            os.remove(output_filename)
+
+    def test_main_program_stdin_stdout(self):
+        input_filename = 'tests/resources/drums_test.mid'
+        with open(input_filename, 'rb') as f:
+            data = f.read()
+        result = subprocess.run(
+            ["python", "convert_midi.py", "-", "-"],
+            input=data,
+            capture_output=True
+        )
+        self.assertEqual(result.returncode, 0, msg=f"Program error: {result.stderr}")
+        self.assertEqual(result.stdout, MidiConverter().convert_bytes(data))
+
 if __name__ == '__main__':
     unittest.main()
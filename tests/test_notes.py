@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.converters.midi_converter import MidiConverter
+from src.converters.notes import (
+    NoteError, canonical_note_name, is_note_name, note_name, note_number
+)
+from src.converters.profiles import MappingProfile, ProfileError, load_profile
+
+
+class TestNotes(unittest.TestCase):
+    def test_round_trip(self):
+        for middle_c in ('C3', 'C4'):
+            for note in range(128):
+                self.assertEqual(note_number(note_name(note, middle_c), middle_c), note)
+
+    def test_octave_conventions(self):
+        self.assertEqual(note_name(60), 'C3')
+        self.assertEqual(note_name(60, 'C4'), 'C4')
+        self.assertEqual(note_name(0), 'C-2')
+        self.assertEqual(note_name(127, 'C4'), 'G9')
+        self.assertEqual(note_number('A3', middle_c='C4'), note_number('A2'))
+
+    def test_enharmonic_aliases(self):
+        self.assertEqual(note_number('Db1'), note_number('C#1'))
+        self.assertEqual(note_number('E#1'), note_number('F1'))
+        self.assertEqual(note_number('Cb2'), note_number('B1'))
+        self.assertEqual(note_number('B♭0'), note_number('A#0'))
+        self.assertEqual(canonical_note_name('Gb4', middle_c='C4'), 'F#3')
+
+    def test_invalid_names_and_numbers(self):
+        for name in ('H1', 'C', 'C#', 'C10', 'Cb-2', 'c1', '', None):
+            with self.subTest(name=name):
+                self.assertFalse(is_note_name(name))
+                with self.assertRaises(NoteError):
+                    note_number(name)
+        with self.assertRaises(NoteError):
+            note_name(128)
+        with self.assertRaises(NoteError):
+            note_number('C1', middle_c='C5')
+
+    def test_converter_rejects_invalid_names(self):
+        converter = MidiConverter()
+        self.assertEqual(converter.note_name_to_int('Db1'), 37)
+        # Invalid names used to fall back to middle C.
+        with self.assertRaises(NoteError):
+            converter.note_name_to_int('X1')
+        with self.assertRaises(NoteError):
+            MidiConverter(mappings={'C1': 'middle C'})
+
+    def test_profiles_normalize_names(self):
+        profile = MappingProfile('flats', {'toms': {'Db1': 'Eb0'}})
+        self.assertEqual(profile.groups, {'toms': {'C#1': 'D#0'}})
+        with self.assertRaises(ProfileError):
+            MappingProfile('twice', {'toms': {'Db1': 'C0', 'C#1': 'D0'}})
+
+    def test_profile_file_octave_convention(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'scientific.json')
+            with open(path, 'w') as f:
+                json.dump({'middle_c': 'C4', 'groups': {'kick': {'C2': 'C1'}}}, f)
+            self.assertEqual(load_profile(path).mappings, {'C1': 'C0'})
+            with open(path, 'w') as f:
+                json.dump({'middle_c': 'C5', 'groups': {'kick': {'C2': 'C1'}}}, f)
+            with self.assertRaises(ProfileError):
+                load_profile(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
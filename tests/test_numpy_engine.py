@@ -0,0 +1,71 @@
+import io
+import unittest
+
+import mido
+import numpy as np
+from src.converters.midi_converter import MidiConverter
+from src.converters.numpy_engine import encode_vlq, parse_track, vlq_lengths
+from src.converters.smf import SmfError
+from tests.midi_files import IRREGULAR_END_OF_TRACK, build_smf
+
+
+class TestNumpyEngine(unittest.TestCase):
+    def setUp(self):
+        self.mido_converter = MidiConverter()
+        self.numpy_converter = MidiConverter(engine='numpy')
+
+    def test_vlq_encoding(self):
+        values = np.array([0, 0x40, 0x7F, 0x80, 0x2000, 0x3FFF, 0x4000, 0x100000, 0x1FFFFF,
+                           0x200000, 0x8000000, 0xFFFFFFF])
+        lengths = vlq_lengths(values)
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        out = np.zeros(int(lengths.sum()), dtype=np.uint8)
+        encode_vlq(out, starts, values, lengths)
+        expected = [byte for v in values
+                    for byte in mido.midifiles.midifiles.encode_variable_int(int(v))]
+        self.assertEqual(out.tolist(), expected)
+
+    def test_matches_mido_on_real_file(self):
+        with open('tests/resources/drums_test.mid', 'rb') as f:
+            data = f.read()
+        self.assertEqual(self.numpy_converter.convert_bytes(data),
+                         self.mido_converter.convert_bytes(data))
+
+    def test_matches_mido_with_mixed_events(self):
+        track1 = (b'\x00\xff\x03\x05Drums'           # track name
+                  b'\x00\xf0\x03\x01\x02\xf7'        # sysex
+                  b'\x00\xc9\x05'                    # program change
+                  b'\x00\x99\x24\x64'                # note_on 36
+                  b'\x83\x60\x26\x64'                # running status, 480 ticks
+                  b'\x81\x80\x80\x00\x89\x24\x00'    # note_off after a 4-byte delta
+                  b'\x00\xe0\x00\x40'                # pitchwheel
+                  b'\x00\xff\x2f\x00')
+        track2 = b'\x00\x90\x2a\x50\x60\x2a\x00\x00\xff\x2f\x00'
+        data = build_smf(track1, track2)
+        converted = self.numpy_converter.convert_bytes(data)
+        self.assertEqual(converted, self.mido_converter.convert_bytes(data))
+        notes = [msg.note for msg in mido.MidiFile(file=io.BytesIO(converted)).tracks[0]
+                 if msg.type in ('note_on', 'note_off')]
+        self.assertEqual(notes, [24, 26, 24])
+
+    def test_parse_track_fields(self):
+        events = parse_track(b'\x00\x99\x24\x64\x10\x26\x50\x00\xff\x2f\x00')
+        self.assertEqual(events['delta'].tolist(), [0, 16, 0])
+        self.assertEqual(events['status'].tolist(), [0x99, 0x99, 0xFF])
+        self.assertEqual(events['data1'].tolist(), [0x24, 0x26, 0x2F])
+        self.assertEqual(events['data2'].tolist(), [0x64, 0x50, 0])
+
+    def test_end_of_track_is_written_like_mido(self):
+        for track in IRREGULAR_END_OF_TRACK:
+            with self.subTest(track=track):
+                data = build_smf(track)
+                converted = MidiConverter(engine='numpy', verify=True).convert_bytes(data)
+                self.assertEqual(converted, self.mido_converter.convert_bytes(data))
+
+    def test_truncated_track(self):
+        with self.assertRaises(SmfError):
+            parse_track(b'\x00\x99\x24')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import subprocess
+import unittest
+from unittest import mock
+
+import mido
+from src.converters.events import TrackEvents
+from src.converters.midi_converter import MidiConverter
+from src.converters.parallel import TrackPool, events_track_converter, raw_track_converter
+from src.converters.profiles import MappingProfile
+from src.converters.smf import SmfError, remap_track
+from src.converters.transforms import Quantize, VelocityClamp
+from tests.midi_files import build_midi_bytes
+
+TABLE = bytes(range(128))[:36] + bytes([24]) + bytes(range(37, 128))
+
+
+def build_midi(track_count):
+    tracks = []
+    for number in range(track_count):
+        track = []
+        for i in range(50 + number * 10):
+            note = 35 + i % 4
+            track.append(mido.Message('note_on', channel=9, note=note, velocity=20 + i, time=7))
+            track.append(mido.Message('note_off', channel=9, note=note, velocity=64, time=5))
+        tracks.append(track)
+    return build_midi_bytes(tracks, [f'Track {number}' for number in range(track_count)])
+
+
+class TestTrackPool(unittest.TestCase):
+    def setUp(self):
+        self.data = build_midi(4)
+
+    def test_raw_and_events_tracks(self):
+        expected = MidiConverter(engine='bytes', mappings={'C1': 'C0'}).convert_bytes(self.data)
+        for convert_track in (raw_track_converter(remap_track, TABLE),
+                              events_track_converter(TrackEvents.remap, TABLE)):
+            pool = TrackPool(convert_track, workers=2)
+            try:
+                self.assertEqual(pool.convert(self.data), expected)
+                # The pool is reused for later files.
+                self.assertEqual(pool.convert(self.data), expected)
+            finally:
+                pool.close()
+
+    def test_single_track_converts_in_process(self):
+        data = build_midi(1)
+        pool = TrackPool(raw_track_converter(remap_track, TABLE))
+        self.assertEqual(pool.convert(data),
+                         MidiConverter(engine='bytes', mappings={'C1': 'C0'}).convert_bytes(data))
+        self.assertIsNone(pool._executor)
+
+    def test_truncated_track(self):
+        data = bytearray(self.data)
+        # End the second track with an unfinished delta time instead of end_of_track.
+        second = data.index(b'MTrk', data.index(b'MTrk') + 4)
+        end = second + 8 + int.from_bytes(data[second + 4:second + 8], 'big')
+        data[end - 4:end] = b'\x00\x00\x00\x99'
+        pool = TrackPool(raw_track_converter(remap_track, TABLE), workers=2)
+        try:
+            with self.assertRaises(SmfError):
+                pool.convert(bytes(data))
+        finally:
+            pool.close()
+
+
+class TestParallelConverter(unittest.TestCase):
+    def setUp(self):
+        self.data = build_midi(5)
+
+    @mock.patch('src.converters.midi_converter.PARALLEL_MIN_BYTES', 0)
+    def test_matches_serial_conversion(self):
+        scoped = MappingProfile('scoped', {'kick': {'B0': [
+            {'velocity': [1, 40], 'note': 'C0'},
+            {'velocity': [41, 127], 'note': 'D0'},
+        ]}}, scope={})
+        cases = [
+            ('bytes', {}),
+            ('events', {}),
+            ('bytes', {'profile': scoped}),
+            ('events', {'profile': scoped}),
+            ('bytes', {'transforms': [VelocityClamp(30, 60)]}),
+            ('bytes', {'transforms': [Quantize(24)]}),
+        ]
+        for engine, options in cases:
+            with self.subTest(engine=engine, options=options):
+                expected = MidiConverter(engine=engine, **options).convert_bytes(self.data)
+                converter = MidiConverter(engine=engine, track_workers=2, **options)
+                try:
+                    self.assertEqual(converter.convert_bytes(self.data), expected)
+                finally:
+                    converter.close()
+
+    def test_small_files_skip_the_pool(self):
+        converter = MidiConverter(engine='bytes', track_workers=2)
+        self.assertEqual(converter.convert_bytes(self.data),
+                         MidiConverter(engine='bytes').convert_bytes(self.data))
+        self.assertIsNone(converter._track_pool)
+
+    def test_unsupported_options(self):
+        with self.assertRaises(ValueError):
+            MidiConverter(engine='mido', track_workers=2)
+        with self.assertRaises(ValueError):
+            MidiConverter(engine='bytes', streaming=True, track_workers=2)
+
+    def test_command_line_option(self):
+        input_filename = 'tests/resources/drums_test.mid'
+        with open(input_filename, 'rb') as f:
+            data = f.read()
+        result = subprocess.run(
+            ["python", "convert_midi.py", "--engine", "events", "--track-workers", "2", "-", "-"],
+            input=data,
+            capture_output=True
+        )
+        self.assertEqual(result.returncode, 0, msg=f"Program error: {result.stderr}")
+        self.assertEqual(result.stdout, MidiConverter(engine='events').convert_bytes(data))
+
+    def test_command_line_rejects_multi_file_modes(self):
+        for mode in (['--batch', '--output-root', 'out', 'in'], ['--sync', '--output-root', 'out', 'in'],
+                     ['--watch', '--output-root', 'out', 'in'], ['--scan', 'in'],
+                     ['--archive', 'in.zip', 'out.zip'], ['--target', 'gm-pv=out.mid', 'in.mid']):
+            with self.subTest(mode=mode[0]):
+                result = subprocess.run(
+                    ["python", "convert_midi.py", "--engine", "bytes", "--track-workers", "2"] + mode,
+                    capture_output=True, text=True
+                )
+                self.assertEqual(result.returncode, 2)
+                self.assertIn('--track-workers only applies to single-file conversions', result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.converters.midi_converter import MidiConverter
+from src.converters.note_mappings import NOTE_MAPPINGS
+from src.converters.profiles import (
+    DEFAULT_PROFILE, MappingProfile, ProfileError, available_profiles, get_profile, load_profile
+)
+
+
+class TestMappingProfiles(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, filename, content):
+        path = os.path.join(self.tmpdir, filename)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_builtin_profile_matches_note_mappings(self):
+        profile = get_profile(DEFAULT_PROFILE)
+        self.assertEqual(profile.mappings, NOTE_MAPPINGS)
+        self.assertEqual(profile.note_table, MidiConverter().compile_note_mappings(NOTE_MAPPINGS))
+        self.assertIs(get_profile(), profile)
+
+    def test_shipped_profiles_load(self):
+        for name in available_profiles():
+            with self.subTest(profile=name):
+                self.assertEqual(len(get_profile(name).note_table), 128)
+
+    def test_load_json_profile(self):
+        path = self.write('custom.json', json.dumps({
+            'groups': {'kick': {'C1': 'C0'}, 'snare': {'D1': 'D0'}}
+        }))
+        profile = get_profile(path)
+        self.assertEqual(profile.name, 'custom')
+        self.assertEqual(profile.note_table[36], 24)
+        self.assertEqual(profile.note_table[38], 26)
+        self.assertIs(get_profile(path), profile)
+        converter = MidiConverter(profile=path)
+        self.assertIs(converter.note_table, profile.note_table)
+
+    def test_load_toml_profile(self):
+        path = self.write('custom.toml', 'name = "kit"\n\n[groups.kick]\n"C1" = "C0"\n')
+        try:
+            profile = load_profile(path)
+        except ProfileError as e:
+            self.skipTest(str(e))
+        self.assertEqual(profile.name, 'kit')
+        self.assertEqual(profile.note_table[36], 24)
+
+    def test_duplicate_key_within_group(self):
+        path = self.write('dup.json', '{"groups": {"kick": {"C1": "C0", "C1": "D0"}}}')
+        with self.assertRaisesRegex(ProfileError, "duplicate key 'C1'"):
+            load_profile(path)
+
+    def test_duplicate_key_across_groups(self):
+        with self.assertRaisesRegex(ProfileError, "'C0' is mapped by both 'kick' and 'hihat'"):
+            MappingProfile('bad', {'kick': {'C0': 'C0'}, 'hihat': {'C0': 'B1'}})
+
+    def test_invalid_note_name(self):
+        with self.assertRaisesRegex(ProfileError, "invalid note name 'H2'"):
+            MappingProfile('bad', {'kick': {'C1': 'H2'}})
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ProfileError):
+            get_profile('no-such-profile')
+
+
+if __name__ == '__main__':
+    unittest.main()
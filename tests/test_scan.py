@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+import mido
+from src.converters.midi_converter import MidiConverter
+from src.converters.scan import ScanIndex, scan_bytes, scan_corpus, scan_report
+from tests.midi_files import build_midi_bytes
+
+
+class TestScan(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.data = build_midi_bytes([[
+            mido.Message('note_on', channel=9, note=36, velocity=100),
+            mido.Message('note_off', channel=9, note=36, velocity=0, time=10),
+            mido.Message('note_on', channel=9, note=36, velocity=20),
+            mido.Message('note_on', channel=0, note=70, velocity=127),
+            mido.Message('note_on', channel=0, note=70, velocity=0),
+        ]])
+        self.paths = []
+        for name in ('a.mid', 'b.mid'):
+            path = os.path.join(self.tmpdir, name)
+            with open(path, 'wb') as f:
+                f.write(self.data)
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_histogram(self):
+        self.assertEqual(scan_bytes(self.data), {(10, 36, 96): 1, (10, 36, 16): 1, (1, 70, 112): 1})
+
+    def test_report_flags_unmapped_notes(self):
+        scans = scan_corpus(self.paths, workers=2)
+        report = scan_report(scans, MidiConverter())
+        self.assertEqual(report['note_events'], 6)
+        self.assertEqual(report['unmapped'], {'A#3': 2})
+        self.assertEqual(report['files'][0]['unmapped'], {'A#3': 1})
+
+    def test_index_skips_unchanged_files(self):
+        index_path = os.path.join(self.tmpdir, 'index.json')
+        scan_corpus(self.paths, workers=1, index=ScanIndex(index_path))
+        # A cached histogram is returned even though the file is no longer readable MIDI
+        # as long as its size and mtime are unchanged.
+        stat = os.stat(self.paths[0])
+        with open(self.paths[0], 'r+b') as f:
+            f.write(b'XXXX')
+        os.utime(self.paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        scans = scan_corpus(self.paths, workers=1, index=ScanIndex(index_path))
+        self.assertIsNone(scans[0].error)
+        self.assertEqual(scans[0].histogram, scan_bytes(self.data))
+
+        os.utime(self.paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        scans = scan_corpus(self.paths, workers=1, index=ScanIndex(index_path))
+        self.assertIsNotNone(scans[0].error)
+
+    def test_cli_scan(self):
+        report_path = os.path.join(self.tmpdir, 'report.json')
+        result = subprocess.run(["python", "convert_midi.py", "--scan", "--scan-json", report_path,
+                                 self.tmpdir], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        self.assertIn('UNMAPPED', result.stdout)
+        self.assertIn('Scanned 2 files, 6 note events, 2 on 1 unmapped notes', result.stdout)
+        with open(report_path) as f:
+            self.assertEqual(json.load(f)['unmapped'], {'A#3': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import io
+import os
+import tempfile
+import unittest
+
+import mido
+from src.converters.midi_converter import MidiConverter
+from src.converters.profiles import MappingProfile, ProfileError
+from tests.midi_files import build_midi_bytes
+
+ENGINES = ('mido', 'bytes', 'events')
+
+
+def hit(note, channel=9, velocity=100):
+    return [mido.Message('note_on', channel=channel, note=note, velocity=velocity),
+            mido.Message('note_off', channel=channel, note=note, velocity=64, time=10)]
+
+
+def notes(data):
+    return [[msg.note for msg in track if msg.type in ('note_on', 'note_off')]
+            for track in mido.MidiFile(file=io.BytesIO(data)).tracks]
+
+
+class TestScopedMappings(unittest.TestCase):
+    def convert(self, profile, data):
+        results = [notes(MidiConverter(engine=engine, profile=profile).convert_bytes(data))
+                   for engine in ENGINES]
+        for engine, result in zip(ENGINES[1:], results[1:]):
+            self.assertEqual(result, results[0], engine)
+        return results[0]
+
+    def test_channel_scope_defaults_to_channel_10(self):
+        profile = MappingProfile('scoped', {'snare': {'E1': 'D0'}}, scope={})
+        # E1 (40) on channel 10 is a snare, on channel 1 it is a bass note.
+        data = build_midi_bytes([hit(40) + hit(40, channel=0)], ['Song'])
+        self.assertEqual(self.convert(profile, data), [[26, 26, 40, 40]])
+
+    def test_track_scope(self):
+        profile = MappingProfile('scoped', {'snare': {'E1': 'D0'}},
+                                 scope={'channels': [10], 'tracks': ['drums']})
+        data = build_midi_bytes([hit(40), hit(40)], ['Drums ', 'Bass'])
+        self.assertEqual(self.convert(profile, data), [[26, 26], [40, 40]])
+
+    def test_velocity_layers_keep_note_off_on_the_same_note(self):
+        profile = MappingProfile('layers', {'snare': {'E1': [
+            {'velocity': [1, 63], 'note': 'D0'},
+            {'velocity': [64, 127], 'note': 'D#0'},
+        ]}})
+        data = build_midi_bytes([hit(40, velocity=30) + hit(40, velocity=100)
+                                 + [mido.Message('note_on', channel=9, note=40, velocity=90),
+                                    mido.Message('note_on', channel=9, note=40, velocity=0)]],
+                                ['Drums'])
+        self.assertEqual(self.convert(profile, data), [[26, 26, 27, 27, 27, 27]])
+        self.assertEqual(profile.note_table[40], 27)
+
+    def test_streaming(self):
+        profile = MappingProfile('scoped', {'snare': {'E1': 'D0'}}, scope={'tracks': ['Drums']})
+        data = build_midi_bytes([hit(40), hit(40)], ['Drums', 'Bass'])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, 'in.mid')
+            output_path = os.path.join(tmpdir, 'out.mid')
+            with open(input_path, 'wb') as f:
+                f.write(data)
+            MidiConverter(engine='bytes', profile=profile, streaming=True).convert_to_pv(
+                input_path, output_path)
+            with open(output_path, 'rb') as f:
+                self.assertEqual(notes(f.read()), [[26, 26], [40, 40]])
+
+    def test_unscoped_profiles_are_unchanged(self):
+        converter = MidiConverter()
+        self.assertIsNone(converter.scoped_table)
+        scoped = MidiConverter(profile=MappingProfile('scoped', {'kick': {'C1': 'C0'}}, scope={}))
+        self.assertNotEqual(converter.fingerprint, scoped.fingerprint)
+
+    def test_invalid_scopes_and_layers(self):
+        invalid = [
+            ({'kick': {'C1': 'C0'}}, {'channels': [0]}),
+            ({'kick': {'C1': 'C0'}}, {'tracks': 'Drums'}),
+            ({'kick': {'C1': 'C0'}}, {'channel': [10]}),
+            ({'kick': {'C1': [{'velocity': [0, 64], 'note': 'C0'},
+                              {'velocity': [64, 127], 'note': 'C#0'}]}}, None),
+            ({'kick': {'C1': [{'velocity': [0, 128], 'note': 'C0'}]}}, None),
+            ({'kick': {'C1': [{'velocity': [0, 127], 'note': 'H0'}]}}, None),
+        ]
+        for groups, scope in invalid:
+            with self.subTest(groups=groups, scope=scope):
+                with self.assertRaises(ProfileError):
+                    MappingProfile('invalid', groups, scope=scope)
+
+    def test_numpy_engine_rejects_scoped_profiles(self):
+        with self.assertRaises(ValueError):
+            MidiConverter(engine='numpy', profile=MappingProfile('scoped', {'kick': {'C1': 'C0'}},
+                                                                 scope={}))
+
+
+if __name__ == '__main__':
+    unittest.main()
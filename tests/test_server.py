@@ -0,0 +1,148 @@
+import asyncio
+import errno
+import os
+import socket
+import subprocess
+import tempfile
+import unittest
+
+from src.converters.client import ConversionClient, RemoteConversionError, convert_remote
+from src.converters.midi_converter import MidiConverter
+from src.converters.server import ConversionServer
+
+
+class TestConversionServer(unittest.TestCase):
+    def setUp(self):
+        with open('tests/resources/drums_test.mid', 'rb') as f:
+            self.data = f.read()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmpdir.name, 'converter.sock')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def run_with_server(self, scenario, options=None, **listen):
+        async def main():
+            server = ConversionServer(engine='bytes', max_queue=2, workers=2, **(options or {}))
+            listener = await server.start(**listen)
+            try:
+                return server, await scenario(server, listener)
+            finally:
+                listener.close()
+                await listener.wait_closed()
+                for task in server._worker_tasks:
+                    task.cancel()
+                server.executor.shutdown()
+        return asyncio.run(main())
+
+    def test_concurrent_clients_over_unix_socket(self):
+        async def scenario(server, listener):
+            loop = asyncio.get_running_loop()
+            return await asyncio.gather(*[
+                loop.run_in_executor(None, convert_remote, self.data, self.socket_path)
+                for _ in range(8)
+            ])
+        server, results = self.run_with_server(scenario, socket_path=self.socket_path)
+        expected = MidiConverter(engine='bytes').convert_bytes(self.data)
+        self.assertEqual(results, [expected] * 8)
+        self.assertEqual(server.requests, 8)
+
+    def test_several_requests_per_connection_over_tcp(self):
+        async def scenario(server, listener):
+            port = listener.sockets[0].getsockname()[1]
+
+            def run_client():
+                with ConversionClient(port=port) as client:
+                    converted = client.convert(self.data)
+                    gm = client.convert(self.data, profile='gm-pv')
+                    with self.assertRaises(RemoteConversionError):
+                        client.convert(b'not midi')
+                    # The connection stays usable after an error.
+                    return converted, gm, client.convert(self.data)
+            return await asyncio.get_running_loop().run_in_executor(None, run_client)
+        server, (converted, gm, again) = self.run_with_server(scenario, port=0)
+        self.assertEqual(converted, MidiConverter(engine='bytes').convert_bytes(self.data))
+        self.assertEqual(gm, MidiConverter(engine='bytes', profile='gm-pv').convert_bytes(self.data))
+        self.assertEqual(again, converted)
+        self.assertEqual(server.failures, 1)
+
+    def test_default_profile_and_verification(self):
+        async def scenario(server, listener):
+            def run_client():
+                with ConversionClient(self.socket_path) as client:
+                    return client.convert(self.data), client.convert(self.data, profile='ezd3-pv')
+            return await asyncio.get_running_loop().run_in_executor(None, run_client)
+        server, (default, explicit) = self.run_with_server(
+            scenario, options={'profile': 'gm-pv', 'verify': True}, socket_path=self.socket_path)
+        self.assertEqual(default, MidiConverter(engine='bytes', profile='gm-pv').convert_bytes(self.data))
+        self.assertEqual(explicit, MidiConverter(engine='bytes').convert_bytes(self.data))
+        self.assertNotEqual(default, explicit)
+        self.assertTrue(all(converter.verify for converter in server.converters.values()))
+
+    def test_requests_may_only_name_registry_profiles(self):
+        profile_path = os.path.join(self.tmpdir.name, 'gm-pv.json')
+        with open('src/converters/profile_data/gm-pv.json', 'rb') as source, \
+                open(profile_path, 'wb') as target:
+            target.write(source.read())
+
+        async def scenario(server, listener):
+            def run_client():
+                errors = []
+                with ConversionClient(self.socket_path) as client:
+                    for profile in (profile_path, 'profile_data/gm-pv', '..\\gm-pv', 'missing'):
+                        with self.assertRaises(RemoteConversionError) as raised:
+                            client.convert(self.data, profile=profile)
+                        errors.append(str(raised.exception))
+                    return errors, client.convert(self.data, profile='gm-pv')
+            return await asyncio.get_running_loop().run_in_executor(None, run_client)
+        server, (errors, gm) = self.run_with_server(scenario, socket_path=self.socket_path)
+        for error in errors[:2]:
+            self.assertIn('profile must be a profile name', error)
+        self.assertIn("Unknown profile 'missing'", errors[3])
+        self.assertEqual(gm, MidiConverter(engine='bytes', profile='gm-pv').convert_bytes(self.data))
+        self.assertEqual(server.failures, 4)
+
+    def test_socket_path_is_only_replaced_when_stale(self):
+        regular = os.path.join(self.tmpdir.name, 'notes.txt')
+        with open(regular, 'w') as f:
+            f.write('keep me')
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.socket_path)
+        stale.close()
+
+        async def scenario(server, listener):
+            with self.assertRaises(FileExistsError):
+                await ConversionServer(workers=1).start(socket_path=regular)
+            with self.assertRaises(OSError) as raised:
+                await ConversionServer(workers=1).start(socket_path=self.socket_path)
+            self.assertEqual(raised.exception.errno, errno.EADDRINUSE)
+            return await asyncio.get_running_loop().run_in_executor(
+                None, convert_remote, self.data, self.socket_path)
+        server, converted = self.run_with_server(scenario, socket_path=self.socket_path)
+        self.assertEqual(converted, MidiConverter(engine='bytes').convert_bytes(self.data))
+        with open(regular) as f:
+            self.assertEqual(f.read(), 'keep me')
+
+    def test_command_line_rejects_options_the_server_ignores(self):
+        for option in (['--streaming'], ['--stats'], ['--track-workers', '2']):
+            with self.subTest(option=option):
+                result = subprocess.run(['python', 'convert_midi.py', '--serve', '--socket', self.socket_path]
+                                        + option, capture_output=True, text=True, timeout=30)
+                self.assertEqual(result.returncode, 2)
+                self.assertIn('--serve cannot be combined', result.stderr)
+
+    def test_command_line_rejects_options_the_client_ignores(self):
+        for option in (['--engine', 'bytes'], ['--verify'], ['--cache-dir', self.tmpdir.name],
+                       ['--streaming'], ['--quantize', '120'], ['--stats'],
+                       ['--track-workers', '2']):
+            with self.subTest(option=option):
+                result = subprocess.run(['python', 'convert_midi.py', '--connect', '--socket',
+                                         self.socket_path, 'tests/resources/drums_test.mid',
+                                         os.path.join(self.tmpdir.name, 'out.mid')] + option,
+                                        capture_output=True, text=True, timeout=30)
+                self.assertEqual(result.returncode, 2)
+                self.assertIn('--connect cannot be combined', result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
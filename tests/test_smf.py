@@ -0,0 +1,150 @@
+import io
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+import mido
+from src.converters.midi_converter import MidiConverter
+from src.converters.smf import SmfError, atomic_output, remap_smf, write_file
+from tests.midi_files import build_midi_bytes, build_smf
+
+
+class TestSmfEngine(unittest.TestCase):
+    def setUp(self):
+        self.converter = MidiConverter()
+
+    def test_matches_mido_engine_byte_for_byte(self):
+        data = build_midi_bytes([
+            [
+                mido.MetaMessage('track_name', name='Drums', time=0),
+                mido.MetaMessage('set_tempo', tempo=500000, time=0),
+                mido.Message('sysex', data=[1, 2, 3], time=0),
+                mido.Message('program_change', program=5, channel=9, time=0),
+                mido.Message('note_on', note=36, velocity=100, channel=9, time=0),
+                mido.Message('control_change', control=4, value=90, channel=9, time=10),
+                mido.Message('note_off', note=36, velocity=64, channel=9, time=200),
+                mido.Message('pitchwheel', pitch=100, time=5),
+                mido.Message('note_on', note=30, velocity=110, time=20000),
+                mido.Message('note_off', note=30, velocity=0, time=100),
+            ],
+            [
+                mido.Message('note_on', note=42, velocity=80, time=0),
+                mido.Message('note_on', note=42, velocity=0, time=120),
+            ],
+        ])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_filename = os.path.join(tmpdir, 'in.mid')
+            with open(input_filename, 'wb') as f:
+                f.write(data)
+            outputs = {}
+            for engine in ['mido', 'bytes', 'numpy']:
+                output_filename = os.path.join(tmpdir, f'{engine}.mid')
+                MidiConverter(engine=engine).convert_to_pv(input_filename, output_filename)
+                with open(output_filename, 'rb') as f:
+                    outputs[engine] = f.read()
+        self.assertEqual(outputs['bytes'], outputs['mido'])
+        self.assertEqual(outputs['numpy'], outputs['mido'])
+        self.assertNotEqual(outputs['bytes'], data)
+
+    def test_running_status(self):
+        header = b'MThd' + (6).to_bytes(4, 'big') + b'\x00\x00\x00\x01\x01\xe0'
+        # note_on 36, then two more note_on events using running status, then end of track.
+        events = b'\x00\x99\x24\x64' + b'\x10\x26\x64' + b'\x10\x45\x50' + b'\x00\xff\x2f\x00'
+        buf = bytearray(header + b'MTrk' + len(events).to_bytes(4, 'big') + events)
+        self.assertEqual(remap_smf(buf, self.converter.note_table), 3)
+        notes = [msg.note for msg in mido.MidiFile(file=io.BytesIO(bytes(buf))).tracks[0]
+                 if msg.type == 'note_on']
+        self.assertEqual(notes, [24, 26, 69])
+
+    def test_truncated_file(self):
+        data = build_midi_bytes([[mido.Message('note_on', note=36, velocity=100, time=0)]])
+        buf = bytearray(data)
+        # Claim a longer track than the file holds.
+        buf[18:22] = (len(buf)).to_bytes(4, 'big')
+        with self.assertRaises(SmfError):
+            remap_smf(buf, self.converter.note_table)
+        with self.assertRaises(SmfError):
+            remap_smf(bytearray(b'RIFF0000'), self.converter.note_table)
+
+    def test_streaming_matches_in_memory_conversion(self):
+        with open('tests/resources/drums_test.mid', 'rb') as f:
+            data = f.read()
+        for engine in ['bytes', 'numpy']:
+            with self.subTest(engine=engine):
+                outfile = io.BytesIO()
+                MidiConverter(engine=engine, streaming=True).convert_stream(io.BytesIO(data), outfile)
+                self.assertEqual(outfile.getvalue(), MidiConverter(engine=engine).convert_bytes(data))
+
+    def test_streaming_memory_is_bounded_by_largest_track(self):
+        track = b''.join(b'\x00\x99\x24\x64\x10\x89\x24\x40' for _ in range(8000)) + b'\x00\xff\x2f\x00'
+        tracks = 16
+        data = build_smf(*[track] * tracks)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_filename = os.path.join(tmpdir, 'in.mid')
+            output_filename = os.path.join(tmpdir, 'out.mid')
+            with open(input_filename, 'wb') as f:
+                f.write(data)
+            converter = MidiConverter(engine='bytes', streaming=True)
+            tracemalloc.start()
+            try:
+                converter.convert_to_pv(input_filename, output_filename)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            with open(output_filename, 'rb') as f:
+                self.assertEqual(f.read(), MidiConverter(engine='bytes').convert_bytes(data))
+        self.assertLess(peak, 3 * len(track))
+        self.assertLess(peak, len(data) // 4)
+
+    def test_streaming_requires_raw_engine(self):
+        with self.assertRaises(ValueError):
+            MidiConverter(streaming=True)
+
+
+class TestWriteFile(unittest.TestCase):
+    def test_replaces_file_atomically_and_keeps_permissions(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'out.mid')
+            write_file(path, b'first')
+            umask = os.umask(0)
+            os.umask(umask)
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o666 & ~umask)
+            os.chmod(path, 0o640)
+            write_file(path, b'second')
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), b'second')
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o640)
+            self.assertEqual(os.listdir(tmpdir), ['out.mid'])
+
+    def test_failed_write_leaves_output_untouched(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'out.mid')
+            write_file(path, b'original')
+            with self.assertRaises(RuntimeError):
+                with atomic_output(path) as f:
+                    f.write(b'partial')
+                    raise RuntimeError('conversion failed')
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), b'original')
+            self.assertEqual(os.listdir(tmpdir), ['out.mid'])
+
+    def test_converted_files_leave_no_temporary_files(self):
+        data = build_midi_bytes([[mido.Message('note_on', channel=9, note=36, velocity=100),
+                                  mido.Message('note_off', channel=9, note=36, time=10)]])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, 'in.mid')
+            with open(input_path, 'wb') as f:
+                f.write(data)
+            for engine in ('mido', 'bytes', 'events'):
+                output_path = os.path.join(tmpdir, f'{engine}.mid')
+                converter = MidiConverter(engine=engine)
+                converter.convert_to_pv(input_path, output_path)
+                with open(output_path, 'rb') as f:
+                    self.assertEqual(f.read(), converter.convert_bytes(data))
+            self.assertEqual(sorted(os.listdir(tmpdir)),
+                             ['bytes.mid', 'events.mid', 'in.mid', 'mido.mid'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import tempfile
+import unittest
+
+import mido
+from src.converters.midi_converter import ENGINES, MidiConverter
+from src.converters.stats import ConversionStats
+
+
+class TestConversionStats(unittest.TestCase):
+    input_filename = 'tests/resources/drums_test.mid'
+
+    def expected_counts(self):
+        """
+        Count note events and remapped notes by reading the file with mido.
+        """
+        converter = MidiConverter()
+        notes = [msg.note for track in mido.MidiFile(self.input_filename).tracks
+                 for msg in track if msg.type in ('note_on', 'note_off')]
+        remapped = sum(1 for note in notes if converter.note_table[note] != note)
+        return len(notes), remapped
+
+    def test_counts_match_for_every_engine(self):
+        note_events, remapped = self.expected_counts()
+        with open(self.input_filename, 'rb') as f:
+            data = f.read()
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                stats = ConversionStats()
+                converter = MidiConverter(engine=engine, stats=stats)
+                self.assertEqual(converter.convert_bytes(data), MidiConverter(engine=engine).convert_bytes(data))
+                self.assertEqual(stats.files, 1)
+                self.assertEqual(stats.note_events, note_events)
+                self.assertEqual(stats.remapped, remapped)
+                self.assertEqual(stats.untouched, note_events - remapped)
+                self.assertEqual(sum(c['remapped'] for c in stats.groups.values()), remapped)
+                self.assertEqual(stats.bytes_read, len(data))
+                self.assertIn('remap', stats.stages)
+
+    def test_hook_receives_per_file_stats(self):
+        seen = []
+        stats = ConversionStats(hook=seen.append)
+        converter = MidiConverter(stats=stats)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ['a.mid', 'b.mid']:
+                converter.convert_to_pv(self.input_filename, os.path.join(tmpdir, name))
+        self.assertEqual(len(seen), 2)
+        self.assertEqual(stats.files, 2)
+        self.assertEqual(stats.note_events, seen[0].note_events * 2)
+        self.assertIn('write', seen[0].stages)
+        self.assertEqual(stats.stages['read']['calls'], 2)
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(MidiConverter().stats)
+
+    def test_cli_profile_json(self):
+        note_events, remapped = self.expected_counts()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            json_path = os.path.join(tmpdir, 'stats.json')
+            result = subprocess.run(
+                ["python", "convert_midi.py", "--profile-json", json_path, "--batch",
+                 "--output-root", tmpdir, "--workers", "2", self.input_filename],
+                capture_output=True,
+                text=True
+            )
+            self.assertEqual(result.returncode, 0, msg=result.stderr)
+            with open(json_path) as f:
+                report = json.load(f)
+        self.assertEqual(report['files'], 1)
+        self.assertEqual(report['note_events'], note_events)
+        self.assertEqual(report['remapped'], remapped)
+        self.assertIn('kick', report['groups'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import io
+import os
+import subprocess
+import tempfile
+import unittest
+
+import mido
+from src.converters.midi_converter import MidiConverter
+from src.converters.profiles import MappingProfile
+from src.converters.transforms import (
+    NoteRemap, Quantize, VelocityClamp, VelocityCurve, compile_pipeline
+)
+from tests.midi_files import build_midi_bytes
+
+ENGINES = ('mido', 'bytes', 'events')
+PROFILE = MappingProfile('kit', {'kick': {'C1': 'C0'}, 'hihat': {'F#1': 'A#0'}})
+
+
+def build_midi(messages):
+    return build_midi_bytes([messages], ['Drums'], ticks_per_beat=96)
+
+
+def events(data):
+    """
+    (absolute tick, type, note, velocity) of every note message.
+    """
+    result = []
+    tick = 0
+    for msg in mido.MidiFile(file=io.BytesIO(data)).tracks[0]:
+        tick += msg.time
+        if msg.type in ('note_on', 'note_off'):
+            result.append((tick, msg.type, msg.note, msg.velocity))
+    return result
+
+
+class TestTransforms(unittest.TestCase):
+    def setUp(self):
+        self.data = build_midi([
+            mido.Message('note_on', channel=9, note=36, velocity=100, time=5),
+            mido.Message('note_on', channel=9, note=42, velocity=20, time=0),
+            mido.Message('note_off', channel=9, note=36, velocity=64, time=20),
+            mido.Message('note_on', channel=9, note=42, velocity=0, time=3),
+        ])
+
+    def convert(self, transforms, engines=ENGINES):
+        results = [events(MidiConverter(engine=engine, profile=PROFILE,
+                                        transforms=transforms).convert_bytes(self.data))
+                   for engine in engines]
+        for engine, result in zip(engines[1:], results[1:]):
+            self.assertEqual(result, results[0], engine)
+        return results[0]
+
+    def test_stages_compose_in_one_pass(self):
+        transforms = [NoteRemap({'C0': 'D0'}), VelocityCurve.gamma(2.0),
+                      VelocityClamp(40, 90, pieces=['hihat'])]
+        self.assertEqual(self.convert(transforms), [
+            (5, 'note_on', 26, 79),
+            (5, 'note_on', 34, 40),
+            (25, 'note_off', 26, 64),
+            (28, 'note_on', 34, 0),
+        ])
+
+    def test_curve_never_turns_note_on_into_note_off(self):
+        result = self.convert([VelocityCurve([0] * 128)])
+        self.assertEqual([velocity for _, kind, _, velocity in result if kind == 'note_on'],
+                         [1, 1, 0])
+
+    def test_quantize_keeps_note_lengths(self):
+        result = self.convert([Quantize(24)])
+        self.assertEqual(result, [
+            (0, 'note_on', 24, 100),
+            (0, 'note_on', 34, 20),
+            (20, 'note_off', 24, 64),
+            (23, 'note_on', 34, 0),
+        ])
+        half = self.convert([Quantize(24, strength=0.5)])
+        self.assertEqual([tick for tick, _, _, _ in half], [3, 3, 23, 26])
+
+    def test_quantize_keeps_end_of_track_last(self):
+        self.data = build_midi([
+            mido.Message('note_on', channel=9, note=36, velocity=100, time=40),
+            mido.Message('note_off', channel=9, note=36, velocity=64, time=2),
+        ])
+        output = MidiConverter(engine='events', profile=PROFILE,
+                               transforms=[Quantize(48)]).convert_bytes(self.data)
+        track = mido.MidiFile(file=io.BytesIO(output)).tracks[0]
+        self.assertEqual(track[-1].type, 'end_of_track')
+        self.assertEqual(events(output), [(48, 'note_on', 24, 100), (50, 'note_off', 24, 64)])
+
+    def test_streaming_and_file_conversion(self):
+        transforms = [VelocityClamp(high=50), Quantize(24)]
+        expected = self.convert(transforms)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, 'in.mid')
+            with open(input_path, 'wb') as f:
+                f.write(self.data)
+            for engine in ENGINES:
+                for streaming in (False, True) if engine != 'mido' else (False,):
+                    output_path = os.path.join(tmpdir, f'{engine}{streaming}.mid')
+                    MidiConverter(engine=engine, profile=PROFILE, streaming=streaming,
+                                  transforms=transforms).convert_to_pv(input_path, output_path)
+                    with open(output_path, 'rb') as f:
+                        self.assertEqual(events(f.read()), expected, (engine, streaming))
+
+    def test_fingerprint_includes_transforms(self):
+        plain = MidiConverter(engine='bytes', profile=PROFILE)
+        curved = MidiConverter(engine='bytes', profile=PROFILE,
+                               transforms=[VelocityCurve.gamma(0.5)])
+        self.assertNotEqual(plain.fingerprint, curved.fingerprint)
+
+    def test_invalid_pipelines(self):
+        with self.assertRaises(ValueError):
+            VelocityCurve(range(127))
+        with self.assertRaises(ValueError):
+            VelocityClamp(90, 40)
+        with self.assertRaises(ValueError):
+            compile_pipeline([Quantize(24), Quantize(12)], bytes(range(128)), {})
+        with self.assertRaises(ValueError):
+            MidiConverter(profile=PROFILE, transforms=[VelocityClamp(pieces=['cowbell'])])
+        with self.assertRaises(ValueError):
+            MidiConverter(engine='numpy', transforms=[Quantize(24)])
+        with self.assertRaises(ValueError):
+            MidiConverter(verify=True, transforms=[Quantize(24)])
+
+    def test_command_line_options(self):
+        input_filename = 'tests/resources/drums_test.mid'
+        with open(input_filename, 'rb') as f:
+            data = f.read()
+        result = subprocess.run(
+            ["python", "convert_midi.py", "--engine", "bytes", "--velocity-clamp", "40-90:hihat",
+             "--quantize", "24", "-", "-"],
+            input=data,
+            capture_output=True
+        )
+        self.assertEqual(result.returncode, 0, msg=f"Program error: {result.stderr}")
+        converter = MidiConverter(engine='bytes',
+                                  transforms=[VelocityClamp(40, 90, ['hihat']), Quantize(24)])
+        self.assertEqual(result.stdout, converter.convert_bytes(data))
+        for options in (["--engine", "numpy"], ["--verify"]):
+            result = subprocess.run(
+                ["python", "convert_midi.py", "--quantize", "24", "-", "-"] + options,
+                input=data,
+                capture_output=True
+            )
+            self.assertEqual(result.returncode, 2, msg=result.stderr)
+            self.assertNotIn(b'Traceback', result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
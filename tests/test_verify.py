@@ -0,0 +1,136 @@
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+from src.converters.midi_converter import ENGINES, MidiConverter
+from src.converters.events import EventStore
+from src.converters.smf import iter_chunks, remap_smf
+from src.converters.verify import (
+    VerificationError, expected_notes, verify_conversion, verify_events, verify_patched
+)
+from tests.midi_files import IRREGULAR_END_OF_TRACK, build_smf
+
+
+class TestVerification(unittest.TestCase):
+    def setUp(self):
+        with open('tests/resources/drums_test.mid', 'rb') as f:
+            self.data = f.read()
+        self.converter = MidiConverter()
+        self.converted = self.converter.convert_bytes(self.data)
+
+    def first_note_offset(self, data):
+        # Offset of the first note byte: the bytes engine leaves the layout unchanged.
+        for chunk_type, start, end in iter_chunks(data):
+            for pos in range(start, end - 2):
+                if data[pos] & 0xF0 == 0x90:
+                    return pos + 1
+
+    def test_every_engine_verifies(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                MidiConverter(engine=engine, verify=True).convert_bytes(self.data)
+
+    def test_end_of_track_layout(self):
+        # The mido and events engines move end_of_track to the end of each
+        # track; the bytes engine leaves it where it is. Both layouts verify.
+        for track in IRREGULAR_END_OF_TRACK:
+            data = build_smf(track)
+            for engine in ('mido', 'bytes', 'events'):
+                with self.subTest(track=track, engine=engine):
+                    MidiConverter(engine=engine, verify=True).convert_bytes(data)
+
+    def test_wrong_note_reports_offset(self):
+        converted = bytearray(MidiConverter(engine='bytes').convert_bytes(self.data))
+        offset = self.first_note_offset(converted)
+        converted[offset] ^= 1
+        with self.assertRaises(VerificationError) as context:
+            verify_conversion(self.data, converted, self.converter.note_table)
+        self.assertEqual(context.exception.offset, offset - 2)
+        self.assertIn('note or data byte', str(context.exception))
+
+    def test_changed_velocity_and_timing(self):
+        converted = bytearray(MidiConverter(engine='bytes').convert_bytes(self.data))
+        velocity = bytearray(converted)
+        velocity[self.first_note_offset(converted) + 1] ^= 1
+        for data in (velocity, converted[:-4] + b'\x01\xff\x2f\x00'):
+            with self.assertRaises(VerificationError):
+                verify_conversion(self.data, data, self.converter.note_table)
+
+    def test_quick_checks(self):
+        table = self.converter.note_table
+        buf = bytearray(self.data)
+        remap_smf(buf, table)
+        self.assertTrue(verify_patched(self.data, bytes(buf), table))
+        velocity = bytearray(buf)
+        velocity[self.first_note_offset(buf) + 1] ^= 1
+        self.assertFalse(verify_patched(self.data, bytes(velocity), table))
+        self.assertFalse(verify_patched(self.data, self.data, table))
+        self.assertFalse(verify_patched(self.data[:-1] + b'\x01', self.data[:-1] + b'\x01', table))
+
+        store = EventStore.from_bytes(self.data)
+        notes = [expected_notes(track, table) for track in store.tracks]
+        store.remap(table)
+        output = store.to_bytes()
+        self.assertTrue(verify_events(store, notes, output))
+        self.assertFalse(verify_events(store, notes, output[:-4] + b'\x01\xff\x2f\x00'))
+        store.remap(bytes(range(1, 128)) + b'\x00')
+        self.assertFalse(verify_events(store, notes, store.to_bytes()))
+
+    def test_engines_report_quick_check_failures(self):
+        def corrupting_remap(buf, *args, **kwargs):
+            notes = remap_smf(buf, *args, **kwargs)
+            buf[self.first_note_offset(buf) + 1] ^= 1
+            return notes
+
+        with mock.patch('src.converters.midi_converter.remap_smf', corrupting_remap):
+            with self.assertRaises(VerificationError) as context:
+                MidiConverter(engine='bytes', verify=True).convert_bytes(self.data)
+        self.assertIn('velocity or data byte', str(context.exception))
+        to_bytes = EventStore.to_bytes
+
+        def corrupting_to_bytes(store):
+            output = bytearray(to_bytes(store))
+            output[self.first_note_offset(output) + 1] ^= 1
+            return bytes(output)
+
+        # A walk that misreads a meta payload byte as a note is caught: the
+        # quick check finds the note bytes with its own decode of the input.
+        data = build_smf(b'\x00\xff\x01\x01\x24\x00\x99\x24\x64\x00\xff\x2f\x00')
+
+        def misparsing_remap(buf, *args, **kwargs):
+            notes = remap_smf(buf, *args, **kwargs)
+            payload = buf.index(b'\xff\x01\x01') + 3
+            buf[payload] = self.converter.note_table[buf[payload]]
+            return notes
+
+        with mock.patch('src.converters.midi_converter.remap_smf', misparsing_remap):
+            with self.assertRaises(VerificationError) as context:
+                MidiConverter(engine='bytes', verify=True).convert_bytes(data)
+        self.assertIn('payload differs', str(context.exception))
+
+        with mock.patch.object(EventStore, 'to_bytes', corrupting_to_bytes):
+            with self.assertRaises(VerificationError) as context:
+                MidiConverter(engine='events', verify=True).convert_bytes(self.data)
+        self.assertIn('velocity or data byte', str(context.exception))
+
+    def test_unmapped_table_mismatch(self):
+        with self.assertRaises(VerificationError):
+            verify_conversion(self.data, self.converted, bytes(range(128)))
+
+    def test_cli_verify(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = os.path.join(tmpdir, 'out.mid')
+            result = subprocess.run(["python", "convert_midi.py", "--verify",
+                                     "tests/resources/drums_test.mid", output_path],
+                                    capture_output=True, text=True)
+            self.assertEqual(result.returncode, 0, msg=result.stderr)
+            result = subprocess.run(["python", "convert_midi.py", "--verify", "--streaming",
+                                     "tests/resources/drums_test.mid", output_path],
+                                    capture_output=True, text=True)
+            self.assertEqual(result.returncode, 0, msg=result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+
+from src.converters.midi_converter import MidiConverter
+from src.converters.watch import SyncManifest, sync_folder, watch_folder
+
+
+class TestFolderSync(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.input_root = os.path.join(self.tmpdir, 'in')
+        self.output_root = os.path.join(self.tmpdir, 'out')
+        self.manifest_path = os.path.join(self.tmpdir, 'manifest.json')
+        os.makedirs(os.path.join(self.input_root, 'verse'))
+        with open('tests/resources/drums_test.mid', 'rb') as f:
+            self.data = f.read()
+        for relative_path in ['a.mid', os.path.join('verse', 'b.mid')]:
+            self.write_input(relative_path, self.data)
+        self.converter = MidiConverter(engine='bytes')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write_input(self, relative_path, data):
+        with open(os.path.join(self.input_root, relative_path), 'wb') as f:
+            f.write(data)
+
+    def sync(self, converter=None):
+        manifest = SyncManifest(self.manifest_path)
+        return sync_folder(self.input_root, self.output_root, converter or self.converter, manifest)
+
+    def test_only_changed_files_are_converted(self):
+        first = self.sync()
+        self.assertEqual(sorted(first.converted), ['a.mid', os.path.join('verse', 'b.mid')])
+        output_path = os.path.join(self.output_root, 'verse', 'b.mid')
+        with open(output_path, 'rb') as f:
+            self.assertEqual(f.read(), self.converter.convert_bytes(self.data))
+
+        second = self.sync()
+        self.assertEqual(second.converted, [])
+        self.assertEqual(len(second.unchanged), 2)
+
+        # Touching a file without changing it does not reconvert it.
+        os.utime(os.path.join(self.input_root, 'a.mid'), ns=(1, 1))
+        self.assertEqual(self.sync().converted, [])
+
+        self.write_input('a.mid', self.data + b'\0')
+        self.assertEqual(self.sync().converted, ['a.mid'])
+
+    def test_profile_change_reconverts(self):
+        self.sync()
+        result = self.sync(MidiConverter(engine='bytes', profile='gm-pv'))
+        self.assertEqual(len(result.converted), 2)
+
+    def test_deleted_inputs_remove_outputs(self):
+        self.sync()
+        os.remove(os.path.join(self.input_root, 'a.mid'))
+        result = self.sync()
+        self.assertEqual(result.removed, ['a.mid'])
+        self.assertFalse(os.path.exists(os.path.join(self.output_root, 'a.mid')))
+
+    def test_watch_converts_new_files_after_debounce(self):
+        synced = []
+        stop = threading.Event()
+        manifest = SyncManifest(self.manifest_path)
+        thread = threading.Thread(target=watch_folder, args=(
+            self.input_root, self.output_root, self.converter, manifest, 0.05, 0.1),
+            kwargs={'on_sync': synced.append, 'should_stop': stop.is_set})
+        thread.start()
+        try:
+            time.sleep(0.2)
+            self.write_input('new.mid', self.data)
+            deadline = time.monotonic() + 5
+            while not os.path.exists(os.path.join(self.output_root, 'new.mid')):
+                self.assertLess(time.monotonic(), deadline, 'watch did not convert the new file')
+                time.sleep(0.05)
+        finally:
+            stop.set()
+            thread.join()
+        self.assertEqual(len(synced[0].converted), 2)
+        self.assertIn(['new.mid'], [result.converted for result in synced[1:]])
+
+    def test_cli_sync(self):
+        command = ["python", "convert_midi.py", "--sync", "--output-root", self.output_root,
+                   self.input_root]
+        first = subprocess.run(command, capture_output=True, text=True)
+        self.assertEqual(first.returncode, 0, msg=first.stderr)
+        self.assertIn('2 converted, 0 removed, 0 unchanged, 0 failed', first.stdout)
+        second = subprocess.run(command, capture_output=True, text=True)
+        self.assertIn('0 converted, 0 removed, 2 unchanged, 0 failed', second.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()